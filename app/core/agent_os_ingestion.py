@@ -5,19 +5,75 @@ Handles ingestion of Agent OS profiles into Claude OS knowledge bases.
 Integrates with ChromaManager to store parsed Agent OS content.
 """
 
+import functools
 import logging
-from typing import List, Dict, Any, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 
+import numpy as np
 from llama_index.embeddings.ollama import OllamaEmbedding
 
 from app.core.agent_os_parser import AgentOSParser, AgentOSDocument, AgentOSContentType
 from app.core.sqlite_manager import SQLiteManager
 from app.core.config import Config
+from app.core import search_cache
+from app.core.http_clients import embed_batch
 
 logger = logging.getLogger(__name__)
 
 
+# Config is immutable, so bind the Ollama settings used on hot paths once
+_OLLAMA_HOST = Config.OLLAMA_HOST
+_EMBED_MODEL = Config.OLLAMA_EMBED_MODEL
+_OLLAMA_EMBED_URL = f"{_OLLAMA_HOST}/api/embed"
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _join_list(value: list) -> str:
+    # Serialize lists as comma-separated strings (map(str) keeps the loop in C)
+    return ",".join(map(str, value))
+
+
+# Metadata coercion by exact type; covers nearly every value parsed from YAML
+_META_COERCERS = {
+    str: _identity,
+    int: _identity,
+    float: _identity,
+    bool: _identity,
+    list: _join_list,
+}
+
+
+def _coerce_metadata_value(value: Any) -> Any:
+    """Convert a metadata value to a type the vector store accepts (str, int, float, bool)."""
+    coerce = _META_COERCERS.get(value.__class__)
+    if coerce is not None:
+        return coerce(value)
+    # Subclasses of the supported types are rare; fall back to isinstance
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, list):
+        return _join_list(value)
+    # Convert other types to string
+    return str(value)
+
+
+@functools.lru_cache(maxsize=None)
+def _query_embed_model(model_name: str) -> OllamaEmbedding:
+    """Get the Ollama embedding model used for search queries."""
+    return OllamaEmbedding(model_name=model_name, base_url=_OLLAMA_HOST)
+
+
+@functools.lru_cache(maxsize=1024)
+def _embed_query(model_name: str, query: str) -> Tuple[float, ...]:
+    """Embed a search query. Cached per process, keyed on (model, query)."""
+    return tuple(_query_embed_model(model_name).get_text_embedding(query))
+
+
 class AgentOSIngestion:
     """Handles ingestion of Agent OS profiles into knowledge bases."""
 
@@ -31,11 +87,23 @@ class AgentOSIngestion:
         self.db_manager = db_manager
         self.parser = AgentOSParser()
 
+        # Embedding client is reused across batches
+        self._embed_model: Optional[OllamaEmbedding] = None
+
+    def _get_embed_model(self) -> OllamaEmbedding:
+        """Get the Ollama embedding model, creating it on first use."""
+        if self._embed_model is None:
+            self._embed_model = OllamaEmbedding(
+                model_name=_EMBED_MODEL,
+                base_url=_OLLAMA_HOST
+            )
+        return self._embed_model
+
     def ingest_profile(
         self,
         kb_name: str,
         profile_path: str,
-        batch_size: int = 100
+        batch_size: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Ingest an Agent OS profile into a knowledge base.
@@ -44,6 +112,7 @@ class AgentOSIngestion:
             kb_name: Name of the knowledge base
             profile_path: Path to the Agent OS profile directory
             batch_size: Number of documents to process in each batch
+                (defaults to Config.OLLAMA_EMBED_BATCH_SIZE)
 
         Returns:
             Dictionary with ingestion statistics
@@ -52,11 +121,10 @@ class AgentOSIngestion:
             ValueError: If KB doesn't exist or profile path is invalid
         """
         logger.info(f"Starting Agent OS profile ingestion: {profile_path} -> {kb_name}")
+        batch_size = batch_size or Config.OLLAMA_EMBED_BATCH_SIZE
 
         # Validate KB exists
-        collections = self.db_manager.list_collections()
-        kb_names = [col["name"] for col in collections]
-        if kb_name not in kb_names:
+        if not self.db_manager.collection_exists(kb_name):
             raise ValueError(f"Knowledge base '{kb_name}' does not exist")
 
         # Parse the profile directory
@@ -82,87 +150,165 @@ class AgentOSIngestion:
             "errors": []
         }
 
-        # Count documents by type
-        for doc in documents:
-            content_type = doc.content_type.value
-            stats["documents_by_type"][content_type] = \
-                stats["documents_by_type"].get(content_type, 0) + 1
-
-        # Process in batches
-        for i in range(0, len(documents), batch_size):
-            batch = documents[i:i + batch_size]
+        # Process in batches. Each batch is embedded on this thread while the
+        # previous batch is written to the database on a worker thread, so the
+        # write latency is hidden behind the (much slower) embedding call.
+        pending_commit = None
+        with ThreadPoolExecutor(max_workers=1) as executor:
             try:
-                self._ingest_batch(kb_name, batch)
-                logger.info(f"Ingested batch {i//batch_size + 1}: {len(batch)} documents")
-            except Exception as e:
-                error_msg = f"Failed to ingest batch {i//batch_size + 1}: {e}"
-                logger.error(error_msg)
-                stats["errors"].append(error_msg)
-                stats["success"] = False
+                for i in range(0, len(documents), batch_size):
+                    batch = documents[i:i + batch_size]
+                    batch_num = i // batch_size + 1
+                    try:
+                        texts, metadatas, ids, type_counts = self._prepare_batch(batch)
+                        self._merge_type_counts(stats["documents_by_type"], type_counts)
+                        embeddings = self._embed_texts(texts)
+                    except Exception as e:
+                        self._record_batch_error(stats, batch_num, e)
+                        continue
+
+                    if pending_commit:
+                        self._finish_commit(stats, *pending_commit)
+                    future = executor.submit(
+                        self._commit_batch, kb_name, texts, embeddings, metadatas, ids
+                    )
+                    pending_commit = (batch_num, len(batch), future)
+
+                if pending_commit:
+                    self._finish_commit(stats, *pending_commit)
+                    pending_commit = None
+            finally:
+                if pending_commit:
+                    pending_commit[2].cancel()
 
         logger.info(f"Agent OS ingestion complete: {stats}")
         return stats
 
-    def _ingest_batch(self, kb_name: str, documents: List[AgentOSDocument]) -> None:
+    def _finish_commit(
+        self,
+        stats: Dict[str, Any],
+        batch_num: int,
+        batch_len: int,
+        future: Future
+    ) -> None:
+        """Wait for a pending batch write and record its outcome in stats."""
+        try:
+            future.result()
+            logger.info(f"Ingested batch {batch_num}: {batch_len} documents")
+        except Exception as e:
+            self._record_batch_error(stats, batch_num, e)
+
+    @staticmethod
+    def _merge_type_counts(totals: Dict[str, int], counts: Dict[str, int]) -> None:
+        """Add per-batch document type counts into the running totals."""
+        for content_type, count in counts.items():
+            totals[content_type] = totals.get(content_type, 0) + count
+
+    def _record_batch_error(self, stats: Dict[str, Any], batch_num: int, error: Exception) -> None:
+        """Record a failed batch in the ingestion stats."""
+        error_msg = f"Failed to ingest batch {batch_num}: {error}"
+        logger.error(error_msg)
+        stats["errors"].append(error_msg)
+        stats["success"] = False
+
+    def _ingest_batch(self, kb_name: str, documents: List[AgentOSDocument]) -> Dict[str, int]:
         """
         Ingest a batch of documents into the knowledge base.
 
         Args:
             kb_name: Name of the knowledge base
             documents: List of AgentOSDocument objects to ingest
+
+        Returns:
+            Number of documents ingested per content type
         """
         if not documents:
-            return
+            return {}
 
-        # Prepare data for ChromaDB
+        texts, metadatas, ids, type_counts = self._prepare_batch(documents)
+        embeddings = self._embed_texts(texts)
+        self._commit_batch(kb_name, texts, embeddings, metadatas, ids)
+        return type_counts
+
+    def _prepare_batch(
+        self,
+        documents: List[AgentOSDocument]
+    ) -> Tuple[List[str], List[Dict[str, Any]], List[str], Dict[str, int]]:
+        """
+        Build the texts, metadata and IDs for a batch of documents.
+
+        Args:
+            documents: List of AgentOSDocument objects to ingest
+
+        Returns:
+            Tuple of (texts, metadatas, ids, documents per content type)
+        """
         texts = []
         metadatas = []
         ids = []
+        type_counts: Dict[str, int] = {}
 
         for idx, doc in enumerate(documents):
+            type_counts[doc.content_type.value] = type_counts.get(doc.content_type.value, 0) + 1
+
             # Create unique ID
-            doc_id = f"{doc.content_type.value}_{Path(doc.file_path).stem}_{idx}"
+            file_stem = doc.file_stem or Path(doc.file_path).stem
+            doc_id = f"{doc.content_type.value}_{file_stem}_{idx}"
 
-            # Prepare metadata (ChromaDB only supports string, int, float, bool)
-            metadata = {
+            # Prepare metadata (only string, int, float, bool are stored).
+            # Built in one literal; document metadata is merged last, so (as
+            # before) a parsed key with the same name overrides a base key.
+            metadatas.append({
                 "content_type": doc.content_type.value,
                 "title": doc.title,
                 "file_path": doc.file_path,
                 "source": "agent_os",
-            }
-
-            # Add document metadata (convert complex types to strings)
-            for key, value in doc.metadata.items():
-                if isinstance(value, (str, int, float, bool)):
-                    metadata[key] = value
-                elif isinstance(value, list):
-                    # Serialize lists as comma-separated strings
-                    metadata[key] = ",".join(str(v) for v in value)
-                else:
-                    # Convert other types to string
-                    metadata[key] = str(value)
-
+                **{key: _coerce_metadata_value(value) for key, value in doc.metadata.items()},
+            })
             texts.append(doc.content)
-            metadatas.append(metadata)
             ids.append(doc_id)
 
-        # Generate embeddings
-        embed_model = OllamaEmbedding(
-            model_name=Config.OLLAMA_EMBED_MODEL,
-            base_url=Config.OLLAMA_HOST
-        )
-        embeddings = [embed_model.get_text_embedding(text) for text in texts]
+        return texts, metadatas, ids, type_counts
 
-        # Add to SQLite
+    def _commit_batch(
+        self,
+        kb_name: str,
+        texts: List[str],
+        embeddings: np.ndarray,
+        metadatas: List[Dict[str, Any]],
+        ids: List[str]
+    ) -> None:
+        """Write an embedded batch to the knowledge base (int8-quantized)."""
         self.db_manager.add_documents(
             kb_name=kb_name,
             documents=texts,
             embeddings=embeddings,
             metadatas=metadatas,
-            ids=ids
+            ids=ids,
+            quantize=True
         )
 
-        logger.debug(f"Added {len(documents)} documents to {kb_name}")
+        logger.debug(f"Added {len(texts)} documents to {kb_name}")
+
+    def _embed_texts(self, texts: List[str]) -> np.ndarray:
+        """
+        Generate embeddings for a batch of texts.
+
+        Sends the whole batch to Ollama's /api/embed endpoint (see
+        http_clients.embed_batch, which splits overloaded batches and falls
+        back to one request per text).
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            float32 array of shape (len(texts), embedding_dim)
+        """
+        embeddings = embed_batch(
+            texts, _OLLAMA_EMBED_URL, _EMBED_MODEL,
+            lambda text: self._get_embed_model().get_text_embedding(text)
+        )
+        return np.asarray(embeddings, dtype=np.float32)
 
     def get_profile_stats(self, kb_name: str) -> Dict[str, Any]:
         """
@@ -234,11 +380,13 @@ class AgentOSIngestion:
 
             if query:
                 # Semantic search with type filter
-                embed_model = OllamaEmbedding(
-                    model_name=Config.OLLAMA_EMBED_MODEL,
-                    base_url=Config.OLLAMA_HOST
-                )
-                query_embedding = embed_model.get_text_embedding(query)
+                query_embedding = list(_embed_query(_EMBED_MODEL, query))
+
+                cache_scope = (kb_name, content_type.value, limit)
+                cached = search_cache.get(cache_scope, query_embedding)
+                if cached is not None:
+                    return cached
+                generation = search_cache.generation(kb_name)
 
                 results = self.db_manager.query_documents(
                     kb_name=kb_name,
@@ -255,6 +403,8 @@ class AgentOSIngestion:
                         "metadata": results["metadatas"][i],
                         "distance": results.get("distances", [0])[i]
                     })
+
+                search_cache.put(cache_scope, query_embedding, documents, generation)
             else:
                 # Just get all of this type
                 results = self.db_manager.get_documents_by_metadata(
@@ -13,16 +13,33 @@ Agent OS Structure:
 - specs/ - Feature specifications (optional)
 """
 
+import io
 import os
+import re
 import yaml
+from collections import Counter
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any, Tuple
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from enum import Enum
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Prefer the LibYAML-backed loader; the pure-Python one is several times slower
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader
+    logger.warning("LibYAML not available, using pure-Python YAML loader (install libyaml-dev for faster parsing)")
+
+# First level-1 Markdown heading
+_MARKDOWN_TITLE_RE = re.compile(r"^# (.*)$", re.MULTILINE)
+
+# Pre-built indentation prefixes for _yaml_to_text
+_INDENTS = tuple("  " * i for i in range(16))
+
 
 class AgentOSContentType(str, Enum):
     """Types of content in Agent OS profiles."""
@@ -47,6 +64,7 @@ class AgentOSDocument:
     content: str
     file_path: str
     metadata: Dict[str, Any]
+    file_stem: str = ""  # Path(file_path).stem, set by the parser
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for storage."""
@@ -73,7 +91,8 @@ class AgentOSParser:
     }
     
     # Supported file extensions
-    SUPPORTED_EXTENSIONS = {".yml", ".yaml", ".md"}
+    SUPPORTED_EXTENSIONS = frozenset({".yml", ".yaml", ".md"})
+    _SUPPORTED_SUFFIXES = tuple(SUPPORTED_EXTENSIONS)  # For str.endswith
     
     def __init__(self):
         """Initialize the Agent OS parser."""
@@ -109,15 +128,22 @@ class AgentOSParser:
                 f"Not a valid Agent OS profile. Expected at least one of: {', '.join(valid_subdirs)}"
             )
         
-        documents = []
-        
-        # Parse each subdirectory
+        # Collect every supported file up front so they can be parsed in parallel
+        worklist = []
         for subdir_name, content_type in self.DIRECTORY_TYPE_MAP.items():
             subdir_path = path / subdir_name
             if subdir_path.exists() and subdir_path.is_dir():
-                docs = self._parse_content_directory(subdir_path, content_type)
-                documents.extend(docs)
-                logger.info(f"Parsed {len(docs)} documents from {subdir_name}/")
+                worklist.extend(
+                    (file_path, content_type, subdir_path)
+                    for file_path in self._find_supported_files(subdir_path)
+                )
+        
+        documents = self._parse_files(worklist)
+        
+        type_counts = Counter(doc.content_type for doc in documents)
+        for subdir_name, content_type in self.DIRECTORY_TYPE_MAP.items():
+            if (path / subdir_name).is_dir():
+                logger.info(f"Parsed {type_counts[content_type]} documents from {subdir_name}/")
         
         logger.info(f"Total documents parsed: {len(documents)}")
         return documents
@@ -137,19 +163,69 @@ class AgentOSParser:
         Returns:
             List of parsed documents
         """
-        documents = []
+        return self._parse_files([
+            (file_path, content_type, directory)
+            for file_path in self._find_supported_files(directory)
+        ])
+    
+    def _find_supported_files(self, directory: Path) -> List[Path]:
+        """Recursively find all supported files in a directory."""
+        return list(self._iter_supported(directory))
+    
+    def _iter_supported(self, directory: Path) -> Iterator[Path]:
+        """
+        Yield supported files under a directory using os.scandir.
         
-        # Recursively find all supported files
-        for file_path in directory.rglob("*"):
-            if file_path.is_file() and file_path.suffix in self.SUPPORTED_EXTENSIONS:
-                try:
-                    doc = self._parse_file(file_path, content_type, directory)
-                    if doc:
-                        documents.append(doc)
-                except Exception as e:
-                    logger.error(f"Failed to parse {file_path}: {e}")
+        The extension is checked on the entry name before any stat call, and
+        scandir reports the entry type from the directory listing itself, so
+        unsupported files cost no extra syscalls. Symlinked files are
+        included, but symlinked directories are not descended into.
+        """
+        suffixes = self._SUPPORTED_SUFFIXES
+        stack = [str(directory)]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.name.endswith(suffixes) and entry.is_file():
+                            yield Path(entry.path)
+            except OSError as e:
+                logger.warning(f"Cannot scan directory: {e}")
+    
+    def _parse_files(
+        self,
+        worklist: List[Tuple[Path, AgentOSContentType, Path]]
+    ) -> List[AgentOSDocument]:
+        """
+        Parse files concurrently, preserving worklist order.
         
-        return documents
+        Args:
+            worklist: (file_path, content_type, base_dir) tuples
+            
+        Returns:
+            List of successfully parsed documents
+        """
+        if not worklist:
+            return []
+        
+        max_workers = min(32, (os.cpu_count() or 1) * 4, len(worklist))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(self._parse_file_tuple, worklist)
+            return [doc for doc in results if doc]
+    
+    def _parse_file_tuple(
+        self,
+        work_item: Tuple[Path, AgentOSContentType, Path]
+    ) -> Optional[AgentOSDocument]:
+        """Parse a single worklist entry, logging instead of raising on failure."""
+        file_path, content_type, base_dir = work_item
+        try:
+            return self._parse_file(file_path, content_type, base_dir)
+        except Exception as e:
+            logger.error(f"Failed to parse {file_path}: {e}")
+            return None
     
     def _parse_file(
         self, 
@@ -191,7 +267,7 @@ class AgentOSParser:
     ) -> Optional[AgentOSDocument]:
         """Parse a YAML file."""
         try:
-            data = yaml.safe_load(raw_content)
+            data = yaml.load(raw_content, Loader=_SafeLoader)
             
             if not data:
                 logger.warning(f"Empty YAML file: {file_path}")
@@ -223,7 +299,8 @@ class AgentOSParser:
                 title=title,
                 content=content,
                 file_path=str(file_path),
-                metadata=metadata
+                metadata=metadata,
+                file_stem=file_path.stem
             )
             
         except yaml.YAMLError as e:
@@ -238,13 +315,10 @@ class AgentOSParser:
         base_dir: Path
     ) -> Optional[AgentOSDocument]:
         """Parse a Markdown file."""
-        # Extract title from first heading or filename
-        title = file_path.stem
-        lines = raw_content.split('\n')
-        for line in lines:
-            if line.startswith('# '):
-                title = line[2:].strip()
-                break
+        # Extract title from first heading or filename. The regex stops at the
+        # first heading instead of splitting the whole file into lines.
+        match = _MARKDOWN_TITLE_RE.search(raw_content)
+        title = match.group(1).strip() if match else file_path.stem
         
         metadata = {
             "file_type": "markdown",
@@ -256,7 +330,8 @@ class AgentOSParser:
             title=title,
             content=raw_content,
             file_path=str(file_path),
-            metadata=metadata
+            metadata=metadata,
+            file_stem=file_path.stem
         )
     
     def _yaml_to_text(self, data: Dict[str, Any], title: str) -> str:
@@ -264,36 +339,41 @@ class AgentOSParser:
         Convert YAML data to readable text format.
         
         This creates a structured text representation that's good for RAG.
+        Nested values are walked with an explicit stack and written straight
+        into a single buffer.
         """
-        lines = [f"# {title}\n"]
-        
-        def format_value(value: Any, indent: int = 0) -> List[str]:
-            """Recursively format YAML values."""
-            result = []
-            prefix = "  " * indent
-            
-            if isinstance(value, dict):
-                for k, v in value.items():
-                    result.append(f"{prefix}**{k}:**")
-                    result.extend(format_value(v, indent + 1))
-            elif isinstance(value, list):
-                for item in value:
-                    if isinstance(item, (dict, list)):
-                        result.extend(format_value(item, indent))
-                    else:
-                        result.append(f"{prefix}- {item}")
-            else:
-                result.append(f"{prefix}{value}")
-            
-            return result
+        buf = io.StringIO()
+        buf.write(f"# {title}\n")
         
         # Format each top-level key
         for key, value in data.items():
             if key in ["name", "title"]:  # Skip title fields (already in header)
                 continue
             
-            lines.append(f"\n## {key.replace('_', ' ').title()}")
-            lines.extend(format_value(value, 0))
+            buf.write(f"\n\n## {key.replace('_', ' ').title()}")
+            
+            # Stack entries are (value, indent, is_line); lines are already
+            # formatted, values still need expanding. Children are pushed in
+            # reverse so they pop in document order.
+            stack = [(value, 0, False)]
+            while stack:
+                item, indent, is_line = stack.pop()
+                if is_line:
+                    buf.write(item)
+                    continue
+                
+                prefix = _INDENTS[indent] if indent < len(_INDENTS) else "  " * indent
+                if isinstance(item, dict):
+                    for k, v in reversed(list(item.items())):
+                        stack.append((v, indent + 1, False))
+                        stack.append((f"\n{prefix}**{k}:**", indent, True))
+                elif isinstance(item, list):
+                    for child in reversed(item):
+                        if isinstance(child, (dict, list)):
+                            stack.append((child, indent, False))
+                        else:
+                            stack.append((f"\n{prefix}- {child}", indent, True))
+                else:
+                    buf.write(f"\n{prefix}{item}")
         
-        return "\n".join(lines)
-
+        return buf.getvalue()
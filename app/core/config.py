@@ -11,14 +11,84 @@ import os
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 
-from dotenv import load_dotenv
+_DOTENV_LOADED_FLAG = "_CLAUDE_OS_DOTENV_LOADED"
+
+
+def _load_dotenv_once() -> None:
+    """
+    Load .env into os.environ once per process tree.
+
+    The flag is set in os.environ, so reloads and child processes (which
+    inherit the already-loaded variables) skip re-parsing the file.
+    DOTENV_PATH points at the file directly instead of searching for it, and
+    CLAUDE_OS_SKIP_DOTENV=1 skips it (and the dotenv import) entirely.
+    """
+    if os.environ.get(_DOTENV_LOADED_FLAG) or os.environ.get("CLAUDE_OS_SKIP_DOTENV") == "1":
+        return
+    from dotenv import load_dotenv
+
+    load_dotenv(os.getenv("DOTENV_PATH") or None)
+    os.environ[_DOTENV_LOADED_FLAG] = "1"
+
 
 # Load environment variables
-load_dotenv()
+_load_dotenv_once()
+
+
+def _detect_total_memory_gb() -> Optional[float]:
+    """Return total physical memory in GB, or None if it cannot be determined."""
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 1e9
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+# Evaluated once at import; used to size RAG defaults to the machine
+_TOTAL_MEMORY_GB = _detect_total_memory_gb()
+
+
+def _scale_by_memory(large: int, medium: int, small: int) -> int:
+    """Pick a value for the memory tier: >32GB, >16GB, or smaller (medium if unknown)."""
+    if _TOTAL_MEMORY_GB is None:
+        return medium
+    if _TOTAL_MEMORY_GB > 32:
+        return large
+    if _TOTAL_MEMORY_GB > 16:
+        return medium
+    return small
+
+
+# os.getenv results read by the Config.get_* accessors; cleared by Config.invalidate_cache()
+_env_cache: Dict[str, str] = {}
+
+
+def _cached_env(name: str) -> str:
+    """Return the environment variable (or "" if unset), memoized per name."""
+    try:
+        return _env_cache[name]
+    except KeyError:
+        value = _env_cache[name] = os.getenv(name) or ""
+        return value
+
+
+# Default SQLite database location, resolved once at import.
+# Always use absolute path to avoid issues when running from different directories
+_DEFAULT_DB_PATH = str(Path(__file__).parent.parent.parent / "data" / "claude-os.db")
+
+# Set once get_db_path has created the default database directory
+_db_dir_ensured = False
+
+# Set once Config.validate_config has passed; cleared by Config.revalidate()
+_config_validated = False
 
 
 class ConfigMeta(type):
-    """Metaclass to make Config class attributes immutable."""
+    """
+    Metaclass to make Config class attributes immutable.
+
+    Only writes are intercepted; attribute reads use the normal type lookup
+    and cost the same as on a plain class.
+    """
 
     def __setattr__(cls, name: str, value: Any) -> None:
         """Prevent modification of configuration class attributes."""
@@ -40,6 +110,14 @@ class Config(metaclass=ConfigMeta):
     OLLAMA_HOST: str = os.getenv("OLLAMA_HOST", "http://localhost:11434")
     OLLAMA_MODEL: str = os.getenv("OLLAMA_MODEL", "llama3.2:3b")  # Lite model - faster, works on most machines
     OLLAMA_EMBED_MODEL: str = os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
+    OLLAMA_EMBED_BATCH_SIZE: int = int(os.getenv("OLLAMA_EMBED_BATCH_SIZE", "32"))  # Texts per /api/embed request
+    OLLAMA_EMBED_MAX_CHARS: int = int(os.getenv("OLLAMA_EMBED_MAX_CHARS", "150000"))  # Characters per /api/embed request
+    OLLAMA_EMBED_MAX_TOKENS: int = int(os.getenv("OLLAMA_EMBED_MAX_TOKENS", "2048"))  # Embed model context length
+    OLLAMA_EMBED_CONCURRENCY: int = int(os.getenv("OLLAMA_EMBED_CONCURRENCY", "4"))  # /api/embed requests in flight
+    # Comma-separated Ollama hosts to spread embedding batches across (defaults to OLLAMA_HOST)
+    OLLAMA_EMBED_HOSTS: List[str] = [
+        host.strip().rstrip("/") for host in os.getenv("OLLAMA_EMBED_HOSTS", "").split(",") if host.strip()
+    ] or [OLLAMA_HOST]
 
     # ═══════════════════════════════════════════════════════════════════════
     # OPENAI CONFIGURATION (for openai provider)
@@ -59,6 +137,8 @@ class Config(metaclass=ConfigMeta):
     # Context and Retrieval Configuration
     MAX_CONTEXT_LENGTH: int = int(os.getenv("MAX_CONTEXT_LENGTH", "4096"))
     SIMILARITY_TOP_K: int = int(os.getenv("SIMILARITY_TOP_K", "20"))
+    # Transcript characters per multi-session insight extraction prompt (~24K tokens)
+    INSIGHT_BATCH_MAX_CHARS: int = int(os.getenv("INSIGHT_BATCH_MAX_CHARS", "96000"))
 
     # Reranking Configuration
     ENABLE_RERANKER: bool = os.getenv("ENABLE_RERANKER", "false").lower() in ("true", "1", "yes")
@@ -66,9 +146,9 @@ class Config(metaclass=ConfigMeta):
     RERANK_TOP_K: int = int(os.getenv("RERANK_TOP_K", "10"))
 
     # SQLite Database Configuration
-    # Always use absolute path to avoid issues when running from different directories
-    _default_db_path = str(Path(__file__).parent.parent.parent / "data" / "claude-os.db")
-    SQLITE_DB_PATH: str = os.getenv("SQLITE_DB_PATH", _default_db_path)
+    SQLITE_DB_PATH: str = os.getenv("SQLITE_DB_PATH", _DEFAULT_DB_PATH)
+    # Store ingested embeddings as int8 plus a per-vector scale (1/4 the bytes of float32)
+    QUANTIZE_EMBEDDINGS: bool = os.getenv("QUANTIZE_EMBEDDINGS", "true").lower() in ("true", "1", "yes")
 
     # MCP Server Configuration
     MCP_SERVER_HOST: str = os.getenv("MCP_SERVER_HOST", "0.0.0.0")
@@ -81,12 +161,15 @@ class Config(metaclass=ConfigMeta):
         ".json", ".yaml", ".yml",
         ".go", ".rs", ".java", ".cpp", ".c", ".h"
     ]
-
-    # RAG Configuration (Optimized for M4 Pro with 48GB RAM)
-    CHUNK_SIZE: int = 512  # Reduced to prevent Ollama crashes
-    CHUNK_OVERLAP: int = 128  # Proportional overlap
-    TOP_K_RETRIEVAL: int = 20  # More chunks with plenty of RAM
-    RERANK_TOP_N: int = 10  # More reranked results
+    # Tuple form for a single C-level str.endswith check in is_supported_file
+    _SUPPORTED_SUFFIX_TUPLE = tuple(SUPPORTED_FILE_TYPES)
+
+    # RAG Configuration (scaled to available RAM; env vars override)
+    # Smaller chunks on low-memory machines prevent Ollama crashes
+    CHUNK_SIZE: int = int(os.getenv("CHUNK_SIZE") or _scale_by_memory(1024, 512, 256))
+    CHUNK_OVERLAP: int = int(os.getenv("CHUNK_OVERLAP") or CHUNK_SIZE // 4)  # Proportional overlap
+    TOP_K_RETRIEVAL: int = int(os.getenv("TOP_K_RETRIEVAL") or _scale_by_memory(20, 15, 10))
+    RERANK_TOP_N: int = int(os.getenv("RERANK_TOP_N") or _scale_by_memory(10, 8, 5))
     SIMILARITY_THRESHOLD: float = 0.25  # Lower threshold for broader matches
 
     # KB Type Configuration
@@ -120,6 +203,11 @@ class Config(metaclass=ConfigMeta):
     # Storage Configuration
     UPLOAD_DIR: str = os.getenv("UPLOAD_DIR", "/workspace/data/uploads")
 
+    @classmethod
+    def invalidate_cache(cls) -> None:
+        """Forget cached environment reads so the next get_* call sees os.environ again."""
+        _env_cache.clear()
+
     @classmethod
     def get_ollama_url(cls) -> str:
         """Get the full Ollama API URL."""
@@ -128,41 +216,43 @@ class Config(metaclass=ConfigMeta):
     @classmethod
     def get_ollama_host(cls) -> str:
         """Get the Ollama host."""
-        host = os.getenv("OLLAMA_HOST") or ""
+        host = _cached_env("OLLAMA_HOST")
         return host if host else cls.OLLAMA_HOST
 
     @classmethod
     def get_db_path(cls) -> str:
         """Get the SQLite database path."""
-        db_path_env = os.getenv("SQLITE_DB_PATH") or ""
+        global _db_dir_ensured
+        db_path_env = _cached_env("SQLITE_DB_PATH")
         if not db_path_env:
-            # Return default path
-            default_path = str(Path(__file__).parent.parent.parent / "data" / "claude-os.db")
-            try:
-                Path(default_path).parent.mkdir(parents=True, exist_ok=True)
-            except (OSError, PermissionError):
-                pass  # Directory creation failed, but we'll return the path anyway
-            return default_path
+            # Return default path, creating its directory on first use only
+            if not _db_dir_ensured:
+                try:
+                    os.makedirs(os.path.dirname(_DEFAULT_DB_PATH), exist_ok=True)
+                    _db_dir_ensured = True
+                except (OSError, PermissionError):
+                    pass  # Directory creation failed, but we'll return the path anyway
+            return _DEFAULT_DB_PATH
         # Return the exact path as provided, without trying to create directories
         return db_path_env
 
     @classmethod
     def get_embedding_model(cls) -> str:
         """Get the embedding model."""
-        model = os.getenv("EMBEDDING_MODEL") or ""
+        model = _cached_env("EMBEDDING_MODEL")
         return model if model else cls.EMBEDDING_MODEL
 
     @classmethod
     def get_llm_model(cls) -> str:
         """Get the LLM model."""
-        model = os.getenv("LLM_MODEL") or ""
+        model = _cached_env("LLM_MODEL")
         return model if model else cls.LLM_MODEL
 
     @classmethod
     def get_max_context_length(cls) -> int:
         """Get the max context length."""
         try:
-            length_str = os.getenv("MAX_CONTEXT_LENGTH") or ""
+            length_str = _cached_env("MAX_CONTEXT_LENGTH")
             if not length_str:
                 return cls.MAX_CONTEXT_LENGTH
             length = int(length_str)
@@ -176,7 +266,7 @@ class Config(metaclass=ConfigMeta):
     def get_similarity_top_k(cls) -> int:
         """Get the similarity top K."""
         try:
-            top_k_str = os.getenv("SIMILARITY_TOP_K") or ""
+            top_k_str = _cached_env("SIMILARITY_TOP_K")
             if not top_k_str:
                 return cls.SIMILARITY_TOP_K
             top_k = int(top_k_str)
@@ -189,14 +279,14 @@ class Config(metaclass=ConfigMeta):
     @classmethod
     def get_rerank_model(cls) -> str:
         """Get the rerank model."""
-        model = os.getenv("RERANK_MODEL") or ""
+        model = _cached_env("RERANK_MODEL")
         return model if model else cls.RERANK_MODEL
 
     @classmethod
     def get_rerank_top_k(cls) -> int:
         """Get the rerank top K."""
         try:
-            top_k_str = os.getenv("RERANK_TOP_K") or ""
+            top_k_str = _cached_env("RERANK_TOP_K")
             if not top_k_str:
                 return cls.RERANK_TOP_K
             top_k = int(top_k_str)
@@ -218,7 +308,7 @@ class Config(metaclass=ConfigMeta):
     @classmethod
     def get_provider(cls) -> str:
         """Get the active provider (local or openai)."""
-        provider = os.getenv("CLAUDE_OS_PROVIDER", "local").lower()
+        provider = (_cached_env("CLAUDE_OS_PROVIDER") or "local").lower()
         if provider not in ("local", "openai", "custom"):
             return "local"
         return provider
@@ -237,7 +327,7 @@ class Config(metaclass=ConfigMeta):
     def get_active_llm_model(cls) -> str:
         """Get the active LLM model based on provider."""
         # Allow explicit override via LLM_MODEL env var
-        explicit_model = os.getenv("LLM_MODEL")
+        explicit_model = _cached_env("LLM_MODEL")
         if explicit_model:
             return explicit_model
 
@@ -249,7 +339,7 @@ class Config(metaclass=ConfigMeta):
     def get_active_embed_model(cls) -> str:
         """Get the active embedding model based on provider."""
         # Allow explicit override via EMBEDDING_MODEL env var
-        explicit_model = os.getenv("EMBEDDING_MODEL")
+        explicit_model = _cached_env("EMBEDDING_MODEL")
         if explicit_model:
             return explicit_model
 
@@ -268,7 +358,7 @@ class Config(metaclass=ConfigMeta):
     @classmethod
     def get_openai_api_key(cls) -> Optional[str]:
         """Get the OpenAI API key if configured."""
-        key = os.getenv("OPENAI_API_KEY", "")
+        key = _cached_env("OPENAI_API_KEY")
         return key if key else None
 
     @classmethod
@@ -290,7 +380,7 @@ class Config(metaclass=ConfigMeta):
     @classmethod
     def is_supported_file(cls, filename: str) -> bool:
         """Check if a file type is supported."""
-        return any(filename.lower().endswith(ext) for ext in cls.SUPPORTED_FILE_TYPES)
+        return filename.lower().endswith(cls._SUPPORTED_SUFFIX_TUPLE)
 
     @classmethod
     def ensure_upload_dir(cls) -> Path:
@@ -304,7 +394,14 @@ class Config(metaclass=ConfigMeta):
         """
         Validate required configuration and environment variables.
         Raises ValueError if critical configuration is missing or invalid.
+
+        A successful validation is remembered for the process; use
+        revalidate() to force the checks to run again.
         """
+        global _config_validated
+        if _config_validated:
+            return
+
         errors = []
 
         # Validate Ollama host is set
@@ -338,3 +435,12 @@ class Config(metaclass=ConfigMeta):
             error_msg = "Configuration validation failed:\n" + "\n".join(f"  - {e}" for e in errors)
             raise ValueError(error_msg)
 
+        _config_validated = True
+
+    @classmethod
+    def revalidate(cls) -> None:
+        """Discard the cached validation result and validate again."""
+        global _config_validated
+        _config_validated = False
+        cls.validate_config()
+
@@ -5,13 +5,53 @@ Real-time detection of knowledge updates in conversations
 Monitors for trigger phrases and learns automatically
 """
 
+import hashlib
+import mmap
+import os
 import re
-import json
 from datetime import datetime
+from operator import itemgetter
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
 
+# Sort key for detections; C-level, unlike an equivalent lambda
+_BY_CONFIDENCE = itemgetter("confidence")
+
+# Markdown entry appended to LEARNED_INSIGHTS.md for each saved detection
+_INSIGHT_TEMPLATE = """
+### %s
+**Type**: %s
+**Confidence**: %.0f%%
+**Text**: %s
+**Context**: %s
+**Description**: %s
+
+"""
+
+
+def _count_occurrences(buf: mmap.mmap, needle: bytes) -> int:
+    """Count non-overlapping occurrences of needle, like bytes.count (mmap lacks it before 3.13)"""
+    count = 0
+    pos = buf.find(needle)
+    while pos != -1:
+        count += 1
+        pos = buf.find(needle, pos + len(needle))
+    return count
+
+
+def _compile_union(triggers: Dict[str, Dict], exclude=()) -> "re.Pattern":
+    """Fuse trigger patterns into one alternation of named groups"""
+    return re.compile(
+        "|".join(
+            f"(?P<{name}>{config['pattern']})"
+            for name, config in triggers.items()
+            if name not in exclude
+        ),
+        re.IGNORECASE | re.MULTILINE,
+    )
+
+
 class ConversationWatcher:
     """Detects learning opportunities in conversations"""
 
@@ -63,16 +103,56 @@ class ConversationWatcher:
             "description": "Rejected technology/approach"
         },
         "edge_case": {
-            "pattern": r"(?:beware|watch out|edge case|gotcha).*?([\w\s]+?)(?=\.|,|$)",
+            # Skips whole word runs that cannot end the match atomically
+            # (equivalent to ".*?" here, without quadratic backtracking)
+            "pattern": r"(?:beware|watch out|edge case|gotcha)(?:[^\w\s]|(?>(?:\w|[^\S\n])+)(?![.,]|$))*?([\w\s]+?)(?=\.|,|$)",
             "confidence": 0.80,
             "description": "Edge case/gotcha identified"
         },
     }
 
+    # Each trigger compiled once, plus a single alternation of all of them
+    # that detect_triggers uses to rule out text with no match in one pass.
+    # Values are (pattern, confidence, description) to avoid nested lookups.
+    _COMPILED = {
+        name: (
+            re.compile(config["pattern"], re.IGNORECASE | re.MULTILINE),
+            config["confidence"],
+            config["description"],
+        )
+        for name, config in TRIGGERS.items()
+    }
+    _UNION = _compile_union(TRIGGERS)
+
+    # performance_issue retries its lazy subject from every word of a long
+    # run of plain words, which is quadratic on text that never says "slow".
+    # Gate it on a cheap linear check and scan without it when that fails.
+    _GATES = {
+        "performance_issue": re.compile(r"\s(?:is|are)\s+(?:too\s+)?slow", re.IGNORECASE),
+    }
+    _UNION_UNGATED = _compile_union(TRIGGERS, exclude=_GATES)
+
+    # Literal phrases each trigger pattern requires at least one of. Most
+    # messages contain none, and a substring check is far cheaper than a
+    # regex scan. Keep in sync when adding triggers.
+    _ANCHORS = {
+        "switching": ("switching from",),
+        "decided_to_use": ("decided to",),
+        "no_longer": ("no longer",),
+        "now_using": ("now using",),
+        "implement_change": ("implement",),
+        "performance_issue": ("slow",),
+        "bug_fixed": ("bug in",),
+        "architecture_change": ("refactor",),
+        "rejected_idea": ("decided against", "don't use", "avoid", "skip"),
+        "edge_case": ("beware", "watch out", "edge case", "gotcha"),
+    }
+
     def __init__(self, project_id: int, project_path: str):
         self.project_id = project_id
         self.project_path = Path(project_path).resolve()
         self.insights_dir = self.project_path / ".claude-os" / "project-profile"
+        self._insights_dir_ready = False
 
     def detect_triggers(self, text: str) -> List[Dict]:
         """
@@ -85,13 +165,34 @@ class ConversationWatcher:
         - confidence: confidence score
         - description: what was detected
         """
-        detections = []
+        # casefold matches re.IGNORECASE folding for the anchors' characters
+        folded = text.casefold()
+        candidates = [
+            name for name, anchors in self._ANCHORS.items()
+            if any(anchor in folded for anchor in anchors)
+        ]
+        if not candidates:
+            return []
+
+        gated = [name for name, gate in self._GATES.items() if not gate.search(text)]
+        if gated:
+            candidates = [name for name in candidates if name not in gated]
+            union = self._UNION_UNGATED
+        else:
+            union = self._UNION
+
+        # The union only answers "does anything match": its scan consumes the
+        # text, so matches of different triggers that overlap would be lost.
+        # Each candidate's own pattern then scans the whole text.
+        if not candidates or not union.search(text):
+            return []
 
-        for trigger_name, trigger_config in self.TRIGGERS.items():
-            pattern = trigger_config["pattern"]
-            matches = list(re.finditer(pattern, text, re.IGNORECASE | re.MULTILINE))
+        detections = []
+        now_iso = datetime.now().isoformat()
 
-            for match in matches:
+        for trigger_name in candidates:
+            pattern, confidence, description = self._COMPILED[trigger_name]
+            for match in pattern.finditer(text):
                 # For performance_issue and other patterns with optional articles,
                 # reconstruct the text field to exclude articles if present
                 matched_text = match.group(0)
@@ -103,36 +204,51 @@ class ConversationWatcher:
                     matched_text = matched_text[article_end:]
 
                 detection = {
-                    "id": self._generate_id(trigger_name, matched_text),
+                    "id": self._generate_id(trigger_name, matched_text, now_iso, match.start()),
                     "trigger": trigger_name,
                     "text": matched_text,
                     "groups": groups,
-                    "confidence": trigger_config["confidence"],
-                    "description": trigger_config["description"],
-                    "timestamp": datetime.now().isoformat(),
+                    "confidence": confidence,
+                    "description": description,
+                    "timestamp": now_iso,
                     "context": self._extract_context(text, match),
                 }
                 detections.append(detection)
 
         # Sort by confidence descending
-        return sorted(detections, key=lambda x: x["confidence"], reverse=True)
+        return sorted(detections, key=_BY_CONFIDENCE, reverse=True)
 
     def _extract_context(self, text: str, match) -> str:
         """Extract surrounding context for the match"""
-        start = max(0, match.start() - 50)
-        end = min(len(text), match.end() + 50)
-        return text[start:end].strip()
+        # Slicing clamps the end itself; only a negative start needs guarding
+        start = match.start() - 50
+        return text[start if start > 0 else 0:match.end() + 50].strip()
+
+    def _generate_id(
+        self,
+        trigger_name: str,
+        matched_text: str,
+        timestamp: Optional[str] = None,
+        position: int = -1,
+    ) -> str:
+        """
+        Generate unique ID for this detection
 
-    def _generate_id(self, trigger_name: str, matched_text: str) -> str:
-        """Generate unique ID for this detection"""
-        import hashlib
-        hash_input = f"{trigger_name}:{matched_text}:{datetime.now().isoformat()}"
-        return hashlib.md5(hash_input.encode()).hexdigest()[:8]
+        detect_triggers passes one timestamp for the whole scan plus the
+        match offset, which keeps IDs distinct within a single call.
+        """
+        if timestamp is None:
+            timestamp = datetime.now().isoformat()
+        hash_input = f"{trigger_name}:{matched_text}:{timestamp}:{position}"
+        # 4-byte BLAKE2b digest gives the 8 hex chars directly, faster than MD5
+        return hashlib.blake2b(hash_input.encode(), digest_size=4).hexdigest()
 
     def save_insight(self, detection: Dict, user_confirmed: bool = True) -> bool:
         """Save a detected insight to LEARNED_INSIGHTS.md"""
         try:
-            self.insights_dir.mkdir(parents=True, exist_ok=True)
+            if not self._insights_dir_ready:
+                self.insights_dir.mkdir(parents=True, exist_ok=True)
+                self._insights_dir_ready = True
             insights_file = self.insights_dir / "LEARNED_INSIGHTS.md"
 
             # Format the insight
@@ -150,31 +266,47 @@ class ConversationWatcher:
 
     def _format_insight(self, detection: Dict) -> str:
         """Format detection as markdown"""
-        return f"""
-### {detection['timestamp']}
-**Type**: {detection['trigger']}
-**Confidence**: {detection['confidence']:.0%}
-**Text**: {detection['text']}
-**Context**: {detection.get('context', '')}
-**Description**: {detection['description']}
+        return _INSIGHT_TEMPLATE % (
+            detection["timestamp"],
+            detection["trigger"],
+            detection["confidence"] * 100,
+            detection["text"],
+            detection.get("context", ""),
+            detection["description"],
+        )
 
-"""
+    def get_learned_insights(self) -> Dict:
+        """
+        Summarize the learned insights file
 
-    def get_learned_insights(self) -> List[Dict]:
-        """Read all learned insights from file"""
+        Returns {"count": number of entries, "content": first 500 chars};
+        count is 0 and content empty when there is no insights file yet
+        """
         insights_file = self.insights_dir / "LEARNED_INSIGHTS.md"
 
-        if not insights_file.exists():
-            return []
+        empty = {"count": 0, "content": ""}
+        try:
+            size = os.stat(insights_file).st_size
+        except OSError:
+            return empty
+
+        if size == 0:
+            return empty
 
-        # Parse the markdown file to extract structured data
-        # For now, just return file exists indicator
+        # Count entry headers on the raw bytes via mmap instead of decoding
+        # the whole file; only the preview needs decoding. "#" is ASCII, so
+        # the byte count equals the character count.
         try:
-            with open(insights_file, "r") as f:
-                content = f.read()
-            return {"count": content.count("###"), "content": content[:500]}
+            with open(insights_file, "rb") as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                count = _count_occurrences(mm, b"###")
+                # 500 chars are at most 2000 UTF-8 bytes
+                head = mm[:2000]
         except Exception:
-            return []
+            return empty
+
+        preview = head.decode("utf-8", "ignore").replace("\r\n", "\n").replace("\r", "\n")
+        return {"count": count, "content": preview[:500]}
 
     def should_prompt_user(self, detection: Dict) -> bool:
         """Determine if we should ask user about this detection"""
@@ -4,12 +4,17 @@ Automatically syncs KB folders when files change.
 """
 
 import os
+import functools
+import heapq
+import itertools
 import logging
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Optional, Callable, List
+from typing import Dict, Hashable, Optional, Callable, List, Tuple
 from watchdog.observers import Observer
+from watchdog.observers.api import ObservedWatch
 from watchdog.events import FileSystemEventHandler, FileModifiedEvent, FileCreatedEvent
 
 from app.core.hooks import ProjectHook
@@ -17,11 +22,139 @@ from app.core.config import Config
 
 logger = logging.getLogger(__name__)
 
+# The only events ProjectFileHandler acts on. Passed to schedule() so the
+# inotify watch mask leaves out open/close/access/delete and the kernel
+# never reports them (our own syncs read every file in the folder).
+_WATCHED_EVENTS = [FileCreatedEvent, FileModifiedEvent]
+
+
+class DebounceScheduler:
+    """
+    Runs debounced callbacks from one daemon thread.
+
+    Replaces a threading.Timer (and so a new OS thread) per file event.
+    Each key has at most one heap entry: re-scheduling a pending key only
+    moves its deadline, and the stale entry is re-armed when it surfaces.
+    The scheduler thread only keeps time; due callbacks run on a small
+    worker pool, so a slow sync doesn't hold up other keys. Callbacks for
+    the same key never overlap: one that comes due while the previous is
+    still running waits for it to finish.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.cond = threading.Condition()
+        self.heap: List[Tuple[float, int, Hashable]] = []
+        self.deadlines: Dict[Hashable, float] = {}
+        self.callbacks: Dict[Hashable, Callable] = {}
+        self.counter = itertools.count()
+        self.thread: Optional[threading.Thread] = None
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="file-watcher-sync"
+        )
+        # Keys with a callback on the pool, and the callback due after it
+        self.running: Dict[Hashable, Optional[Callable]] = {}
+
+    def schedule(self, key: Hashable, delay: float, callback: Callable):
+        """Run callback once, delay seconds after the last schedule() for key."""
+        deadline = time.monotonic() + delay
+        with self.cond:
+            pending = key in self.deadlines
+            self.deadlines[key] = deadline
+            self.callbacks[key] = callback
+            if not pending:
+                heapq.heappush(self.heap, (deadline, next(self.counter), key))
+                self.cond.notify()
+
+            if self.thread is None:
+                self.thread = threading.Thread(
+                    target=self._run, name="file-watcher-debounce", daemon=True
+                )
+                self.thread.start()
+
+    def cancel(self, key: Hashable):
+        """Drop a pending callback for key, if any."""
+        with self.cond:
+            self.deadlines.pop(key, None)
+            self.callbacks.pop(key, None)
+            if self.running.get(key) is not None:
+                self.running[key] = None
+
+    def _next_due(self) -> Tuple[Hashable, Callable]:
+        """Block until a callback is due and return it with its key (caller holds cond)."""
+        while True:
+            if not self.heap:
+                self.cond.wait()
+                continue
+
+            deadline, _, key = self.heap[0]
+            now = time.monotonic()
+            if deadline > now:
+                self.cond.wait(deadline - now)
+                continue
+
+            heapq.heappop(self.heap)
+            latest = self.deadlines.get(key)
+            if latest is None:
+                continue  # Cancelled
+            if latest > deadline:
+                # Re-scheduled since this entry was pushed
+                heapq.heappush(self.heap, (latest, next(self.counter), key))
+                continue
+
+            del self.deadlines[key]
+            return key, self.callbacks.pop(key)
+
+    def _run(self):
+        while True:
+            with self.cond:
+                key, callback = self._next_due()
+                if key in self.running:
+                    # Still running the previous one; _run_callback follows up
+                    self.running[key] = callback
+                    continue
+                self.running[key] = None
+            self.executor.submit(self._run_callback, key, callback)
+
+    def _run_callback(self, key: Hashable, callback: Callable):
+        """Run callbacks for key on a worker until none is waiting."""
+        while callback is not None:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Error in debounced callback: {e}")
+            with self.cond:
+                callback = self.running.get(key)
+                if callback is None:
+                    del self.running[key]
+                else:
+                    self.running[key] = None
+
+
+# Shared debounce scheduler (thread started on first use)
+_debounce_scheduler: Optional[DebounceScheduler] = None
+_debounce_scheduler_lock = threading.Lock()
+
+
+def get_debounce_scheduler() -> DebounceScheduler:
+    """Get or create the shared debounce scheduler."""
+    global _debounce_scheduler
+    if _debounce_scheduler is None:
+        with _debounce_scheduler_lock:
+            if _debounce_scheduler is None:
+                _debounce_scheduler = DebounceScheduler()
+    return _debounce_scheduler
+
 
 class ProjectFileHandler(FileSystemEventHandler):
     """Handles file system events for a project hook."""
 
-    def __init__(self, project_id: int, mcp_type: str, on_change: Callable):
+    def __init__(
+        self,
+        project_id: int,
+        mcp_type: str,
+        on_change: Callable,
+        scheduler: Optional[DebounceScheduler] = None,
+    ):
         """
         Initialize file handler.
 
@@ -29,13 +162,19 @@ class ProjectFileHandler(FileSystemEventHandler):
             project_id: ID of the project
             mcp_type: Type of MCP (knowledge_docs, etc.)
             on_change: Callback function when files change
+            scheduler: Debounce scheduler (the shared one if omitted)
         """
         self.project_id = project_id
         self.mcp_type = mcp_type
         self.on_change = on_change
-        self.debounce_timer: Optional[threading.Timer] = None
+        self.scheduler = scheduler or get_debounce_scheduler()
         self.debounce_delay = 2.0  # Debounce for 2 seconds
 
+        # Bumped on every event and on cancel; a scheduled sync only runs if
+        # nothing happened since it was scheduled. next() on a count is atomic.
+        self.generations = itertools.count(1)
+        self.generation = 0
+
     def on_modified(self, event: FileModifiedEvent):
         """Handle file modifications."""
         if event.is_directory:
@@ -52,13 +191,27 @@ class ProjectFileHandler(FileSystemEventHandler):
 
     def _debounce_sync(self):
         """Debounce sync calls to avoid multiple rapid syncs."""
-        # Cancel previous timer if it exists
-        if self.debounce_timer:
-            self.debounce_timer.cancel()
+        generation = self.generation = next(self.generations)
+        # Pushes back any pending sync for this handler
+        self.scheduler.schedule(
+            self, self.debounce_delay, lambda: self._trigger_if_current(generation)
+        )
+
+    def cancel_pending(self):
+        """Drop a debounced sync that has not fired yet."""
+        self.generation = next(self.generations)
+        self.scheduler.cancel(self)
+
+    def _trigger_if_current(self, generation: int):
+        """
+        Run the sync unless an event or cancel came after it was scheduled.
 
-        # Create new timer
-        self.debounce_timer = threading.Timer(self.debounce_delay, self._trigger_sync)
-        self.debounce_timer.start()
+        Covers the window where the scheduler has already taken the callback
+        off its heap: a newer event has its own sync scheduled, and a cancel
+        (watcher stopped) must not sync at all.
+        """
+        if generation == self.generation:
+            self._trigger_sync()
 
     def _trigger_sync(self):
         """Trigger the sync callback."""
@@ -69,21 +222,76 @@ class ProjectFileHandler(FileSystemEventHandler):
             logger.error(f"Error syncing on file change: {e}")
 
 
+class SharedObserver:
+    """
+    A single watchdog Observer shared by many ProjectWatchers.
+
+    One Observer means one dispatch thread instead of an observer thread per
+    project. watchdog folds schedules on the same folder into one watch, so
+    handlers are reference-counted and a watch is only unscheduled (and its
+    emitter stopped) when its last handler is removed.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.observer = Observer()
+        self.watch_refs: Dict[ObservedWatch, int] = {}
+
+    def schedule(self, handler: FileSystemEventHandler, path: str) -> ObservedWatch:
+        """Watch path recursively with handler, starting the observer on first use."""
+        with self.lock:
+            watch = self.observer.schedule(
+                handler, path, recursive=True, event_filter=_WATCHED_EVENTS
+            )
+            self.watch_refs[watch] = self.watch_refs.get(watch, 0) + 1
+            if not self.observer.is_alive():
+                self.observer.start()
+            return watch
+
+    def unschedule(self, handler: FileSystemEventHandler, watch: ObservedWatch):
+        """Detach handler from watch, dropping the watch once nothing uses it."""
+        with self.lock:
+            refs = self.watch_refs.get(watch, 0) - 1
+            if refs > 0:
+                self.watch_refs[watch] = refs
+                self.observer.remove_handler_for_watch(handler, watch)
+            else:
+                self.watch_refs.pop(watch, None)
+                self.observer.unschedule(watch)
+
+    def stop(self):
+        """Stop the observer thread; a fresh Observer is ready for later schedules."""
+        with self.lock:
+            if self.observer.is_alive():
+                self.observer.stop()
+                self.observer.join()
+            # Threads cannot be restarted, so replace rather than reuse
+            self.observer = Observer()
+            self.watch_refs.clear()
+
+
 class ProjectWatcher:
     """Watches a single project's hooks."""
 
-    def __init__(self, project_id: int):
+    def __init__(self, project_id: int, observer: Optional[SharedObserver] = None):
         """
         Initialize project watcher.
 
         Args:
             project_id: ID of the project to watch
+            observer: Shared observer to schedule on (a private one if omitted)
         """
         self.project_id = project_id
         self.hook = ProjectHook(project_id)
-        self.observer: Optional[Observer] = None
+        self.owns_observer = observer is None
+        self.observer = observer or SharedObserver()
         self.event_handlers: Dict[str, ProjectFileHandler] = {}
         self.watched_paths: Dict[str, str] = {}
+        self.watches: Dict[str, ObservedWatch] = {}
+        # Target KB per mcp_type, resolved on first sync and again when
+        # hooks.json changes or a sync reports the KB missing
+        self.kb_names: Dict[str, Optional[str]] = {}
+        self.config_signature: Optional[Tuple[int, int]] = None
 
     def start(self):
         """Start watching project folders."""
@@ -96,9 +304,6 @@ class ProjectWatcher:
             logger.info(f"No hooks configured for project {self.project_id}")
             return
 
-        # Start observer
-        self.observer = Observer()
-
         # Watch each enabled hook
         for mcp_type, hook_config in status["hooks"].items():
             if not hook_config.get("enabled"):
@@ -113,46 +318,91 @@ class ProjectWatcher:
             handler = ProjectFileHandler(
                 self.project_id,
                 mcp_type,
-                lambda mt=mcp_type: self._on_folder_change(mt),
+                functools.partial(self._on_folder_change, mcp_type),
             )
 
-            # Schedule observer
-            self.observer.schedule(handler, folder_path, recursive=True)
+            # Schedule on the (shared) observer; it starts on first schedule
+            self.watches[mcp_type] = self.observer.schedule(handler, folder_path)
             self.event_handlers[mcp_type] = handler
             self.watched_paths[mcp_type] = folder_path
 
             logger.info(f"Watching {mcp_type}: {folder_path}")
 
-        # Start observer if we have paths to watch
         if self.watched_paths:
-            self.observer.start()
             logger.info(f"File watcher started for project {self.project_id}")
         else:
             logger.info(f"No enabled hooks to watch for project {self.project_id}")
 
     def stop(self):
         """Stop watching project folders."""
-        if self.observer:
-            self.observer.stop()
-            self.observer.join()
+        if self.watches:
+            for mcp_type, watch in self.watches.items():
+                handler = self.event_handlers[mcp_type]
+                self.observer.unschedule(handler, watch)
+                handler.cancel_pending()
             logger.info(f"File watcher stopped for project {self.project_id}")
-            self.observer = None
+            self.watches.clear()
             self.event_handlers.clear()
             self.watched_paths.clear()
+            self.kb_names.clear()
+
+        if self.owns_observer:
+            self.observer.stop()
 
     def _on_folder_change(self, mcp_type: str):
         """Handle folder change."""
         try:
             logger.info(f"Syncing {mcp_type} for project {self.project_id}")
-            result = self.hook.sync_kb_folder(mcp_type)
+
+            # Resolved once per hooks.json version rather than on every sync
+            signature = self._hooks_config_signature()
+            if signature != self.config_signature:
+                self.kb_names.clear()
+            kb_name = self._kb_name(mcp_type)
+
+            result = self.hook.sync_kb_folder(mcp_type, kb_name=kb_name)
+
+            if kb_name is not None and result.get("kb_missing"):
+                # Deleted, renamed or reassigned since it was resolved
+                self.kb_names.pop(mcp_type, None)
+                fresh_name = self._kb_name(mcp_type)
+                if fresh_name is not None and fresh_name != kb_name:
+                    logger.info(f"KB for {mcp_type} is now {fresh_name}, syncing again")
+                    result = self.hook.sync_kb_folder(mcp_type, kb_name=fresh_name)
+
+            # The sync rewrites hooks.json (last_sync); only other edits count
+            self.config_signature = self._hooks_config_signature()
 
             if result.get("synced_files"):
                 logger.info(
-                    f"Synced {len(result['synced_files'])} files for {mcp_type}"
+                    f"Synced {result['synced_files']} files for {mcp_type}"
                 )
         except Exception as e:
             logger.error(f"Error syncing {mcp_type}: {e}")
 
+    def _kb_name(self, mcp_type: str) -> Optional[str]:
+        """
+        Target KB for mcp_type, looked up if not cached.
+
+        None if it can't be resolved; the sync then looks it up (and reports
+        the error) itself.
+        """
+        if mcp_type not in self.kb_names:
+            try:
+                self.kb_names[mcp_type] = self.hook.get_kb_name(mcp_type)
+            except ValueError as e:
+                logger.warning(f"{e} (project {self.project_id})")
+                self.kb_names[mcp_type] = None
+        return self.kb_names[mcp_type]
+
+    def _hooks_config_signature(self) -> Optional[Tuple[int, int]]:
+        """(mtime_ns, size) of hooks.json, or None if it can't be read."""
+        try:
+            stat = os.stat(self.hook.hooks_config_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
     def restart(self):
         """Restart watcher (useful when hooks change)."""
         self.stop()
@@ -165,81 +415,108 @@ class GlobalFileWatcher:
     def __init__(self):
         """Initialize global file watcher."""
         self.watchers: Dict[int, ProjectWatcher] = {}
+        # Guards only the watchers/project_locks dicts; a project's start and
+        # stop (hooks.json, DB, scheduling) run under that project's lock
         self.lock = threading.Lock()
+        self.project_locks: Dict[int, threading.RLock] = {}
         self.enabled = False
+        # One observer thread for every project instead of one per project
+        self.observer = SharedObserver()
+
+    def _project_lock(self, project_id: int) -> threading.RLock:
+        """Get the lock serializing start/stop/restart for one project."""
+        with self.lock:
+            return self.project_locks.setdefault(project_id, threading.RLock())
 
     def start_project(self, project_id: int):
         """Start watching a project."""
-        with self.lock:
-            if project_id in self.watchers:
-                logger.warning(f"Watcher already exists for project {project_id}")
-                return
+        with self._project_lock(project_id):
+            with self.lock:
+                if project_id in self.watchers:
+                    logger.warning(f"Watcher already exists for project {project_id}")
+                    return
 
-            watcher = ProjectWatcher(project_id)
+            watcher = ProjectWatcher(project_id, self.observer)
             watcher.start()
-            self.watchers[project_id] = watcher
-            # Enable if we have active watchers
-            if self.watchers:
+
+            with self.lock:
+                self.watchers[project_id] = watcher
+                # Enable if we have active watchers
                 self.enabled = True
 
     def stop_project(self, project_id: int):
         """Stop watching a project."""
-        with self.lock:
-            if project_id not in self.watchers:
-                return
+        with self._project_lock(project_id):
+            with self.lock:
+                watcher = self.watchers.pop(project_id, None)
+                # Disable if no more watchers
+                if not self.watchers:
+                    self.enabled = False
 
-            watcher = self.watchers.pop(project_id)
-            watcher.stop()
-            # Disable if no more watchers
-            if not self.watchers:
-                self.enabled = False
+            if watcher is not None:
+                watcher.stop()
 
     def restart_project(self, project_id: int):
         """Restart watcher for a project."""
-        with self.lock:
-            if project_id in self.watchers:
-                self.watchers[project_id].restart()
+        with self._project_lock(project_id):
+            with self.lock:
+                watcher = self.watchers.get(project_id)
+
+            if watcher is not None:
+                watcher.restart()
             else:
                 self.start_project(project_id)
 
+    def _start_project_logged(self, project_id: int):
+        try:
+            self.start_project(project_id)
+        except Exception as e:
+            logger.error(f"Error starting watcher for project {project_id}: {e}")
+
     def start_all(self, project_ids: List[int]):
         """Start watching all projects."""
         logger.info(f"Starting file watchers for {len(project_ids)} projects")
 
-        for project_id in project_ids:
-            try:
-                self.start_project(project_id)
-            except Exception as e:
-                logger.error(f"Error starting watcher for project {project_id}: {e}")
+        # Projects start independently (config read, DB lookups, scheduling)
+        if project_ids:
+            max_workers = min(8, len(project_ids))
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="file-watcher-start") as executor:
+                list(executor.map(self._start_project_logged, project_ids))
 
         self.enabled = True
 
     def stop_all(self):
         """Stop watching all projects."""
         with self.lock:
-            for watcher in self.watchers.values():
-                try:
-                    watcher.stop()
-                except Exception as e:
-                    logger.error(f"Error stopping watcher: {e}")
-
+            watchers = list(self.watchers.values())
             self.watchers.clear()
             self.enabled = False
 
+        for watcher in watchers:
+            try:
+                watcher.stop()
+            except Exception as e:
+                logger.error(f"Error stopping watcher: {e}")
+
+        self.observer.stop()
+
     def get_status(self) -> Dict:
         """Get status of all watchers."""
         with self.lock:
-            return {
-                "enabled": self.enabled,
-                "projects_watched": len(self.watchers),
-                "projects": {
-                    project_id: {
-                        "watched_paths": watcher.watched_paths,
-                        "event_handlers": list(watcher.event_handlers.keys()),
-                    }
-                    for project_id, watcher in self.watchers.items()
-                },
-            }
+            watchers = dict(self.watchers)
+            enabled = self.enabled
+
+        return {
+            "enabled": enabled,
+            "projects_watched": len(watchers),
+            "projects": {
+                project_id: {
+                    "watched_paths": dict(watcher.watched_paths),
+                    "event_handlers": list(watcher.event_handlers.keys()),
+                }
+                for project_id, watcher in watchers.items()
+            },
+        }
 
 
 # Global instance
@@ -3,15 +3,34 @@ Health check utilities for monitoring service connectivity.
 """
 
 import logging
+import random
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from app.core.config import Config
 
 logger = logging.getLogger(__name__)
 
+# Shared keep-alive session so repeated polls (wait_for_services) reuse
+# the connection instead of reconnecting on every check
+_SESSION = requests.Session()
+_adapter = HTTPAdapter(pool_connections=2, pool_maxsize=4, max_retries=0)
+_SESSION.mount("http://", _adapter)
+_SESSION.mount("https://", _adapter)
+
+# Ollama and SQLite are checked side by side, so a retry takes as long as
+# the slower check rather than both timeouts back to back
+_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="health-check")
+
+# wait_for_services backoff: first retry after ~0.1s, doubling up to the
+# caller's delay, plus up to 0.2s of jitter so restarts don't poll in lockstep
+_BACKOFF_BASE = 0.1
+_BACKOFF_JITTER = 0.2
+
 
 def check_ollama_health() -> Dict[str, any]:
     """
@@ -21,7 +40,7 @@ def check_ollama_health() -> Dict[str, any]:
         dict: Status information with 'status', 'models', and optional 'error'
     """
     try:
-        response = requests.get(
+        response = _SESSION.get(
             f"{Config.OLLAMA_HOST}/api/tags",
             timeout=5
         )
@@ -84,13 +103,16 @@ def check_sqlite_health() -> Dict[str, any]:
         }
 
 
-def wait_for_services(max_retries: int = 30, delay: int = 2) -> bool:
+def wait_for_services(max_retries: int = 30, delay: float = 2) -> bool:
     """
     Wait for both Ollama and SQLite services to become healthy.
 
+    Retries back off exponentially from 0.1s, capped at delay, with a little
+    random jitter added.
+
     Args:
         max_retries: Maximum number of retry attempts
-        delay: Seconds to wait between retries
+        delay: Maximum seconds to wait between retries (before jitter)
 
     Returns:
         bool: True if both services are healthy, False if max retries exceeded
@@ -98,8 +120,10 @@ def wait_for_services(max_retries: int = 30, delay: int = 2) -> bool:
     logger.info("Waiting for services to become healthy...")
 
     for attempt in range(1, max_retries + 1):
-        ollama_status = check_ollama_health()
-        sqlite_status = check_sqlite_health()
+        ollama_future = _EXECUTOR.submit(check_ollama_health)
+        sqlite_future = _EXECUTOR.submit(check_sqlite_health)
+        ollama_status = ollama_future.result()
+        sqlite_status = sqlite_future.result()
 
         if ollama_status["status"] == "healthy" and sqlite_status["status"] == "healthy":
             logger.info(f"All services healthy after {attempt} attempts")
@@ -112,7 +136,8 @@ def wait_for_services(max_retries: int = 30, delay: int = 2) -> bool:
         )
 
         if attempt < max_retries:
-            time.sleep(delay)
+            backoff = min(delay, _BACKOFF_BASE * 2 ** (attempt - 1))
+            time.sleep(backoff + random.uniform(0, _BACKOFF_JITTER))
 
     logger.error(f"Services did not become healthy after {max_retries} attempts")
     return False
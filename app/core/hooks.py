@@ -6,17 +6,74 @@ Manages automatic indexing of project folders when files change.
 import os
 import json
 import logging
+import pickle
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional, Callable
+from typing import Dict, Iterator, List, Optional, Callable, Tuple
 from datetime import datetime
 import hashlib
 
 from app.core.sqlite_manager import get_sqlite_manager
 from app.core.config import Config
-from app.core.ingestion import ingest_documents
+from app.core.ingestion import RACY_MTIME_WINDOW_NS, ingest_documents
 
 logger = logging.getLogger(__name__)
 
+# hooks.json is read and rewritten on every sync; orjson does both several
+# times faster than the stdlib json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Change detection only needs a fingerprint; BLAKE3 computes one several
+# times faster than SHA256. Entries record which algorithm produced them.
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+_HASH_ALGO = "blake3" if blake3 is not None else "sha256"
+
+
+def _hash_bytes(data: bytes, algo: Optional[str] = None) -> Optional[str]:
+    """Hex digest of data with algo (default _HASH_ALGO), or None if algo isn't available."""
+    algo = algo or _HASH_ALGO
+    if algo == "blake3":
+        return blake3.blake3(data).hexdigest() if blake3 is not None else None
+    try:
+        return hashlib.new(algo, data).hexdigest()
+    except ValueError:
+        return None
+
+
+def _json_loads(data: bytes):
+    """Parse JSON bytes, with orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps(obj) -> bytes:
+    """Serialize to 2-space indented JSON bytes, with orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2).encode('utf-8')
+
+# Parsed hooks.json per path, keyed by the file's (mtime_ns, size). Stored
+# pickled: loading a snapshot is ~3x faster than json.load and, unlike a
+# shared dict, every caller gets its own copy to mutate.
+_config_cache: Dict[Path, Tuple[Tuple[int, int], bytes]] = {}
+_config_cache_lock = threading.Lock()
+
+# Changed hook files are ingested in batches of up to this many files, or
+# fewer once their text reaches _INGEST_BATCH_BYTES
+_INGEST_BATCH_FILES = 64
+_INGEST_BATCH_BYTES = 8 * 1024 * 1024
+
 
 class ProjectHook:
     """Manages hooks for a specific project."""
@@ -45,10 +102,26 @@ class ProjectHook:
         return hooks_dir / "hooks.json"
 
     def _load_hooks_config(self) -> Dict:
-        """Load hooks configuration from file."""
-        if self.hooks_config_path.exists():
-            with open(self.hooks_config_path, 'r') as f:
-                return json.load(f)
+        """Load hooks configuration from file (cached while the file is unchanged)."""
+        try:
+            stat = os.stat(self.hooks_config_path)
+        except FileNotFoundError:
+            stat = None
+
+        if stat is not None:
+            key = (stat.st_mtime_ns, stat.st_size)
+            with _config_cache_lock:
+                cached = _config_cache.get(self.hooks_config_path)
+            if cached is not None and cached[0] == key:
+                # Fresh copy per call; callers mutate and save what they load
+                return pickle.loads(cached[1])
+
+            with open(self.hooks_config_path, 'rb') as f:
+                data = f.read()
+            config = _json_loads(data)
+            self._cache_hooks_config(config, key)
+            return config
+
         return {
             "version": "1.0",
             "project_id": self.project_id,
@@ -56,11 +129,21 @@ class ProjectHook:
             "hooks": {}
         }
 
-    def _save_hooks_config(self, config: Dict):
-        """Save hooks configuration to file."""
-        config["updated_at"] = datetime.now().isoformat()
-        with open(self.hooks_config_path, 'w') as f:
-            json.dump(config, f, indent=2)
+    def _save_hooks_config(self, config: Dict, now: Optional[str] = None):
+        """Save hooks configuration to file (now: ISO timestamp to record, default current time)."""
+        config["updated_at"] = now or datetime.now().isoformat()
+        data = _json_dumps(config)
+        with open(self.hooks_config_path, 'wb') as f:
+            f.write(data)
+
+        stat = os.stat(self.hooks_config_path)
+        self._cache_hooks_config(config, (stat.st_mtime_ns, stat.st_size))
+
+    def _cache_hooks_config(self, config: Dict, key: Tuple[int, int]):
+        """Remember config for the file version identified by (mtime_ns, size)."""
+        snapshot = pickle.dumps(config, protocol=pickle.HIGHEST_PROTOCOL)
+        with _config_cache_lock:
+            _config_cache[self.hooks_config_path] = (key, snapshot)
 
     def enable_kb_autosync(
         self,
@@ -96,20 +179,24 @@ class ProjectHook:
             file_patterns = Config.SUPPORTED_FILE_TYPES
 
         # Create hook
+        now = datetime.now().isoformat()
         hook_config = {
             "enabled": True,
             "mcp_type": mcp_type,
             "folder_path": str(folder_path),
             "file_patterns": file_patterns,
-            "created_at": datetime.now().isoformat(),
+            "created_at": now,
             "last_sync": None,
-            "synced_files": {}  # Track file hashes to detect changes
         }
 
         config["hooks"][mcp_type] = hook_config
 
         # Save config
-        self._save_hooks_config(config)
+        self._save_hooks_config(config, now)
+
+        # Start change tracking (file hashes, in the DB) from scratch
+        self.db_manager.clear_hook_synced_files(self.project_id, mcp_type)
+        hook_config = {**hook_config, "synced_files": {}}
 
         logger.info(f"Enabled KB autosync for {mcp_type}: {folder_path}")
 
@@ -126,12 +213,36 @@ class ProjectHook:
         else:
             raise ValueError(f"Hook for {mcp_type} not found")
 
-    def sync_kb_folder(self, mcp_type: str) -> Dict:
+    def get_kb_name(self, mcp_type: str) -> str:
+        """Get the name of the KB assigned to an MCP type (ValueError if none)."""
+        project_kbs = self.db_manager.get_project_kbs(self.project_id)
+        if mcp_type not in project_kbs:
+            raise ValueError(f"No KB assigned for {mcp_type}")
+
+        kb_id = project_kbs[mcp_type]
+
+        # Get KB name from id (primary-key lookup, not a scan of every KB)
+        kb = self.db_manager.get_collection_by_id(kb_id)
+        kb_name = kb["name"] if kb else None
+
+        if not kb_name:
+            raise ValueError(f"KB not found for {mcp_type}")
+
+        return kb_name
+
+    def sync_kb_folder(
+        self,
+        mcp_type: str,
+        now: Optional[str] = None,
+        kb_name: Optional[str] = None,
+    ) -> Dict:
         """
         Manually sync a KB folder (useful for initial setup or forced refresh).
 
         Args:
             mcp_type: knowledge_docs, project_profile, project_index, project_memories
+            now: ISO timestamp to record as the sync time (default: current time)
+            kb_name: Target KB, if the caller already resolved it (skips the DB lookup)
 
         Returns:
             Sync results
@@ -148,71 +259,77 @@ class ProjectHook:
             raise ValueError(f"Folder does not exist: {folder_path}")
 
         # Get KB for this MCP type
-        project_kbs = self.db_manager.get_project_kbs(self.project_id)
-        if mcp_type not in project_kbs:
-            raise ValueError(f"No KB assigned for {mcp_type}")
-
-        kb_id = project_kbs[mcp_type]
-
-        # Get KB name from id
-        all_collections = self.db_manager.list_collections()
-        kb_name = None
-        for kb in all_collections:
-            if kb.get("id") == kb_id:
-                kb_name = kb["name"]
-                break
-
-        if not kb_name:
-            raise ValueError(f"KB not found for {mcp_type}")
+        if kb_name is None:
+            kb_name = self.get_kb_name(mcp_type)
 
         # Find all matching files
         synced_files = []
         skipped_files = []
         errors = []
+        kb_missing = False
 
         file_patterns = hook.get("file_patterns", Config.SUPPORTED_FILE_TYPES)
-
-        for file_path in folder_path.rglob("*"):
-            if file_path.is_file():
-                # Check if file matches patterns
-                if not any(file_path.suffix.lower() == pattern.lower() for pattern in file_patterns):
-                    continue
-
-                # Compute file hash
-                file_hash = self._compute_file_hash(file_path)
-
-                # Skip if file hasn't changed
-                if file_path.name in hook.get("synced_files", {}):
-                    if hook["synced_files"][file_path.name] == file_hash:
+        # Normalize once: lowercase, and accept "*.md" as well as ".md"
+        suffixes = frozenset(pattern.lower().lstrip("*") for pattern in file_patterns)
+
+        candidates = [Path(path) for path in _iter_matching_files(str(folder_path), suffixes)]
+
+        # Per-file hashes live in the hook_synced_files table. Older
+        # hooks.json files kept them inline; those are read here and moved
+        # to the DB at the end of the sync.
+        legacy_synced = hook.pop("synced_files", None) or {}
+        synced = {
+            **legacy_synced,
+            **self.db_manager.get_hook_synced_files(self.project_id, mcp_type),
+        }
+        updates: Dict[str, Dict] = {}
+
+        # Stat/read/hash runs on worker threads; changed files are then
+        # ingested in batches so each ingest_documents call (embedding model
+        # setup, DB transaction) covers many files. A file's entry is only
+        # updated once its batch is ingested, so failures retry.
+        max_workers = max(1, min(32, (os.cpu_count() or 1) * 2, len(candidates)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for start in range(0, len(candidates), _INGEST_BATCH_FILES):
+                chunk = candidates[start:start + _INGEST_BATCH_FILES]
+                outcomes = executor.map(
+                    lambda file_path: self._prepare_file(file_path, folder_path, synced),
+                    chunk,
+                )
+
+                batch = []
+                batch_bytes = 0
+                for file_path, (status, payload) in zip(chunk, outcomes):
+                    if status == "error":
+                        errors.append({"file": str(file_path), "error": payload})
+                    elif status == "skipped":
+                        if payload is not None:
+                            rel_path, file_entry = payload
+                            updates[rel_path] = file_entry
                         skipped_files.append(str(file_path))
-                        continue
-
-                # Ingest file
-                try:
-                    logger.info(f"Ingesting {file_path} into {kb_name}")
-
-                    # Read file content
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-
-                    # Ingest document
-                    ingest_documents(
-                        kb_name,
-                        [content],
-                        [{"filename": file_path.name, "path": str(file_path)}]
-                    )
-
-                    # Update hash
-                    hook["synced_files"][file_path.name] = file_hash
-                    synced_files.append(str(file_path))
-
-                except Exception as e:
-                    logger.error(f"Error ingesting {file_path}: {e}")
-                    errors.append({"file": str(file_path), "error": str(e)})
+                    else:
+                        batch.append((file_path, *payload))
+                        batch_bytes += len(payload[2])
+                        if batch_bytes >= _INGEST_BATCH_BYTES:
+                            if self._ingest_batch(kb_name, batch, updates, synced_files, errors):
+                                kb_missing = True
+                            batch = []
+                            batch_bytes = 0
+
+                if batch and self._ingest_batch(kb_name, batch, updates, synced_files, errors):
+                    kb_missing = True
+
+        # Only changed/refreshed entries are written: one upsert per file
+        migrated = {
+            rel_path: entry for rel_path, entry in legacy_synced.items()
+            if isinstance(entry, dict) and rel_path not in updates
+        }
+        self.db_manager.save_hook_synced_files(self.project_id, mcp_type, {**migrated, **updates})
 
         # Update last sync time
-        hook["last_sync"] = datetime.now().isoformat()
-        self._save_hooks_config(config)
+        now = now or datetime.now().isoformat()
+        hook["last_sync"] = now
+        self._save_hooks_config(config, now)
 
         results = {
             "mcp_type": mcp_type,
@@ -222,22 +339,139 @@ class ProjectHook:
             "errors": len(errors),
             "files_synced": synced_files,
             "files_skipped": skipped_files,
-            "errors": errors
+            "errors": errors,
+            # The target KB doesn't exist (deleted or renamed since resolved)
+            "kb_missing": kb_missing
         }
 
         logger.info(f"Sync complete for {mcp_type}: {len(synced_files)} synced, {len(skipped_files)} skipped, {len(errors)} errors")
 
         return results
 
+    def _prepare_file(
+        self,
+        file_path: Path,
+        folder_path: Path,
+        synced: Dict,
+    ) -> Tuple[str, object]:
+        """
+        Check one hook file against its last synced state.
+
+        Runs on a sync worker thread and only reads synced.
+
+        Returns:
+            ("skipped", None or (rel_path, refreshed entry)),
+            ("changed", (rel_path, new entry, content)) or
+            ("error", error message)
+        """
+        # Cheap stat check first; only hash when it can't prove "unchanged"
+        rel_path = str(file_path.relative_to(folder_path))
+        previous = synced.get(rel_path)
+        if previous is None:
+            # Entries used to be keyed by bare file name, hash only
+            previous = synced.get(file_path.name)
+            if not isinstance(previous, str):
+                previous = None
+
+        try:
+            stat = file_path.stat()
+            if (
+                isinstance(previous, dict)
+                and previous.get("mtime_ns") == stat.st_mtime_ns
+                and previous.get("size") == stat.st_size
+            ):
+                return "skipped", None
+
+            # Read once: the same bytes feed the hash and, if changed, ingestion
+            data = file_path.read_bytes()
+            file_hash = _hash_bytes(data)
+        except OSError as e:
+            logger.error(f"Error reading {file_path}: {e}")
+            return "error", str(e)
+
+        file_entry = self._synced_entry(file_hash, stat)
+
+        # Entries without "algo" predate it and are SHA256. Compare with the
+        # algorithm that produced the stored hash, so switching algorithms
+        # doesn't re-ingest unchanged files.
+        if isinstance(previous, dict):
+            previous_hash = previous.get("hash")
+            previous_algo = previous.get("algo", "sha256")
+        else:
+            previous_hash = previous
+            previous_algo = "sha256"
+        current_hash = file_hash if previous_algo == _HASH_ALGO else _hash_bytes(data, previous_algo)
+
+        # Skip if file hasn't changed (refresh the stat for next time)
+        if previous_hash is not None and previous_hash == current_hash:
+            return "skipped", (rel_path, file_entry)
+
+        # Decode as a text-mode read would (UTF-8, universal newlines). The
+        # newline passes cost more than the decode, so skip them when the
+        # bytes have no '\r' (a memchr scan).
+        content = data.decode('utf-8', errors='ignore')
+        if b'\r' in data:
+            content = content.replace('\r\n', '\n').replace('\r', '\n')
+        return "changed", (rel_path, file_entry, content)
+
+    def _ingest_batch(
+        self,
+        kb_name: str,
+        batch: List[Tuple[Path, str, Dict, str]],
+        updates: Dict,
+        synced_files: List[str],
+        errors: List[Dict],
+    ) -> bool:
+        """
+        Ingest changed files with one ingest_documents call.
+
+        If the batch fails (raises or returns an error status), each file is
+        retried on its own so one bad file doesn't fail the rest; updates only
+        gets entries for files that made it in.
+
+        Returns:
+            True if the target KB doesn't exist
+        """
+        kb_missing = False
+        try:
+            logger.info(f"Ingesting {len(batch)} files into {kb_name}")
+            result = ingest_documents(
+                kb_name,
+                [content for _, _, _, content in batch],
+                [{"filename": file_path.name, "path": str(file_path)} for file_path, _, _, _ in batch]
+            )
+            error = None if result.get("status") == "success" else result.get("error", "Ingestion failed")
+            kb_missing = bool(result.get("collection_missing"))
+        except Exception as e:
+            error = str(e)
+
+        if error is not None:
+            # Retrying files one by one can't help if the KB itself is gone
+            if len(batch) == 1 or kb_missing:
+                for file_path, _, _, _ in batch:
+                    logger.error(f"Error ingesting {file_path}: {error}")
+                    errors.append({"file": str(file_path), "error": error})
+                return kb_missing
+            logger.warning(f"Batch ingest into {kb_name} failed ({error}), retrying files individually")
+            missing = [self._ingest_batch(kb_name, [item], updates, synced_files, errors) for item in batch]
+            return any(missing)
+
+        for file_path, rel_path, file_entry, _ in batch:
+            updates[rel_path] = file_entry
+            synced_files.append(str(file_path))
+        return False
+
     def sync_all_folders(self) -> Dict:
         """Sync all enabled KB folders for the project."""
         config = self._load_hooks_config()
         results = {}
+        # One timestamp for the whole sweep
+        now = datetime.now().isoformat()
 
         for mcp_type, hook in config["hooks"].items():
             if hook.get("enabled", False):
                 try:
-                    results[mcp_type] = self.sync_kb_folder(mcp_type)
+                    results[mcp_type] = self.sync_kb_folder(mcp_type, now=now)
                 except Exception as e:
                     logger.error(f"Error syncing {mcp_type}: {e}")
                     results[mcp_type] = {
@@ -254,24 +488,64 @@ class ProjectHook:
         if mcp_type:
             if mcp_type not in config["hooks"]:
                 return {"error": f"Hook for {mcp_type} not found"}
-            return config["hooks"][mcp_type]
+            return self._with_synced_files(mcp_type, config["hooks"][mcp_type])
 
         return {
             "project_id": self.project_id,
             "hooks_config_path": str(self.hooks_config_path),
             "total_hooks": len(config["hooks"]),
             "enabled_hooks": sum(1 for h in config["hooks"].values() if h.get("enabled", False)),
-            "hooks": config["hooks"]
+            "hooks": {
+                hook_type: self._with_synced_files(hook_type, hook)
+                for hook_type, hook in config["hooks"].items()
+            }
         }
 
+    def _with_synced_files(self, mcp_type: str, hook: Dict) -> Dict:
+        """Hook config with its synced_files (stored in the DB) filled in."""
+        synced = dict(hook.get("synced_files") or {})
+        synced.update(self.db_manager.get_hook_synced_files(self.project_id, mcp_type))
+        return {**hook, "synced_files": synced}
+
     @staticmethod
-    def _compute_file_hash(file_path: Path) -> str:
-        """Compute SHA256 hash of a file."""
-        sha256_hash = hashlib.sha256()
-        with open(file_path, 'rb') as f:
-            for byte_block in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(byte_block)
-        return sha256_hash.hexdigest()
+    def _synced_entry(file_hash: str, stat: os.stat_result) -> Dict:
+        """
+        Build the synced_files record for a file.
+
+        The stat fields let the next sync skip hashing an unchanged file. They
+        are left out while the mtime is within a couple of seconds of now: a
+        same-size rewrite in the same timestamp tick would otherwise look
+        unchanged, so such files are hashed again next time.
+        """
+        entry = {"algo": _HASH_ALGO, "hash": file_hash}
+        if time.time_ns() - stat.st_mtime_ns > RACY_MTIME_WINDOW_NS:
+            entry["mtime_ns"] = stat.st_mtime_ns
+            entry["size"] = stat.st_size
+        return entry
+
+
+def _iter_matching_files(directory: str, suffixes: frozenset) -> Iterator[str]:
+    """
+    Yield paths of files under directory whose lowercased suffix is in suffixes.
+
+    Walks with os.scandir so the type check comes from the directory entry and
+    skipped names never become Path objects. Matches rglob("*"): symlinked
+    files are included, symlinked directories are not descended into, and
+    unreadable directories are skipped.
+    """
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return
+
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _iter_matching_files(entry.path, suffixes)
+            elif os.path.splitext(entry.name)[1].lower() in suffixes and entry.is_file():
+                yield entry.path
+        except OSError:
+            continue
 
 
 def get_project_hook(project_id: int, db_manager=None) -> ProjectHook:
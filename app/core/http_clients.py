@@ -0,0 +1,173 @@
+"""
+Shared HTTP clients for calls to Ollama.
+
+Creating a client per request means a new connection (and pool) every
+time. These are created once and reused so requests ride keep-alive
+connections.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import threading
+import weakref
+from typing import Any, Callable, List, Optional, Union
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+# orjson decodes large bodies (batches of embedding vectors) several times
+# faster than the stdlib json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Generation requests can run for minutes; connecting should not
+_ASYNC_TIMEOUT = httpx.Timeout(300.0, connect=10.0)
+_ASYNC_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=100, keepalive_expiry=30.0)
+
+logger = logging.getLogger(__name__)
+
+# Smallest batch an overloaded /api/embed request is split down to
+MIN_EMBED_BATCH_SIZE = 4
+
+# Batches split because Ollama was overloaded, counted for the log so
+# OLLAMA_EMBED_BATCH_SIZE / OLLAMA_EMBED_MAX_CHARS can be tuned
+_embed_bisections = itertools.count(1)
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+# httpx.AsyncClient connections belong to the event loop that opened them,
+# so there is one client per loop (dropped with the loop)
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_async_clients_lock = threading.Lock()
+
+
+def get_ollama_session() -> requests.Session:
+    """Get the shared keep-alive requests session (thread-safe)."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Get the shared httpx.AsyncClient for the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _async_clients_lock:
+        client = _async_clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(timeout=_ASYNC_TIMEOUT, limits=_ASYNC_LIMITS)
+            _async_clients[loop] = client
+        return client
+
+
+async def close_async_client() -> None:
+    """
+    Close the running event loop's client, if it has one.
+
+    Await this before a short-lived loop (asyncio.run) finishes; its
+    connections can't be reused once the loop is gone.
+    """
+    loop = asyncio.get_running_loop()
+    with _async_clients_lock:
+        client = _async_clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
+
+
+def is_overload_error(error: Exception) -> bool:
+    """Whether an Ollama request failure may succeed with a smaller batch."""
+    if isinstance(error, requests.exceptions.HTTPError):
+        status = error.response.status_code if error.response is not None else None
+        return status is not None and (status >= 500 or status == 413)
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+
+def embed_batch(
+    texts: List[str],
+    url: str,
+    model: str,
+    embed_one: Callable[[str], List[float]],
+    start: int = 0,
+    skip_failures: bool = False
+) -> List[Optional[List[float]]]:
+    """
+    Embed texts with one request to Ollama's /api/embed at url.
+
+    If Ollama fails on the batch in a way a smaller one may not (server
+    error, dropped connection or timeout, typically from running out of
+    memory) the batch is split in half and each half retried, down to
+    MIN_EMBED_BATCH_SIZE texts. Otherwise (older Ollama without /api/embed,
+    a response without one embedding per text, or a batch that can't be
+    split further) each text is embedded on its own with embed_one.
+
+    Args:
+        texts: Texts to embed
+        url: Ollama /api/embed URL
+        model: Embedding model name
+        embed_one: Embeds a single text, used for the fallback
+        start: Index of texts[0] in the caller's list, for log messages
+        skip_failures: Give a text embed_one fails on None (and log it)
+            instead of raising
+
+    Returns:
+        One embedding per text, in order
+    """
+    try:
+        response = get_ollama_session().post(
+            url,
+            json={"model": model, "input": texts},
+            timeout=120
+        )
+        response.raise_for_status()
+        embeddings = response_json(response).get("embeddings")
+        if embeddings and len(embeddings) == len(texts):
+            return embeddings
+        logger.warning("Ollama /api/embed returned no embeddings, embedding texts one at a time")
+    except (requests.exceptions.RequestException, ValueError) as e:
+        if len(texts) > MIN_EMBED_BATCH_SIZE and is_overload_error(e):
+            mid = len(texts) // 2
+            logger.warning(
+                f"Batch embedding of {len(texts)} texts failed ({e}), retrying in halves "
+                f"(split #{next(_embed_bisections)})"
+            )
+            return (
+                embed_batch(texts[:mid], url, model, embed_one, start, skip_failures)
+                + embed_batch(texts[mid:], url, model, embed_one, start + mid, skip_failures)
+            )
+        logger.warning(f"Batch embedding failed ({e}), embedding texts one at a time")
+
+    if not skip_failures:
+        return [embed_one(text) for text in texts]
+
+    embeddings: List[Optional[List[float]]] = []
+    for offset, text in enumerate(texts):
+        try:
+            embeddings.append(embed_one(text))
+        except Exception as e:
+            logger.warning(f"Failed to embed text {start + offset}: {e}. Skipping it.")
+            embeddings.append(None)
+    return embeddings
+
+
+def response_json(response: Union[requests.Response, httpx.Response]) -> Any:
+    """
+    Decode a JSON response body, with orjson when available.
+
+    Raises:
+        ValueError: If the body is not valid JSON
+    """
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return json.loads(response.content)
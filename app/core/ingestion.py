@@ -3,23 +3,160 @@ Document ingestion pipeline for Claude OS.
 Handles file upload, text extraction, chunking, embedding, and storage.
 """
 
+import functools
+import hashlib
 import logging
+import os
+import time
 import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 import fitz  # PyMuPDF
+import tiktoken
 from llama_index.core import Document, Settings
 from llama_index.core.node_parser import SentenceSplitter
+from llama_index.core.utils import get_tokenizer
 from llama_index.embeddings.ollama import OllamaEmbedding
 
 from app.core.sqlite_manager import get_sqlite_manager
 from app.core.config import Config
+from app.core.http_clients import embed_batch
 from app.core.markdown_preprocessor import preprocess_markdown
 
 logger = logging.getLogger(__name__)
 
+# Config is immutable, so bind the embed settings once
+_OLLAMA_EMBED_URLS = [f"{host}/api/embed" for host in Config.OLLAMA_EMBED_HOSTS]
+_EMBED_BATCH_SIZE = max(1, Config.OLLAMA_EMBED_BATCH_SIZE)
+_EMBED_BATCH_CHARS = max(1, Config.OLLAMA_EMBED_MAX_CHARS)
+_EMBED_CONCURRENCY = max(1, Config.OLLAMA_EMBED_CONCURRENCY)
+_QUANTIZE_EMBEDDINGS = Config.QUANTIZE_EMBEDDINGS
+
+# Directory ingestion: threads extracting/chunking files, and how many
+# prepared files may wait for embedding
+_PREPARE_WORKERS = min(4, os.cpu_count() or 1)
+_PREPARE_AHEAD = 8
+
+# Chunks over the embed model's context are truncated before embedding
+# (Ollama crashes on over-long input); the margin covers tokenizer mismatch
+_EMBED_TOKEN_BUDGET = max(1, Config.OLLAMA_EMBED_MAX_TOKENS - 32)
+
+# Chunks handed to _embed_texts at a time, enough to keep every concurrent
+# request busy; a file's windows are embedded while the next is gathered
+_EMBED_WINDOW = _EMBED_BATCH_SIZE * _EMBED_CONCURRENCY
+
+# Extracted PDF text buffered before it is chunked (roughly eight chunks
+# at ~4 characters per token)
+_PDF_BUFFER_CHARS = Config.CHUNK_SIZE * 32
+
+def _pack_batches(texts: List[str]) -> List[Tuple[int, int]]:
+    """
+    Split texts into consecutive (start, end) batches of at most
+    _EMBED_BATCH_SIZE texts and _EMBED_BATCH_CHARS characters (a single
+    longer text gets a batch of its own).
+    """
+    bounds = []
+    start = chars = 0
+    for i, text in enumerate(texts):
+        if i > start and (i - start >= _EMBED_BATCH_SIZE or chars + len(text) > _EMBED_BATCH_CHARS):
+            bounds.append((start, i))
+            start, chars = i, 0
+        chars += len(text)
+    if start < len(texts):
+        bounds.append((start, len(texts)))
+    return bounds
+
+
+def _embed_texts(texts: List[str], embed_model: OllamaEmbedding) -> List[Optional[List[float]]]:
+    """
+    Embed texts in batches via Ollama's /api/embed.
+
+    Ollama embeds a batch's inputs one after another, so a batch is bounded
+    by its total length as well as its size: consecutive texts are packed
+    until OLLAMA_EMBED_BATCH_SIZE texts or OLLAMA_EMBED_MAX_CHARS characters.
+    Up to OLLAMA_EMBED_CONCURRENCY batches are in flight at once, assigned
+    round-robin across OLLAMA_EMBED_HOSTS. Repeated texts (license headers,
+    shared boilerplate) are embedded once and the vector reused.
+
+    Returns:
+        One embedding per text, in order; None where embedding failed
+    """
+    unique_texts = list(dict.fromkeys(texts))
+    if len(unique_texts) < len(texts):
+        vectors = dict(zip(unique_texts, _embed_texts(unique_texts, embed_model)))
+        return [vectors[text] for text in texts]
+
+    jobs = [
+        (texts[start:end], start, _OLLAMA_EMBED_URLS[n % len(_OLLAMA_EMBED_URLS)])
+        for n, (start, end) in enumerate(_pack_batches(texts))
+    ]
+
+    def embed(job: Tuple[List[str], int, str]) -> List[Optional[List[float]]]:
+        batch, start, url = job
+        return embed_batch(
+            batch, url, Config.OLLAMA_EMBED_MODEL, embed_model.get_text_embedding,
+            start=start, skip_failures=True
+        )
+
+    if len(jobs) <= 1 or _EMBED_CONCURRENCY == 1:
+        results = [embed(job) for job in jobs]
+    else:
+        with ThreadPoolExecutor(max_workers=min(_EMBED_CONCURRENCY, len(jobs))) as executor:
+            # map yields in submission order, so chunks keep their positions
+            results = list(executor.map(embed, jobs))
+
+    embeddings: List[Optional[List[float]]] = []
+    for batch_embeddings in results:
+        embeddings.extend(batch_embeddings)
+    return embeddings
+
+
+@functools.lru_cache(maxsize=4)
+def _get_embed_model(model_name: str, base_url: str) -> OllamaEmbedding:
+    """Get the Ollama embedding client for a model/host, created once and reused."""
+    return OllamaEmbedding(model_name=model_name, base_url=base_url)
+
+
+@functools.lru_cache(maxsize=4)
+def _get_splitter(chunk_size: int, chunk_overlap: int) -> SentenceSplitter:
+    """Get the sentence splitter for a chunk size/overlap, created once and reused."""
+    return SentenceSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_encoding() -> tiktoken.Encoding:
+    """Get the cl100k_base tokenizer SentenceSplitter chunks with."""
+    # Loading it through llama_index first uses the BPE file it bundles
+    # rather than downloading one; tiktoken then serves it from its registry
+    get_tokenizer()
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def _truncate_to_token_budget(text: str, max_tokens: int) -> str:
+    """Cut text to at most max_tokens tokens; returns text itself when it fits."""
+    # No token is shorter than one UTF-8 byte, so short text can't be over
+    if len(text) * 4 <= max_tokens:
+        return text
+    tokens = _get_encoding().encode_ordinary(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return _get_encoding().decode(tokens[:max_tokens])
+
+
+def _truncate_chunk(text: str, index: int, source: str) -> str:
+    """Clip a chunk to the embed model's token budget, logging when it had to be cut."""
+    truncated = _truncate_to_token_budget(text, _EMBED_TOKEN_BUDGET)
+    if truncated is not text:
+        logger.warning(
+            f"Truncating chunk {index} of {source} from {len(text)} to {len(truncated)} chars "
+            f"({_EMBED_TOKEN_BUDGET} tokens)"
+        )
+    return truncated
+
 
 def extract_text_from_file(file_path: str) -> str:
     """
@@ -36,12 +173,9 @@ def extract_text_from_file(file_path: str) -> str:
 
     try:
         if extension == ".pdf":
-            # Extract text from PDF using PyMuPDF
-            text = ""
+            # Extract text from PDF using PyMuPDF (joined once, not concatenated per page)
             with fitz.open(file_path) as doc:
-                for page in doc:
-                    text += page.get_text()
-            return text
+                return "".join(page.get_text("text") for page in doc)
         else:
             # Read text/code files with UTF-8 encoding
             with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
@@ -62,10 +196,12 @@ def chunk_document(text: str, metadata: Dict) -> List[Document]:
     Returns:
         List of Document objects
     """
-    splitter = SentenceSplitter(
-        chunk_size=Config.CHUNK_SIZE,
-        chunk_overlap=Config.CHUNK_OVERLAP
-    )
+    return _split_text(text, metadata)
+
+
+def _split_text(text: str, metadata: Dict, first_index: int = 0) -> List[Document]:
+    """Split text into chunk Documents numbered from first_index."""
+    splitter = _get_splitter(Config.CHUNK_SIZE, Config.CHUNK_OVERLAP)
 
     # Create a single document
     doc = Document(text=text, metadata=metadata)
@@ -75,7 +211,7 @@ def chunk_document(text: str, metadata: Dict) -> List[Document]:
 
     # Convert nodes back to documents
     chunks = []
-    for i, node in enumerate(nodes):
+    for i, node in enumerate(nodes, start=first_index):
         chunk_metadata = metadata.copy()
         chunk_metadata["chunk_index"] = i
         chunk_metadata["chunk_id"] = node.node_id
@@ -84,140 +220,230 @@ def chunk_document(text: str, metadata: Dict) -> List[Document]:
     return chunks
 
 
-def ingest_file(
-    file_path: str,
-    collection_name: str,
-    filename: str
-) -> Dict[str, any]:
+def iter_pdf_chunks(file_path: str, metadata: Dict) -> Iterator[Document]:
     """
-    Ingest a single file into a knowledge base.
+    Chunk a PDF as its pages are extracted, without building its whole text.
+
+    Page text collects in a buffer that is split once it holds several
+    chunks' worth; the last (possibly short) chunk is carried into the next
+    buffer so chunks still run across page boundaries.
 
     Args:
-        file_path: Path to the file
-        collection_name: Target collection name
-        filename: Original filename
+        file_path: Path to the PDF
+        metadata: Document metadata
 
-    Returns:
-        dict: Ingestion result with status and details
+    Yields:
+        Document chunks, numbered as chunk_document numbers them
     """
-    try:
-        # Extract text
-        text = extract_text_from_file(file_path)
-        if not text.strip():
-            return {
-                "status": "error",
-                "filename": filename,
-                "error": "No text content extracted"
-            }
+    buffer: List[str] = []
+    buffered = 0
+    index = 0
+
+    with fitz.open(file_path) as doc:
+        for page in doc:
+            page_text = page.get_text("text")
+            buffer.append(page_text)
+            buffered += len(page_text)
+            if buffered < _PDF_BUFFER_CHARS:
+                continue
 
-        # Create base metadata
-        file_ext = Path(filename).suffix.lower()
-        metadata = {
-            "filename": filename,
-            "file_type": file_ext,
-            "upload_date": datetime.now().isoformat(),
-            "source_path": str(file_path)
-        }
+            text = "".join(buffer)
+            chunks = _split_text(text, metadata, index) if text.strip() else []
+            if not chunks:
+                buffer, buffered = [], 0
+                continue
+            yield from chunks[:-1]
+            index += len(chunks) - 1
+            buffer = [chunks[-1].text]
+            buffered = len(chunks[-1].text)
 
-        # Preprocess markdown files
-        if file_ext in ['.md', '.markdown']:
-            try:
-                processed_text, enriched_metadata = preprocess_markdown(
-                    text, filename, str(file_path)
-                )
-                text = processed_text
-                metadata.update(enriched_metadata)
-                logger.info(f"Preprocessed markdown: {filename}")
-            except Exception as e:
-                logger.warning(f"Markdown preprocessing failed for {filename}: {e}")
-                # Continue with original text if preprocessing fails
-
-        # Chunk document
-        chunks = chunk_document(text, metadata)
+    text = "".join(buffer)
+    if text.strip():
+        yield from _split_text(text, metadata, index)
 
-        # Initialize embedding model
-        embed_model = OllamaEmbedding(
-            model_name=Config.OLLAMA_EMBED_MODEL,
-            base_url=Config.OLLAMA_HOST
-        )
 
-        # Get SQLite collection
-        pg_manager = get_sqlite_manager()
-        if not pg_manager.collection_exists(collection_name):
-            return {
-                "status": "error",
-                "filename": filename,
-                "error": f"Collection {collection_name} not found"
-            }
+def _prepare_chunks(file_path: str, filename: str, stream: bool = False) -> Tuple[Iterable[Document], str]:
+    """
+    Extract, preprocess and chunk a file (the CPU-bound half of ingestion).
 
-        # Generate embeddings and add to collection
-        documents = []
-        embeddings = []
-        metadatas = []
-        ids = []
+    With stream=True a PDF's chunks are returned as an iterator that
+    extracts pages as it is consumed, so embedding can start before the
+    whole document has been read.
 
-        failed_chunks = 0
+    Returns:
+        (chunks, file_ext); chunks is empty when no text was extracted
+    """
+    file_ext = Path(filename).suffix.lower()
+
+    # Create base metadata
+    metadata = {
+        "filename": filename,
+        "file_type": file_ext,
+        "upload_date": datetime.now().isoformat(),
+        "source_path": str(file_path)
+    }
+
+    if file_ext == ".pdf":
+        chunks = iter_pdf_chunks(str(file_path), metadata)
+        return (chunks if stream else list(chunks)), file_ext
+
+    text = extract_text_from_file(file_path)
+    if not text.strip():
+        return [], file_ext
+
+    # Preprocess markdown files
+    if file_ext in ['.md', '.markdown']:
+        try:
+            processed_text, enriched_metadata = preprocess_markdown(
+                text, filename, str(file_path)
+            )
+            text = processed_text
+            metadata.update(enriched_metadata)
+            logger.info(f"Preprocessed markdown: {filename}")
+        except Exception as e:
+            logger.warning(f"Markdown preprocessing failed for {filename}: {e}")
+            # Continue with original text if preprocessing fails
 
-        for i, chunk in enumerate(chunks):
-            try:
-                # Truncate very long chunks to prevent Ollama crashes
-                chunk_text = chunk.text
-                if len(chunk_text) > 8000:  # Limit to ~8K characters
-                    logger.warning(f"Truncating chunk {i} of {filename} from {len(chunk_text)} to 8000 chars")
-                    chunk_text = chunk_text[:8000]
-
-                # Generate embedding
-                embedding = embed_model.get_text_embedding(chunk_text)
-
-                # Create unique ID
-                chunk_id = f"{filename}_{chunk.metadata['chunk_index']}_{uuid.uuid4().hex[:8]}"
-
-                # Collect data for batch insert
-                documents.append(chunk_text)
-                embeddings.append(embedding)
-                metadatas.append(chunk.metadata)
-                ids.append(chunk_id)
-            except Exception as e:
-                failed_chunks += 1
-                logger.warning(f"Failed to embed chunk {i} of {filename}: {e}. Skipping this chunk.")
-                continue
+    return chunk_document(text, metadata), file_ext
 
-        if not documents:
-            return {
-                "status": "error",
-                "filename": filename,
-                "error": f"All {len(chunks)} chunks failed to generate embeddings"
-            }
 
-        # Add all documents to SQLite in batch
-        pg_manager.add_documents(
-            kb_name=collection_name,
-            documents=documents,
-            embeddings=embeddings,
-            metadatas=metadatas,
-            ids=ids
-        )
+def _store_chunks(
+    chunks: Iterable[Document],
+    file_ext: str,
+    collection_name: str,
+    filename: str
+) -> Dict[str, any]:
+    """
+    Embed a file's chunks and add them to a knowledge base (the I/O-bound half).
 
-        success_msg = f"Ingested {filename}: {len(documents)}/{len(chunks)} chunks"
-        if failed_chunks > 0:
-            success_msg += f" ({failed_chunks} chunks skipped due to errors)"
-        logger.info(success_msg)
+    Chunks are embedded in windows on a worker thread while the next window
+    is gathered, so a lazily extracted document (a streamed PDF) overlaps
+    extraction with embedding.
+    """
+    chunks = iter(chunks)
+    first_chunk = next(chunks, None)
+    if first_chunk is None:
+        return {
+            "status": "error",
+            "filename": filename,
+            "error": "No text content extracted"
+        }
 
+    # Initialize embedding model
+    embed_model = _get_embed_model(Config.OLLAMA_EMBED_MODEL, Config.OLLAMA_HOST)
+
+    # Get SQLite collection
+    pg_manager = get_sqlite_manager()
+    if not pg_manager.collection_exists(collection_name):
         return {
-            "status": "success",
+            "status": "error",
             "filename": filename,
-            "chunks": len(chunks),
-            "file_type": file_ext
+            "error": f"Collection {collection_name} not found",
+            "collection_missing": True
         }
 
-    except Exception as e:
-        logger.error(f"Failed to ingest {filename}: {e}")
+    # Embed windows of chunks in batched requests
+    embedded = []
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest-embed") as executor:
+        def submit(window: List[Document]) -> None:
+            chunk_texts = [_truncate_chunk(c.text, c.metadata["chunk_index"], filename) for c in window]
+            embedded.append((window, chunk_texts, executor.submit(_embed_texts, chunk_texts, embed_model)))
+
+        window = [first_chunk]
+        for chunk in chunks:
+            if len(window) == _EMBED_WINDOW:
+                submit(window)
+                window = []
+            window.append(chunk)
+        submit(window)
+
+    total_chunks = sum(len(window) for window, _, _ in embedded)
+
+    # Generate embeddings and add to collection
+    documents = []
+    embeddings = []
+    metadatas = []
+    ids = []
+
+    failed_chunks = 0
+
+    for window, chunk_texts, future in embedded:
+        for chunk, chunk_text, embedding in zip(window, chunk_texts, future.result()):
+            if embedding is None:
+                failed_chunks += 1
+                continue
+
+            # Create unique ID
+            chunk_id = f"{filename}_{chunk.metadata['chunk_index']}_{uuid.uuid4().hex[:8]}"
+
+            # Collect data for batch insert
+            documents.append(chunk_text)
+            embeddings.append(embedding)
+            metadatas.append(chunk.metadata)
+            ids.append(chunk_id)
+
+    if not documents:
         return {
             "status": "error",
             "filename": filename,
-            "error": str(e)
+            "error": f"All {total_chunks} chunks failed to generate embeddings"
         }
 
+    # Add all documents to SQLite in batch
+    pg_manager.add_documents(
+        kb_name=collection_name,
+        documents=documents,
+        embeddings=embeddings,
+        metadatas=metadatas,
+        ids=ids,
+        quantize=_QUANTIZE_EMBEDDINGS
+    )
+
+    success_msg = f"Ingested {filename}: {len(documents)}/{total_chunks} chunks"
+    if failed_chunks > 0:
+        success_msg += f" ({failed_chunks} chunks skipped due to errors)"
+    logger.info(success_msg)
+
+    return {
+        "status": "success",
+        "filename": filename,
+        "chunks": total_chunks,
+        "file_type": file_ext
+    }
+
+
+def _ingest_failed(filename: str, error: Exception) -> Dict[str, any]:
+    """Result for a file whose ingestion raised."""
+    logger.error(f"Failed to ingest {filename}: {error}")
+    return {
+        "status": "error",
+        "filename": filename,
+        "error": str(error)
+    }
+
+
+def ingest_file(
+    file_path: str,
+    collection_name: str,
+    filename: str
+) -> Dict[str, any]:
+    """
+    Ingest a single file into a knowledge base.
+
+    Args:
+        file_path: Path to the file
+        collection_name: Target collection name
+        filename: Original filename
+
+    Returns:
+        dict: Ingestion result with status and details
+    """
+    try:
+        chunks, file_ext = _prepare_chunks(file_path, filename, stream=True)
+        return _store_chunks(chunks, file_ext, collection_name, filename)
+    except Exception as e:
+        return _ingest_failed(filename, e)
+
 
 def ingest_documents(
     collection_name: str,
@@ -238,10 +464,7 @@ def ingest_documents(
     """
     try:
         # Initialize embedding model
-        embed_model = OllamaEmbedding(
-            model_name=Config.OLLAMA_EMBED_MODEL,
-            base_url=Config.OLLAMA_HOST
-        )
+        embed_model = _get_embed_model(Config.OLLAMA_EMBED_MODEL, Config.OLLAMA_HOST)
 
         # Get SQLite manager
         db_manager = get_sqlite_manager()
@@ -249,14 +472,13 @@ def ingest_documents(
             return {
                 "status": "error",
                 "error": f"Collection {collection_name} not found",
+                "collection_missing": True,
                 "documents_processed": 0
             }
 
-        # Process all documents
-        all_document_texts = []
-        all_embeddings = []
-        all_metadatas = []
-        all_ids = []
+        # Chunk all documents, then embed every chunk in batched requests
+        all_chunks = []
+        chunk_texts = []
 
         for doc_text, metadata in zip(documents, metadatas):
             if not doc_text.strip():
@@ -265,29 +487,29 @@ def ingest_documents(
 
             # Chunk the document
             chunks = chunk_document(doc_text, metadata)
-
-            # Generate embeddings for each chunk
             for i, chunk in enumerate(chunks):
-                try:
-                    # Truncate very long chunks to prevent Ollama crashes
-                    chunk_text = chunk.text
-                    if len(chunk_text) > 8000:  # Limit to ~8K characters
-                        logger.warning(f"Truncating chunk {i} from {len(chunk_text)} to 8000 chars")
-                        chunk_text = chunk_text[:8000]
-
-                    embedding = embed_model.get_text_embedding(chunk_text)
-
-                    # Create unique ID
-                    chunk_id = f"{metadata.get('filename', 'doc')}_{chunk.metadata['chunk_index']}_{uuid.uuid4().hex[:8]}"
-
-                    # Collect data
-                    all_document_texts.append(chunk_text)
-                    all_embeddings.append(embedding)
-                    all_metadatas.append(chunk.metadata)
-                    all_ids.append(chunk_id)
-                except Exception as e:
-                    logger.warning(f"Failed to embed chunk {i}: {e}. Skipping this chunk.")
-                    continue
+                all_chunks.append(chunk)
+                chunk_texts.append(_truncate_chunk(chunk.text, i, metadata.get('filename', 'document')))
+
+        chunk_embeddings = _embed_texts(chunk_texts, embed_model)
+
+        all_document_texts = []
+        all_embeddings = []
+        all_metadatas = []
+        all_ids = []
+
+        for chunk, chunk_text, embedding in zip(all_chunks, chunk_texts, chunk_embeddings):
+            if embedding is None:
+                continue
+
+            # Create unique ID
+            chunk_id = f"{chunk.metadata.get('filename', 'doc')}_{chunk.metadata['chunk_index']}_{uuid.uuid4().hex[:8]}"
+
+            # Collect data
+            all_document_texts.append(chunk_text)
+            all_embeddings.append(embedding)
+            all_metadatas.append(chunk.metadata)
+            all_ids.append(chunk_id)
 
         if not all_document_texts:
             return {
@@ -302,7 +524,8 @@ def ingest_documents(
             documents=all_document_texts,
             embeddings=all_embeddings,
             metadatas=all_metadatas,
-            ids=all_ids
+            ids=all_ids,
+            quantize=_QUANTIZE_EMBEDDINGS
         )
 
         logger.info(f"Ingested {len(documents)} documents into {collection_name}: {len(all_document_texts)} total chunks")
@@ -366,6 +589,68 @@ def should_skip_path(file_path: Path) -> bool:
     return False
 
 
+# A file's stat is only trusted to detect "unchanged" once its mtime is
+# older than this (a same-size rewrite within one timestamp tick would
+# otherwise look unchanged). Shared with the hooks sync.
+RACY_MTIME_WINDOW_NS = 2_000_000_000
+
+
+def _file_fingerprint(file_path: str, previous: Optional[Dict]) -> Tuple[bool, Optional[Dict]]:
+    """
+    Check a file against the fingerprint recorded when it was last ingested.
+
+    The file is only hashed when its size/mtime differ from the recorded
+    ones, so unchanged files cost a single stat.
+
+    Returns:
+        (changed, entry): entry is the fingerprint to record, or None when
+        the recorded one is still current
+    """
+    stat = os.stat(file_path)
+    if previous and previous.get("mtime_ns") == stat.st_mtime_ns and previous.get("size") == stat.st_size:
+        return False, None
+
+    # file_digest runs the read/update loop in C on the raw file
+    with open(file_path, 'rb') as f:
+        entry = {"hash": hashlib.file_digest(f, 'sha256').hexdigest()}
+    if time.time_ns() - stat.st_mtime_ns > RACY_MTIME_WINDOW_NS:
+        entry["mtime_ns"] = stat.st_mtime_ns
+        entry["size"] = stat.st_size
+
+    changed = not previous or previous["hash"] != entry["hash"]
+    return changed, entry
+
+
+# Wildcard entries of SKIP_DIRECTORIES as name suffixes (e.g. ".egg-info")
+_SKIP_DIRECTORY_SUFFIXES = tuple(p.replace('*', '') for p in SKIP_DIRECTORIES if '*' in p)
+
+
+def _iter_supported_files(directory: str) -> Iterator[str]:
+    """
+    Yield paths of supported files under directory, not descending into
+    SKIP_DIRECTORIES.
+
+    Walks with os.scandir so type checks come from the directory entry and
+    skipped trees are never listed. Symlinked files are included, symlinked
+    directories are not descended into, and unreadable directories are
+    skipped.
+    """
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return
+
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in SKIP_DIRECTORIES and not entry.name.endswith(_SKIP_DIRECTORY_SUFFIXES):
+                    yield from _iter_supported_files(entry.path)
+            elif Config.is_supported_file(entry.name) and entry.is_file():
+                yield entry.path
+        except OSError:
+            continue
+
+
 def ingest_directory(
     dir_path: str,
     collection_name: str
@@ -373,6 +658,8 @@ def ingest_directory(
     """
     Recursively ingest all supported files from a directory.
     Automatically skips common non-source directories like node_modules, .git, etc.
+    Files unchanged since they were last ingested into the collection are
+    skipped (status "skipped"); changed files replace their previous chunks.
 
     Args:
         dir_path: Path to directory
@@ -382,7 +669,8 @@ def ingest_directory(
         List of ingestion results
     """
     results = []
-    dir_path = Path(dir_path)
+    # Manifest entries are keyed by absolute path, whatever the cwd
+    dir_path = Path(dir_path).resolve()
 
     if not dir_path.exists() or not dir_path.is_dir():
         logger.error(f"Directory not found: {dir_path}")
@@ -391,18 +679,55 @@ def ingest_directory(
             "error": f"Directory not found: {dir_path}"
         }]
 
-    # Recursively find all supported files, skipping excluded directories
-    for file_path in dir_path.rglob("*"):
-        # Skip excluded directories
-        if should_skip_path(file_path):
-            continue
-        if file_path.is_file() and Config.is_supported_file(file_path.name):
-            result = ingest_file(
-                str(file_path),
-                collection_name,
-                file_path.name
-            )
-            results.append(result)
+    db_manager = get_sqlite_manager()
+    previously_ingested = db_manager.get_ingested_files(collection_name)
+    fingerprints = {}
+
+    def store(file_path: str, fingerprint: Optional[Dict], prepared: Optional[Future]) -> Dict[str, any]:
+        filename = os.path.basename(file_path)
+        if prepared is None:
+            if fingerprint:
+                fingerprints[file_path] = fingerprint
+            return {"status": "skipped", "filename": filename, "reason": "unchanged"}
+        try:
+            chunks, file_ext = prepared.result()
+            if file_path in previously_ingested:
+                # Replace the chunks stored for the file's previous content
+                db_manager.delete_documents_by_source_path(collection_name, file_path)
+            result = _store_chunks(chunks, file_ext, collection_name, filename)
+        except Exception as e:
+            return _ingest_failed(filename, e)
+        if result["status"] == "success":
+            fingerprints[file_path] = fingerprint
+        return result
+
+    # Extraction and chunking run ahead on worker threads while this thread
+    # embeds and stores, keeping at most _PREPARE_AHEAD files in memory
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=_PREPARE_WORKERS, thread_name_prefix="ingest-prepare") as executor:
+        # Recursively find all supported files, skipping excluded directories
+        for file_path in _iter_supported_files(str(dir_path)):
+            prepared = None
+            try:
+                changed, fingerprint = _file_fingerprint(file_path, previously_ingested.get(file_path))
+            except OSError as e:
+                # Queued as a failed preparation so results keep file order
+                changed, fingerprint = False, None
+                prepared = Future()
+                prepared.set_exception(e)
+
+            if changed:
+                prepared = executor.submit(_prepare_chunks, file_path, os.path.basename(file_path))
+            pending.append((file_path, fingerprint, prepared))
+            if len(pending) >= _PREPARE_AHEAD:
+                results.append(store(*pending.popleft()))
+
+        while pending:
+            results.append(store(*pending.popleft()))
+
+    # Record what was stored so the next run can skip it
+    if fingerprints and db_manager.collection_exists(collection_name):
+        db_manager.save_ingested_files(collection_name, fingerprints)
 
     return results
 
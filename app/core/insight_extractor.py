@@ -3,16 +3,35 @@ Insight Extractor for Claude Code session transcripts.
 Uses LLM to extract valuable insights (decisions, patterns, solutions, blockers).
 """
 
+import asyncio
 import json
 import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import httpx
 
 from app.core.config import Config
+from app.core.http_clients import close_async_client, get_async_client, response_json
 
 logger = logging.getLogger(__name__)
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Outermost {...} in the response: skips code fences and any preamble
+# ("Sure, here are the insights:") or trailing remarks around the JSON
+_JSON_OBJECT_RE = re.compile(r"\{.*\}", re.DOTALL)
+
+# Transcript characters packed into one extract_many() prompt (~4 chars/token)
+_BATCH_MAX_CHARS = Config.INSIGHT_BATCH_MAX_CHARS
+
+# Keep the model loaded between back-to-back extraction requests
+_OLLAMA_KEEP_ALIVE = "10m"
+
 
 @dataclass
 class Insight:
@@ -62,6 +81,44 @@ Return valid JSON only (no markdown, no extra text):
 If no valuable insights found, return: {{"insights": []}}
 """
 
+# Multi-transcript variant used by extract_many(): the instructions are read
+# once for the whole pack instead of once per session
+EXTRACTION_MANY_PROMPT = """Analyze each Claude Code session transcript in the JSON array below and extract valuable insights.
+
+CRITICAL RULES:
+1. ONLY extract insights that are EXPLICITLY mentioned in that item's transcript
+2. Do NOT invent, assume, or hallucinate any insights
+3. Never attribute an insight from one transcript to another item's id
+4. If a transcript doesn't contain valuable insights, return an empty list for its id
+
+Look for these types of insights (ONLY if actually present):
+1. **Decisions**: Technical choices made with clear reasoning stated in the transcript
+2. **Patterns**: Reusable approaches or code patterns that were explicitly discovered/discussed
+3. **Solutions**: Bug fixes or error resolutions that were actually implemented
+4. **Blockers**: Problems encountered that were explicitly mentioned
+
+For each insight you extract:
+- The title MUST use terminology from the actual transcript
+- The content MUST describe what actually happened (not what might have happened)
+- Confidence should be 0.9+ only if explicitly stated, 0.7-0.8 if implied from context
+
+Skip routine operations (ls, git status, simple file reads, etc.).
+If unsure whether something qualifies, leave it out.
+
+Session transcripts:
+{items}
+
+For each item in the array above, return its insights keyed by id.
+Return valid JSON only (no markdown, no extra text):
+{{
+    "results": [
+        {{"id": "item id", "insights": [
+            {{"type": "decision|pattern|solution|blocker", "title": "Title using actual terms from transcript", "content": "What specifically happened based on transcript text...", "confidence": 0.85}}
+        ]}}
+    ]
+}}
+"""
+
 
 class InsightExtractor:
     """Extract insights from session transcripts using LLM."""
@@ -119,6 +176,78 @@ class InsightExtractor:
             logger.error(f"Failed to extract insights: {e}")
             return []
 
+    async def extract_many(
+        self,
+        summaries: List[Tuple[str, str]],
+        insight_types: Optional[List[str]] = None
+    ) -> Dict[str, List[Insight]]:
+        """
+        Extract insights from several session summaries with as few LLM calls as possible.
+
+        Summaries are packed into multi-transcript prompts of at most
+        INSIGHT_BATCH_MAX_CHARS transcript characters each.
+
+        Args:
+            summaries: (id, session_summary) pairs
+            insight_types: Filter to specific types (defaults to all types)
+
+        Returns:
+            Dict mapping each id to its list of Insight objects
+        """
+        if insight_types is None:
+            insight_types = ["decision", "pattern", "solution", "blocker"]
+
+        results: Dict[str, List[Insight]] = {item_id: [] for item_id, _ in summaries}
+
+        for pack in self._pack_summaries(summaries):
+            logger.info(f"Extracting insights from {len(pack)} session summaries in one request")
+            items = [{"id": item_id, "transcript": summary} for item_id, summary in pack]
+            prompt = EXTRACTION_MANY_PROMPT.format(items=json.dumps(items, indent=2))
+
+            try:
+                # Room for a full single-session response per item
+                data = await self._generate(prompt, num_predict=2048 * len(pack))
+            except Exception as e:
+                logger.error(f"Failed to extract insights for {len(pack)} sessions: {e}")
+                continue
+
+            pack_ids = {item_id for item_id, _ in pack}
+            for entry in data.get("results", []):
+                if not isinstance(entry, dict):
+                    continue
+                item_id = str(entry.get("id", ""))
+                if item_id not in pack_ids:
+                    logger.warning(f"Ignoring insights for unknown session id: {item_id!r}")
+                    continue
+                results[item_id].extend(
+                    i for i in self._to_insights(entry.get("insights", []))
+                    if i.type in insight_types
+                )
+
+        return results
+
+    def _pack_summaries(self, summaries: List[Tuple[str, str]]) -> List[List[Tuple[str, str]]]:
+        """
+        Split (id, summary) pairs into packs within the prompt character budget.
+
+        A summary larger than the budget gets a pack of its own.
+        """
+        packs: List[List[Tuple[str, str]]] = []
+        pack: List[Tuple[str, str]] = []
+        pack_chars = 0
+
+        for item in summaries:
+            size = len(item[1])
+            if pack and pack_chars + size > _BATCH_MAX_CHARS:
+                packs.append(pack)
+                pack, pack_chars = [], 0
+            pack.append(item)
+            pack_chars += size
+
+        if pack:
+            packs.append(pack)
+        return packs
+
     async def _call_ollama(self, prompt: str) -> List[Insight]:
         """
         Call Ollama API to extract insights.
@@ -129,6 +258,20 @@ class InsightExtractor:
         Returns:
             List of Insight objects
         """
+        insights_data = await self._generate(prompt)
+        return self._to_insights(insights_data.get("insights", []))
+
+    async def _generate(self, prompt: str, num_predict: int = 2048) -> Dict[str, Any]:
+        """
+        Run a prompt through Ollama's generate endpoint.
+
+        Args:
+            prompt: Extraction prompt
+            num_predict: Maximum number of tokens to generate
+
+        Returns:
+            Parsed JSON object from the model response
+        """
         url = f"{self.ollama_base_url}/api/generate"
 
         payload = {
@@ -136,41 +279,26 @@ class InsightExtractor:
             "prompt": prompt,
             "stream": False,
             "format": "json",  # Request JSON response
+            "keep_alive": _OLLAMA_KEEP_ALIVE,
             "options": {
                 "temperature": 0.3,  # Lower temperature for more focused extraction
-                "num_predict": 2048,  # Allow longer responses for multiple insights
+                "num_predict": num_predict,  # Allow longer responses for multiple insights
                 "top_k": 40,
                 "top_p": 0.9
             }
         }
 
         try:
-            async with httpx.AsyncClient(timeout=120.0) as client:
-                response = await client.post(url, json=payload)
-                response.raise_for_status()
-
-                result = response.json()
-                response_text = result.get("response", "")
-
-                # Parse JSON response
-                insights_data = self._parse_llm_response(response_text)
-
-                # Convert to Insight objects
-                insights = []
-                for item in insights_data.get("insights", []):
-                    try:
-                        insight = Insight(
-                            type=item.get("type", "pattern"),
-                            title=item.get("title", "Untitled"),
-                            content=item.get("content", ""),
-                            confidence=float(item.get("confidence", 0.5))
-                        )
-                        insights.append(insight)
-                    except (ValueError, KeyError) as e:
-                        logger.warning(f"Failed to parse insight item: {e}")
-                        continue
-
-                return insights
+            # Shared client: reuses the keep-alive connection to Ollama
+            client = get_async_client()
+            response = await client.post(url, json=payload, timeout=120.0)
+            response.raise_for_status()
+
+            result = response_json(response)
+            response_text = result.get("response", "")
+
+            # Parse JSON response
+            return self._parse_llm_response(response_text)
 
         except httpx.HTTPError as e:
             logger.error(f"Ollama API error: {e}")
@@ -179,6 +307,28 @@ class InsightExtractor:
             logger.error(f"Unexpected error calling Ollama: {e}")
             raise
 
+    def _to_insights(self, items: List[Dict[str, Any]]) -> List[Insight]:
+        """
+        Convert raw insight dicts from the LLM into Insight objects.
+
+        Malformed items are logged and skipped.
+        """
+        insights = []
+        for item in items:
+            try:
+                insight = Insight(
+                    type=item.get("type", "pattern"),
+                    title=item.get("title", "Untitled"),
+                    content=item.get("content", ""),
+                    confidence=float(item.get("confidence", 0.5))
+                )
+                insights.append(insight)
+            except (ValueError, KeyError) as e:
+                logger.warning(f"Failed to parse insight item: {e}")
+                continue
+
+        return insights
+
     def _parse_llm_response(self, response_text: str) -> Dict[str, Any]:
         """
         Parse LLM response JSON.
@@ -191,25 +341,19 @@ class InsightExtractor:
         Returns:
             Parsed JSON dict
         """
-        # Clean up response if it has markdown code blocks
-        cleaned_text = response_text.strip()
-
-        # Remove markdown code blocks if present
-        if cleaned_text.startswith("```json"):
-            cleaned_text = cleaned_text[7:]  # Remove ```json
-        elif cleaned_text.startswith("```"):
-            cleaned_text = cleaned_text[3:]  # Remove ```
-
-        if cleaned_text.endswith("```"):
-            cleaned_text = cleaned_text[:-3]
-
-        cleaned_text = cleaned_text.strip()
+        match = _JSON_OBJECT_RE.search(response_text)
+        if not match:
+            logger.error("No JSON object in LLM response")
+            logger.debug(f"Response text: {response_text[:500]}")
+            return {"insights": []}
 
+        json_text = match.group(0)
         try:
-            return json.loads(cleaned_text)
+            # orjson.JSONDecodeError subclasses json.JSONDecodeError
+            return orjson.loads(json_text) if orjson is not None else json.loads(json_text)
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse LLM JSON response: {e}")
-            logger.debug(f"Response text: {cleaned_text[:500]}")
+            logger.debug(f"Response text: {json_text[:500]}")
             # Return empty insights on parse failure
             return {"insights": []}
 
@@ -306,15 +450,22 @@ def extract_insights_sync(
     Returns:
         List of high-confidence Insight objects
     """
-    import asyncio
-
     extractor = InsightExtractor()
 
-    # Run async extraction
-    loop = asyncio.get_event_loop()
-    insights = loop.run_until_complete(
-        extractor.extract(session_summary, insight_types)
-    )
-
-    # Filter by confidence
-    return extractor.filter_by_confidence(insights, min_confidence)
+    async def extract_and_filter() -> List[Insight]:
+        try:
+            insights = await extractor.extract(session_summary, insight_types)
+        finally:
+            # The loop only lives for this call, so its client can't be reused
+            await close_async_client()
+        return extractor.filter_by_confidence(insights, min_confidence)
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(extract_and_filter())
+
+    # Called from inside a running loop, which can't be re-entered: run the
+    # extraction on a fresh loop in a worker thread instead
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, extract_and_filter()).result()
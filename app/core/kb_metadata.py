@@ -3,17 +3,41 @@ Knowledge base metadata management for UI display.
 """
 
 import logging
-from collections import defaultdict
 from datetime import datetime
-from typing import Dict, List
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 
+from app.core.kb_metadata_cache import swr_cache
 from app.core.sqlite_manager import get_sqlite_manager
 from app.core.kb_types import KBType, get_kb_type_info, validate_kb_type
 
 logger = logging.getLogger(__name__)
 
 
-def generate_tags(file_type: str) -> List[str]:
+# Shared, immutable tag tuples: generate_tags allocates nothing per call
+_TAG_MAP: Dict[str, Tuple[str, ...]] = {
+    ".py": ("Code", "Python"),
+    ".js": ("Code", "JavaScript"),
+    ".jsx": ("Code", "React"),
+    ".ts": ("Code", "TypeScript"),
+    ".tsx": ("Code", "React", "TypeScript"),
+    ".go": ("Code", "Go"),
+    ".rs": ("Code", "Rust"),
+    ".java": ("Code", "Java"),
+    ".cpp": ("Code", "C++"),
+    ".c": ("Code", "C"),
+    ".h": ("Code", "Header"),
+    ".md": ("Document", "Markdown"),
+    ".txt": ("Document", "Text"),
+    ".pdf": ("Document", "PDF"),
+    ".json": ("Config", "JSON"),
+    ".yaml": ("Config", "YAML"),
+    ".yml": ("Config", "YAML"),
+}
+_DEFAULT_TAGS: Tuple[str, ...] = ("Document", "Unknown")
+
+
+def generate_tags(file_type: str) -> Tuple[str, ...]:
     """
     Generate display tags based on file type.
 
@@ -21,31 +45,13 @@ def generate_tags(file_type: str) -> List[str]:
         file_type: File extension (e.g., '.py', '.md')
 
     Returns:
-        List of tag strings
+        Tuple of tag strings (shared; don't mutate)
     """
-    tag_map = {
-        ".py": ["Code", "Python"],
-        ".js": ["Code", "JavaScript"],
-        ".jsx": ["Code", "React"],
-        ".ts": ["Code", "TypeScript"],
-        ".tsx": ["Code", "React", "TypeScript"],
-        ".go": ["Code", "Go"],
-        ".rs": ["Code", "Rust"],
-        ".java": ["Code", "Java"],
-        ".cpp": ["Code", "C++"],
-        ".c": ["Code", "C"],
-        ".h": ["Code", "Header"],
-        ".md": ["Document", "Markdown"],
-        ".txt": ["Document", "Text"],
-        ".pdf": ["Document", "PDF"],
-        ".json": ["Config", "JSON"],
-        ".yaml": ["Config", "YAML"],
-        ".yml": ["Config", "YAML"],
-    }
-
-    return tag_map.get(file_type.lower(), ["Document", "Unknown"])
+    return _TAG_MAP.get(file_type.lower(), _DEFAULT_TAGS)
 
 
+# Upload dates repeat across documents and UI refreshes
+@lru_cache(maxsize=4096)
 def format_timestamp(iso_timestamp: str) -> str:
     """
     Format ISO timestamp for display.
@@ -63,67 +69,53 @@ def format_timestamp(iso_timestamp: str) -> str:
         return "Updated: Unknown"
 
 
-def get_documents_metadata(collection_name: str) -> List[Dict[str, any]]:
+def get_documents_metadata(
+    collection_name: str,
+    limit: Optional[int] = 50,
+    offset: int = 0
+) -> List[Dict[str, any]]:
     """
-    Get metadata for all documents in a collection.
-    Groups chunks by filename and aggregates metadata.
+    Get metadata for one page of documents in a collection, newest first.
+    Chunks are grouped by filename and aggregated in SQL.
 
     Args:
         collection_name: Name of the collection
+        limit: Maximum number of documents to return (None for all)
+        offset: Number of documents to skip
 
     Returns:
         List of document metadata dicts
     """
     try:
-        pg_manager = get_sqlite_manager()
-
-        if not pg_manager.collection_exists(collection_name):
-            logger.warning(f"Collection {collection_name} not found")
-            return []
-
-        # Get all documents with metadata
-        results = pg_manager.get_documents_by_metadata(collection_name, where={})
-
-        if not results:
-            return []
-
-        # Group chunks by filename
-        docs_by_filename = defaultdict(list)
-        for doc in results:
-            metadata = doc.get("metadata", {})
-            filename = metadata.get("filename", "unknown")
-            docs_by_filename[filename].append(metadata)
-
-        # Aggregate metadata for each document
-        documents = []
-        for filename, chunks in docs_by_filename.items():
-            # Get metadata from first chunk
-            first_chunk = chunks[0]
-            file_type = first_chunk.get("file_type", "")
-            upload_date = first_chunk.get("upload_date", "")
-
-            documents.append({
-                "filename": filename,
-                "file_type": file_type,
-                "tags": generate_tags(file_type),
-                "upload_date": upload_date,
-                "formatted_date": format_timestamp(upload_date),
-                "chunk_count": len(chunks)
-            })
-
-        # Sort by upload date (newest first)
-        documents.sort(
-            key=lambda x: x.get("upload_date", ""),
-            reverse=True
-        )
-
-        return documents
-
+        return _load_documents_metadata(collection_name, limit, offset)
     except Exception as e:
         logger.error(f"Failed to get documents metadata: {e}")
         return []
 
 
+@swr_cache
+def _load_documents_metadata(
+    collection_name: str,
+    limit: Optional[int],
+    offset: int
+) -> List[Dict[str, any]]:
+    """Cached body of get_documents_metadata; raises so errors aren't cached."""
+    pg_manager = get_sqlite_manager()
+
+    if not pg_manager.collection_exists(collection_name):
+        logger.warning(f"Collection {collection_name} not found")
+        return []
+
+    documents = pg_manager.list_documents(collection_name, limit=limit, offset=offset)
+
+    # Display fields are only built for the returned page
+    for doc in documents:
+        doc["tags"] = generate_tags(doc["file_type"])
+        doc["formatted_date"] = format_timestamp(doc["upload_date"])
+
+    return documents
+
+
 def get_collection_stats(collection_name: str) -> Dict[str, any]:
     """
     Get statistics for a collection including KB type.
@@ -135,45 +127,23 @@ def get_collection_stats(collection_name: str) -> Dict[str, any]:
         dict: Statistics including total docs, chunks, last updated, and kb_type
     """
     try:
-        pg_manager = get_sqlite_manager()
-
-        if not pg_manager.collection_exists(collection_name):
-            return {
-                "total_documents": 0,
-                "total_chunks": 0,
-                "last_updated": None,
-                "kb_type": KBType.GENERIC.value
-            }
-
-        # Get KB type from collection metadata
-        kb_metadata = pg_manager.get_collection_metadata(collection_name)
-        kb_type = kb_metadata.get("kb_type", KBType.GENERIC.value) if kb_metadata else KBType.GENERIC.value
-
-        # Get all documents with metadata
-        results = pg_manager.get_documents_by_metadata(collection_name, where={})
-
-        # Count unique documents
-        unique_filenames = set(
-            doc.get("metadata", {}).get("filename", "") for doc in results
-        )
-
-        # Get latest upload date
-        upload_dates = [
-            doc.get("metadata", {}).get("upload_date", "")
-            for doc in results
-            if doc.get("metadata", {}).get("upload_date")
-        ]
-        last_updated = max(upload_dates) if upload_dates else None
-
+        return _load_collection_stats(collection_name)
+    except Exception as e:
+        logger.error(f"Failed to get collection stats: {e}")
         return {
-            "total_documents": len(unique_filenames),
-            "total_chunks": len(results),
-            "last_updated": last_updated,
-            "kb_type": kb_type if isinstance(kb_type, str) else kb_type.value
+            "total_documents": 0,
+            "total_chunks": 0,
+            "last_updated": None,
+            "kb_type": KBType.GENERIC.value
         }
 
-    except Exception as e:
-        logger.error(f"Failed to get collection stats: {e}")
+
+@swr_cache
+def _load_collection_stats(collection_name: str) -> Dict[str, any]:
+    """Cached body of get_collection_stats; raises so errors aren't cached."""
+    pg_manager = get_sqlite_manager()
+
+    if not pg_manager.collection_exists(collection_name):
         return {
             "total_documents": 0,
             "total_chunks": 0,
@@ -181,20 +151,21 @@ def get_collection_stats(collection_name: str) -> Dict[str, any]:
             "kb_type": KBType.GENERIC.value
         }
 
-def get_kb_type_badge(kb_type: KBType) -> str:
-    """
-    Generate HTML badge for KB type display in UI.
+    # Get KB type from collection metadata
+    kb_metadata = pg_manager.get_collection_metadata(collection_name)
+    kb_type = kb_metadata.get("kb_type", KBType.GENERIC.value) if kb_metadata else KBType.GENERIC.value
 
-    Args:
-        kb_type: The KB type
+    # Counts and latest upload date are aggregated in SQL
+    stats = pg_manager.get_document_stats(collection_name)
 
-    Returns:
-        HTML string for badge display
+    return {
+        **stats,
+        "kb_type": kb_type if isinstance(kb_type, str) else kb_type.value
+    }
 
-    Example:
-        >>> get_kb_type_badge(KBType.AGENT_OS)
-        '<span style="...">🤖 Agent OS Profile</span>'
-    """
+
+def _render_kb_type_badge(kb_type: KBType) -> str:
+    """Render the HTML badge for a KB type."""
     info = get_kb_type_info(kb_type)
 
     return f'''
@@ -213,6 +184,27 @@ def get_kb_type_badge(kb_type: KBType) -> str:
     '''
 
 
+# Badges only depend on the KB type, so each is rendered once at import
+_BADGE_HTML: Dict[KBType, str] = {kb_type: _render_kb_type_badge(kb_type) for kb_type in KBType}
+
+
+def get_kb_type_badge(kb_type: KBType) -> str:
+    """
+    Generate HTML badge for KB type display in UI.
+
+    Args:
+        kb_type: The KB type
+
+    Returns:
+        HTML string for badge display
+
+    Example:
+        >>> get_kb_type_badge(KBType.AGENT_OS)
+        '<span style="...">🤖 Agent OS Profile</span>'
+    """
+    return _BADGE_HTML.get(kb_type, _BADGE_HTML[KBType.GENERIC])
+
+
 def get_kb_type_summary() -> Dict[str, int]:
     """
     Get summary of KB counts by type across all knowledge bases.
@@ -230,18 +222,16 @@ def get_kb_type_summary() -> Dict[str, int]:
     """
     try:
         pg_manager = get_sqlite_manager()
-        collections = pg_manager.list_collections()
 
         # Count by type
         type_counts = {kb_type.value: 0 for kb_type in KBType}
 
-        for col in collections:
-            kb_type = col["metadata"].get("kb_type", KBType.GENERIC.value)
+        for kb_type, count in pg_manager.count_collections_by_kb_type().items():
             if kb_type in type_counts:
-                type_counts[kb_type] += 1
+                type_counts[kb_type] += count
             else:
                 # Handle unknown types
-                type_counts[KBType.GENERIC.value] += 1
+                type_counts[KBType.GENERIC.value] += count
 
         return type_counts
 
@@ -0,0 +1,96 @@
+"""
+Stale-while-revalidate cache for knowledge base metadata shown in the UI.
+
+Document listings and collection stats are requested on every UI render but
+only change when documents are added or removed. Results are cached per
+collection; once an entry is older than the TTL it is still served
+immediately while a background refresh recomputes it. Writers call
+invalidate() so the next read reflects their change.
+"""
+
+import functools
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+CACHE_TTL = 30.0  # Seconds before an entry is refreshed in the background
+MAX_ENTRIES = 256
+
+# (function name, collection name, remaining arguments) -> (stored_at, value)
+_entries: "OrderedDict[Tuple[str, str, Hashable], Tuple[float, Any]]" = OrderedDict()
+# Bumped by invalidate() so refreshes started before it don't store stale data
+_generations: Dict[str, int] = {}
+_refreshing: Set[Tuple[str, str, Hashable]] = set()
+_lock = threading.RLock()
+_refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="kb-metadata-refresh")
+
+
+def _store(key: Tuple[str, str, Hashable], generation: int, value: Any) -> None:
+    with _lock:
+        if _generations.get(key[1], 0) != generation:
+            return
+        _entries[key] = (time.monotonic(), value)
+        _entries.move_to_end(key)
+        while len(_entries) > MAX_ENTRIES:
+            _entries.popitem(last=False)
+
+
+def _refresh(func: Callable, key: Tuple[str, str, Hashable], generation: int, args, kwargs) -> None:
+    try:
+        _store(key, generation, func(*args, **kwargs))
+    except Exception as e:
+        logger.warning(f"Background refresh of {key[0]} for {key[1]} failed: {e}")
+    finally:
+        with _lock:
+            _refreshing.discard(key)
+
+
+def swr_cache(func: Callable) -> Callable:
+    """
+    Cache a function whose first argument is a collection name.
+
+    Fresh entries are returned as-is; stale entries are returned immediately
+    and refreshed on a background thread; misses are computed inline.
+    """
+    @functools.wraps(func)
+    def wrapper(collection_name: str, *args, **kwargs):
+        key = (func.__name__, collection_name, (args, tuple(sorted(kwargs.items()))))
+        call_args = (collection_name, *args)
+
+        with _lock:
+            generation = _generations.get(collection_name, 0)
+            cached = _entries.get(key)
+            if cached is not None:
+                stored_at, value = cached
+                _entries.move_to_end(key)
+                if time.monotonic() - stored_at >= CACHE_TTL and key not in _refreshing:
+                    _refreshing.add(key)
+                    _refresher.submit(_refresh, func, key, generation, call_args, kwargs)
+                return value
+
+        value = func(*call_args, **kwargs)
+        _store(key, generation, value)
+        return value
+
+    return wrapper
+
+
+def invalidate(collection_name: str) -> None:
+    """Drop cached metadata for a collection after its documents change."""
+    with _lock:
+        _generations[collection_name] = _generations.get(collection_name, 0) + 1
+        for key in [k for k in _entries if k[1] == collection_name]:
+            del _entries[key]
+
+
+def clear() -> None:
+    """Drop all cached metadata."""
+    with _lock:
+        for collection_name in set(_generations) | {k[1] for k in _entries}:
+            _generations[collection_name] = _generations.get(collection_name, 0) + 1
+        _entries.clear()
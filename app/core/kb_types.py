@@ -3,11 +3,10 @@ Knowledge Base Type System for Claude OS.
 Defines KB types, metadata models, and type-specific configurations.
 """
 
+from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Dict, List, Optional
-
-from pydantic import BaseModel, Field
+from typing import Dict, List, Optional, Tuple
 
 
 class KBType(str, Enum):
@@ -23,9 +22,13 @@ class KBType(str, Enum):
     AGENT_OS = "agent-os"
 
 
-class KBMetadata(BaseModel):
+@dataclass(slots=True, frozen=True)
+class KBMetadata:
     """
-    Type-safe metadata model for Knowledge Bases.
+    Metadata for a Knowledge Base.
+
+    Plain slotted dataclass: built for every listed collection, so it skips
+    validation and per-instance __dict__ overhead.
 
     Attributes:
         kb_type: The type of knowledge base
@@ -33,13 +36,10 @@ class KBMetadata(BaseModel):
         created_at: ISO timestamp of creation
         tags: Optional list of custom tags
     """
-    kb_type: KBType = Field(default=KBType.GENERIC)
-    description: str = Field(default="")
-    created_at: str = Field(default_factory=lambda: datetime.utcnow().isoformat())
-    tags: List[str] = Field(default_factory=list)
-
-    class Config:
-        use_enum_values = True  # Serialize enums as their values
+    kb_type: KBType = KBType.GENERIC
+    description: str = ""
+    created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+    tags: List[str] = field(default_factory=list)
 
     def to_dict(self) -> Dict[str, any]:
         """
@@ -61,6 +61,7 @@ class KBMetadata(BaseModel):
         Create from dictionary retrieved from ChromaDB.
 
         Note: Deserializes comma-separated tag strings back to lists.
+        Raises ValueError for an unknown kb_type.
         """
         tags_str = data.get("tags", "")
         tags = [tag.strip() for tag in tags_str.split(",") if tag.strip()] if tags_str else []
@@ -73,7 +74,8 @@ class KBMetadata(BaseModel):
         )
 
 
-class KBTypeInfo(BaseModel):
+@dataclass(slots=True, frozen=True)
+class KBTypeInfo:
     """
     Display information for a KB type.
 
@@ -82,13 +84,13 @@ class KBTypeInfo(BaseModel):
         color: HSL color for Archon-inspired theming
         name: Human-readable name
         description: Detailed description of the type
-        use_cases: List of typical use cases
+        use_cases: Typical use cases
     """
     icon: str
     color: str
     name: str
     description: str
-    use_cases: List[str]
+    use_cases: Tuple[str, ...]
 
 
 # Type-specific display configurations
@@ -98,48 +100,48 @@ KB_TYPE_INFO: Dict[KBType, KBTypeInfo] = {
         color="hsl(0, 0%, 60%)",  # Gray
         name="Generic",
         description="General-purpose knowledge base for mixed content",
-        use_cases=[
+        use_cases=(
             "Mixed documentation and code",
             "Personal notes and references",
             "Unstructured knowledge collections"
-        ]
+        )
     ),
     KBType.CODE: KBTypeInfo(
         icon="💻",
         color="hsl(271, 91%, 65%)",  # Archon purple
         name="Code Repository",
         description="Source code and technical implementation knowledge",
-        use_cases=[
+        use_cases=(
             "Application codebases",
             "Library and framework code",
             "Code examples and snippets",
             "Technical implementation details"
-        ]
+        )
     ),
     KBType.DOCUMENTATION: KBTypeInfo(
         icon="📚",
         color="hsl(160, 84%, 39%)",  # Archon green
         name="Documentation",
         description="Technical documentation, guides, and references",
-        use_cases=[
+        use_cases=(
             "API documentation",
             "User guides and tutorials",
             "Technical specifications",
             "Architecture documentation"
-        ]
+        )
     ),
     KBType.AGENT_OS: KBTypeInfo(
         icon="🤖",
         color="hsl(330, 90%, 65%)",  # Archon pink
         name="Agent OS Profile",
         description="Spec-driven development profiles with standards, specs, and workflows",
-        use_cases=[
+        use_cases=(
             "Coding standards and conventions",
             "Product vision and roadmap",
             "Feature specifications",
             "Development workflows",
             "Agent OS 3-layer context (Standards, Product, Specs)"
-        ]
+        )
     )
 }
 
@@ -198,8 +200,13 @@ def get_kb_type_display_name(kb_type: KBType) -> str:
         >>> get_kb_type_display_name(KBType.AGENT_OS)
         '🤖 Agent OS Profile'
     """
-    info = get_kb_type_info(kb_type)
-    return f"{info.icon} {info.name}"
+    return _DISPLAY_NAMES.get(kb_type, _DISPLAY_NAMES[KBType.GENERIC])
+
+
+# Display names never change at runtime, so they are built once at import
+_DISPLAY_NAMES: Dict[KBType, str] = {
+    kb_type: f"{info.icon} {info.name}" for kb_type, info in KB_TYPE_INFO.items()
+}
 
 
 def get_all_kb_types() -> List[KBType]:
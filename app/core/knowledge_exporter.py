@@ -13,7 +13,7 @@ from pathlib import Path
 from typing import Dict, Any, List, Optional
 import structlog
 
-from app.core.sqlite_manager import get_sqlite_manager
+from app.core.sqlite_manager import decode_embedding, get_sqlite_manager
 from app.core.config import Config
 
 logger = structlog.get_logger()
@@ -304,7 +304,8 @@ class KnowledgeExporter:
         with self.db_manager.get_connection() as source_conn:
             # Get documents (using actual Claude OS schema)
             doc_query = """
-                SELECT d.id, d.doc_id, d.content, d.metadata, d.created_at, d.embedding
+                SELECT d.id, d.doc_id, d.content, d.metadata, d.created_at, d.embedding,
+                       d.embedding_scale
                 FROM documents d
                 WHERE d.kb_id = ?
             """
@@ -325,7 +326,11 @@ class KnowledgeExporter:
                     "source_file": source_file,
                     "metadata": row[3],
                     "created_at": row[4],
-                    "embedding": row[5]
+                    # Exports always carry float32 embeddings
+                    "embedding": (
+                        decode_embedding(row[5], row[6]).tobytes()
+                        if row[5] and row[6] is not None else row[5]
+                    )
                 })
 
             # Get embedding info if available
@@ -388,7 +393,7 @@ class KnowledgeExporter:
         # Try to get embedding info from a document's metadata
         try:
             cursor = conn.execute("""
-                SELECT metadata, embedding FROM documents
+                SELECT metadata, embedding, embedding_scale FROM documents
                 WHERE kb_id = ? AND embedding IS NOT NULL
                 LIMIT 1
             """, (kb_id,))
@@ -398,8 +403,7 @@ class KnowledgeExporter:
                 # Check if embedding exists and get its dimensions
                 embedding_blob = row[1]
                 if embedding_blob:
-                    import numpy as np
-                    embedding_array = np.frombuffer(embedding_blob, dtype=np.float32)
+                    embedding_array = decode_embedding(embedding_blob, row[2])
                     dimensions = len(embedding_array)
 
                     # Try to get model from metadata
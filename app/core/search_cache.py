@@ -0,0 +1,118 @@
+"""
+Semantic cache for knowledge base search results.
+
+Results are cached by query embedding and shared across every caller in the
+process, so a rephrasing of a recent question is answered without querying
+the database again. Writers call invalidate() after changing a collection's
+documents so the next search reflects their change.
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+SIMILARITY_THRESHOLD = 0.95  # Minimum cosine similarity for a cache hit
+CACHE_TTL = 300.0  # Seconds before an entry expires
+MAX_ENTRIES = 256
+
+
+class _SemanticSearchCache:
+    """
+    Caches search results by query embedding.
+
+    A lookup hits when a cached query in the same scope has cosine similarity
+    of at least `threshold` with the new query. A scope is a tuple whose first
+    element is the collection name. Entries expire after `ttl` seconds and the
+    least recently used entry is evicted beyond `max_entries`.
+    """
+
+    def __init__(
+        self,
+        threshold: float = SIMILARITY_THRESHOLD,
+        ttl: float = CACHE_TTL,
+        max_entries: int = MAX_ENTRIES
+    ):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: List[Tuple[Tuple, np.ndarray, List[Dict[str, Any]], float]] = []
+        # Bumped by invalidate() so searches started before it don't store stale results
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> Optional[np.ndarray]:
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm > 0 else None
+
+    def generation(self, collection_name: str) -> int:
+        """Return the collection's current generation, to pass back to put()."""
+        with self._lock:
+            return self._generations.get(collection_name, 0)
+
+    def get(self, scope: Tuple, embedding: List[float]) -> Optional[List[Dict[str, Any]]]:
+        """Return cached results for a similar query in this scope, if any."""
+        vec = self._normalize(embedding)
+        if vec is None:
+            return None
+
+        with self._lock:
+            now = time.monotonic()
+            self._entries = [e for e in self._entries if now - e[3] < self.ttl]
+            candidates = [e for e in self._entries if e[0] == scope and e[1].shape == vec.shape]
+            if not candidates:
+                return None
+
+            similarities = np.stack([e[1] for e in candidates]) @ vec
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                return None
+
+            entry = candidates[best]
+            self._entries.remove(entry)
+            self._entries.append(entry)
+            return list(entry[2])
+
+    def put(
+        self,
+        scope: Tuple,
+        embedding: List[float],
+        results: List[Dict[str, Any]],
+        generation: int
+    ) -> None:
+        """Cache results for a query embedding, unless the collection changed since `generation`."""
+        vec = self._normalize(embedding)
+        if vec is None:
+            return
+
+        with self._lock:
+            if self._generations.get(scope[0], 0) != generation:
+                return
+            self._entries.append((scope, vec, list(results), time.monotonic()))
+            if len(self._entries) > self.max_entries:
+                del self._entries[0]
+
+    def invalidate(self, collection_name: str) -> None:
+        """Drop cached results for a collection."""
+        with self._lock:
+            self._generations[collection_name] = self._generations.get(collection_name, 0) + 1
+            self._entries = [e for e in self._entries if e[0][0] != collection_name]
+
+    def clear(self) -> None:
+        """Drop all cached results."""
+        with self._lock:
+            for collection_name in set(self._generations) | {e[0][0] for e in self._entries}:
+                self._generations[collection_name] = self._generations.get(collection_name, 0) + 1
+            self._entries.clear()
+
+
+_cache = _SemanticSearchCache()
+
+generation = _cache.generation
+get = _cache.get
+put = _cache.put
+invalidate = _cache.invalidate
+clear = _cache.clear
@@ -7,11 +7,13 @@ import os
 import json
 import re
 import sqlite3
-from typing import List, Dict, Any, Optional, Tuple
+import threading
+from typing import List, Dict, Any, Optional, Tuple, Union
 from datetime import datetime
 from pathlib import Path
 import numpy as np
 
+from app.core import kb_metadata_cache, search_cache
 from app.core.config import Config
 from app.core.kb_types import KBType, KBMetadata
 
@@ -33,6 +35,52 @@ def generate_slug(name: str) -> str:
     return slug
 
 
+def normalize_embeddings(embeddings: Union[List[List[float]], np.ndarray]) -> np.ndarray:
+    """
+    Scale a batch of embeddings to unit length as one (N, D) float32 array.
+
+    Cosine similarity is unchanged; zero vectors are left as they are.
+    """
+    arr = np.array(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(arr, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    arr /= norms
+    return arr
+
+
+def cosine_similarities(query_embedding: List[float], matrix: np.ndarray) -> np.ndarray:
+    """Cosine similarity of a query against each row of matrix (0 where either is zero)."""
+    query_vec = np.asarray(query_embedding, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query_vec)
+    dots = matrix @ query_vec
+    return np.divide(dots, norms, out=np.zeros_like(dots), where=norms > 0)
+
+
+def quantize_embeddings(embeddings: Union[List[List[float]], np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Quantize a batch of embeddings to int8 with a per-vector scale.
+
+    Each vector is scaled so its largest absolute component maps to 127,
+    cutting storage to a quarter of float32 with negligible effect on
+    cosine similarity.
+
+    Returns:
+        Tuple of (int8 matrix, float32 scale per row)
+    """
+    arr = np.asarray(embeddings, dtype=np.float32)
+    scales = np.abs(arr).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.round(arr / scales[:, None]).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+
+def decode_embedding(blob: bytes, scale: Optional[float] = None) -> np.ndarray:
+    """Decode a stored embedding BLOB (float32, or int8 when scale is set)."""
+    if scale is None:
+        return np.frombuffer(blob, dtype=np.float32)
+    return np.frombuffer(blob, dtype=np.int8).astype(np.float32) * np.float32(scale)
+
+
 class SQLiteManager:
     """Manages SQLite database operations with vector embeddings using sqlite-vec."""
 
@@ -54,6 +102,13 @@ class SQLiteManager:
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row
         conn.execute("PRAGMA foreign_keys = ON")
+        # Safe under WAL: a crash can lose the last commit but never corrupts
+        conn.execute("PRAGMA synchronous = NORMAL")
+        # Sorts/temp indexes in memory, a 64 MiB page cache, and reads through
+        # a 256 MiB memory map instead of read() syscalls
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA cache_size = -65536")
+        conn.execute("PRAGMA mmap_size = 268435456")
         return conn
 
     def _init_schema(self):
@@ -65,13 +120,23 @@ class SQLiteManager:
 
         conn = self.get_connection()
         try:
+            # WAL persists in the database file: commits append to the log
+            # instead of rewriting pages, and readers don't block writers
+            conn.execute("PRAGMA journal_mode = WAL")
             with open(schema_path, 'r') as f:
                 schema_sql = f.read()
             conn.executescript(schema_sql)
+            self._migrate_schema(conn)
             conn.commit()
         finally:
             conn.close()
 
+    def _migrate_schema(self, conn: sqlite3.Connection):
+        """Add columns introduced after a database was first created."""
+        columns = {row['name'] for row in conn.execute("PRAGMA table_info(documents)")}
+        if 'embedding_scale' not in columns:
+            conn.execute("ALTER TABLE documents ADD COLUMN embedding_scale REAL")
+
     # Knowledge Base Operations
 
     def create_collection(
@@ -126,6 +191,8 @@ class SQLiteManager:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM knowledge_bases WHERE name = ?", (name,))
             conn.commit()
+            kb_metadata_cache.invalidate(name)
+            search_cache.invalidate(name)
             return cursor.rowcount > 0
         finally:
             conn.close()
@@ -252,17 +319,43 @@ class SQLiteManager:
         finally:
             conn.close()
 
+    def count_collections_by_kb_type(self) -> Dict[str, int]:
+        """Count knowledge bases per kb_type in a single query."""
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT kb_type, COUNT(*) AS count
+                FROM knowledge_bases
+                GROUP BY kb_type
+                """
+            )
+            return {row['kb_type']: row['count'] for row in cursor.fetchall()}
+        finally:
+            conn.close()
+
     # Document Operations
 
     def add_documents(
         self,
         kb_name: str,
         documents: List[str],
-        embeddings: List[List[float]],
+        embeddings: Union[List[List[float]], np.ndarray],
         metadatas: List[Dict[str, Any]],
-        ids: List[str]
+        ids: List[str],
+        quantize: bool = False
     ) -> None:
-        """Add documents to a knowledge base with embeddings."""
+        """
+        Add documents to a knowledge base with embeddings.
+
+        Embeddings may be a list of vectors or a 2-D float32 array. They are
+        stored L2-normalized (see normalize_embeddings), converted as one
+        array rather than vector by vector.
+
+        With quantize=True embeddings are stored as int8 plus a per-vector
+        scale instead of float32 (see quantize_embeddings).
+        """
         conn = self.get_connection()
         try:
             cursor = conn.cursor()
@@ -275,22 +368,58 @@ class SQLiteManager:
 
             kb_id = result['id']
 
-            # Add documents with embeddings
-            for doc, emb, meta, doc_id in zip(documents, embeddings, metadatas, ids):
-                meta_with_kb = {**meta, "kb_id": str(kb_id)}
+            # Convert embeddings to bytes for sqlite-vec
+            if not len(embeddings):
+                encoded = []
+            elif quantize:
+                quantized, scales = quantize_embeddings(normalize_embeddings(embeddings))
+                encoded = [(q.tobytes(), float(scale)) for q, scale in zip(quantized, scales)]
+            else:
+                encoded = [(row.tobytes(), None) for row in normalize_embeddings(embeddings)]
+
+            # Add documents with embeddings in a single executemany call
+            kb_id_str = str(kb_id)
+            rows = (
+                (kb_id, doc_id, doc, emb_bytes, scale, json.dumps({**meta, "kb_id": kb_id_str}))
+                for doc, (emb_bytes, scale), meta, doc_id in zip(documents, encoded, metadatas, ids)
+            )
+            cursor.executemany(
+                """
+                INSERT INTO documents (kb_id, doc_id, content, embedding, embedding_scale, metadata)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                rows
+            )
 
-                # Convert embedding to bytes for sqlite-vec
-                emb_bytes = np.array(emb, dtype=np.float32).tobytes()
+            conn.commit()
+            kb_metadata_cache.invalidate(kb_name)
+            search_cache.invalidate(kb_name)
+        finally:
+            conn.close()
 
-                cursor.execute(
-                    """
-                    INSERT INTO documents (kb_id, doc_id, content, embedding, metadata)
-                    VALUES (?, ?, ?, ?, ?)
-                    """,
-                    (kb_id, doc_id, doc, emb_bytes, json.dumps(meta_with_kb))
-                )
+    def delete_documents_by_source_path(self, kb_name: str, source_path: str) -> int:
+        """Delete the chunks of one source file from a knowledge base. Returns the number deleted."""
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id FROM knowledge_bases WHERE name = ?", (kb_name,))
+            result = cursor.fetchone()
+            if not result:
+                raise ValueError(f"Knowledge base '{kb_name}' not found")
 
+            cursor.execute(
+                """
+                DELETE FROM documents
+                WHERE kb_id = ? AND json_extract(metadata, '$.source_path') = ?
+                """,
+                (result['id'], source_path)
+            )
+            deleted = cursor.rowcount
             conn.commit()
+            if deleted:
+                kb_metadata_cache.invalidate(kb_name)
+                search_cache.invalidate(kb_name)
+            return deleted
         finally:
             conn.close()
 
@@ -370,7 +499,7 @@ class SQLiteManager:
             # Get all embeddings and compute cosine similarity in Python
             cursor.execute(
                 """
-                SELECT doc_id, content, embedding, metadata
+                SELECT doc_id, content, embedding, embedding_scale, metadata
                 FROM documents
                 WHERE kb_id = ?
                 """,
@@ -382,28 +511,15 @@ class SQLiteManager:
             if not rows:
                 return {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
 
-            # Convert embeddings and compute similarities
-            query_vec = np.array(query_embedding, dtype=np.float32)
-            similarities = []
-
-            for row in rows:
-                if row['embedding'] is None:
-                    continue
-
-                # Convert bytes back to array
-                emb = np.frombuffer(row['embedding'], dtype=np.float32)
-
-                # Cosine similarity
-                dot_product = np.dot(query_vec, emb)
-                norm_query = np.linalg.norm(query_vec)
-                norm_emb = np.linalg.norm(emb)
-
-                if norm_query > 0 and norm_emb > 0:
-                    similarity = dot_product / (norm_query * norm_emb)
-                else:
-                    similarity = 0
-
-                similarities.append((row['doc_id'], row['content'], row['metadata'], similarity))
+            # Convert embeddings and compute all similarities in one product
+            rows = [row for row in rows if row['embedding'] is not None]
+            if not rows:
+                return {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
+            matrix = np.stack([decode_embedding(row['embedding'], row['embedding_scale']) for row in rows])
+            similarities = [
+                (row['doc_id'], row['content'], row['metadata'], float(similarity))
+                for row, similarity in zip(rows, cosine_similarities(query_embedding, matrix))
+            ]
 
             # Sort by similarity (descending) and take top n
             similarities.sort(key=lambda x: x[3], reverse=True)
@@ -476,6 +592,76 @@ class SQLiteManager:
         finally:
             conn.close()
 
+    def list_documents(
+        self,
+        kb_name: str,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        """
+        List the files in a knowledge base, newest upload first.
+
+        Chunks are grouped by filename in SQL, so one row per file is read
+        regardless of how many chunks it has. limit=None returns every file.
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT json_extract(d.metadata, '$.filename') AS filename,
+                       MIN(json_extract(d.metadata, '$.file_type')) AS file_type,
+                       MAX(json_extract(d.metadata, '$.upload_date')) AS upload_date,
+                       COUNT(*) AS chunk_count
+                FROM documents d
+                JOIN knowledge_bases kb ON kb.id = d.kb_id
+                WHERE kb.name = ?
+                GROUP BY json_extract(d.metadata, '$.filename')
+                ORDER BY upload_date DESC
+                LIMIT ? OFFSET ?
+                """,
+                (kb_name, -1 if limit is None else limit, offset)
+            )
+
+            return [
+                {
+                    "filename": row['filename'] if row['filename'] is not None else "unknown",
+                    "file_type": row['file_type'] or "",
+                    "upload_date": row['upload_date'] or "",
+                    "chunk_count": row['chunk_count']
+                }
+                for row in cursor.fetchall()
+            ]
+        finally:
+            conn.close()
+
+    def get_document_stats(self, kb_name: str) -> Dict[str, Any]:
+        """Get chunk count, distinct filename count, and latest upload date for a knowledge base."""
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            # Expressions match idx_doc_filename / idx_doc_upload_date so the
+            # aggregates are answered from the indexes
+            cursor.execute(
+                """
+                SELECT COUNT(*) AS chunks,
+                       COUNT(DISTINCT json_extract(d.metadata, '$.filename')) AS docs,
+                       MAX(json_extract(d.metadata, '$.upload_date')) AS last_updated
+                FROM documents d
+                JOIN knowledge_bases kb ON kb.id = d.kb_id
+                WHERE kb.name = ?
+                """,
+                (kb_name,)
+            )
+            row = cursor.fetchone()
+            return {
+                "total_documents": row['docs'],
+                "total_chunks": row['chunks'],
+                "last_updated": row['last_updated'] or None
+            }
+        finally:
+            conn.close()
+
     def query_similar(
         self,
         kb_id: int,
@@ -490,7 +676,7 @@ class SQLiteManager:
             # Get all embeddings for this KB
             cursor.execute(
                 """
-                SELECT doc_id, content, metadata, embedding
+                SELECT doc_id, content, metadata, embedding, embedding_scale
                 FROM documents
                 WHERE kb_id = ?
                 """,
@@ -502,26 +688,14 @@ class SQLiteManager:
             if not rows:
                 return []
 
-            # Compute similarities
-            query_vec = np.array(query_embedding, dtype=np.float32)
-            results = []
-
-            for row in rows:
-                if row['embedding'] is None:
-                    continue
-
-                emb = np.frombuffer(row['embedding'], dtype=np.float32)
-
-                # Cosine similarity
-                dot_product = np.dot(query_vec, emb)
-                norm_query = np.linalg.norm(query_vec)
-                norm_emb = np.linalg.norm(emb)
-
-                if norm_query > 0 and norm_emb > 0:
-                    similarity = dot_product / (norm_query * norm_emb)
-                else:
-                    similarity = 0
+            # Compute all similarities in one product
+            rows = [row for row in rows if row['embedding'] is not None]
+            if not rows:
+                return []
+            matrix = np.stack([decode_embedding(row['embedding'], row['embedding_scale']) for row in rows])
 
+            results = []
+            for row, similarity in zip(rows, cosine_similarities(query_embedding, matrix)):
                 metadata = json.loads(row['metadata']) if row['metadata'] else {}
                 results.append({
                     "doc_id": row['doc_id'],
@@ -765,6 +939,134 @@ class SQLiteManager:
         finally:
             conn.close()
 
+    def get_hook_synced_files(self, project_id: int, mcp_type: str) -> Dict[str, Dict[str, Any]]:
+        """Get the synced-file fingerprints for a project hook, keyed by relative path."""
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT path, algo, hash, mtime_ns, size
+                FROM hook_synced_files
+                WHERE project_id = ? AND mcp_type = ?
+                """,
+                (project_id, mcp_type)
+            )
+
+            synced = {}
+            for row in cursor.fetchall():
+                entry = {"algo": row['algo'], "hash": row['hash']}
+                if row['mtime_ns'] is not None:
+                    entry["mtime_ns"] = row['mtime_ns']
+                    entry["size"] = row['size']
+                synced[row['path']] = entry
+            return synced
+        finally:
+            conn.close()
+
+    def save_hook_synced_files(self, project_id: int, mcp_type: str, entries: Dict[str, Dict[str, Any]]):
+        """Insert or update synced-file fingerprints for a project hook in one transaction."""
+        if not entries:
+            return
+
+        conn = self.get_connection()
+        try:
+            conn.executemany(
+                """
+                INSERT INTO hook_synced_files (project_id, mcp_type, path, algo, hash, mtime_ns, size)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(project_id, mcp_type, path) DO UPDATE SET
+                algo = excluded.algo,
+                hash = excluded.hash,
+                mtime_ns = excluded.mtime_ns,
+                size = excluded.size
+                """,
+                [
+                    (
+                        project_id, mcp_type, path,
+                        entry.get("algo", "sha256"), entry["hash"],
+                        entry.get("mtime_ns"), entry.get("size"),
+                    )
+                    for path, entry in entries.items()
+                ]
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def clear_hook_synced_files(self, project_id: int, mcp_type: str):
+        """Forget all synced-file fingerprints for a project hook."""
+        conn = self.get_connection()
+        try:
+            conn.execute(
+                "DELETE FROM hook_synced_files WHERE project_id = ? AND mcp_type = ?",
+                (project_id, mcp_type)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_ingested_files(self, kb_name: str) -> Dict[str, Dict[str, Any]]:
+        """Get the fingerprints of files ingested into a knowledge base, keyed by path."""
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT f.path, f.hash, f.mtime_ns, f.size
+                FROM ingested_files f
+                JOIN knowledge_bases kb ON kb.id = f.kb_id
+                WHERE kb.name = ?
+                """,
+                (kb_name,)
+            )
+
+            ingested = {}
+            for row in cursor.fetchall():
+                entry = {"hash": row['hash']}
+                if row['mtime_ns'] is not None:
+                    entry["mtime_ns"] = row['mtime_ns']
+                    entry["size"] = row['size']
+                ingested[row['path']] = entry
+            return ingested
+        finally:
+            conn.close()
+
+    def save_ingested_files(self, kb_name: str, entries: Dict[str, Dict[str, Any]]):
+        """Insert or update ingested-file fingerprints for a knowledge base in one transaction."""
+        if not entries:
+            return
+
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id FROM knowledge_bases WHERE name = ?", (kb_name,))
+            result = cursor.fetchone()
+            if not result:
+                raise ValueError(f"Knowledge base '{kb_name}' not found")
+
+            cursor.executemany(
+                """
+                INSERT INTO ingested_files (kb_id, path, filename, hash, mtime_ns, size)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(kb_id, path) DO UPDATE SET
+                filename = excluded.filename,
+                hash = excluded.hash,
+                mtime_ns = excluded.mtime_ns,
+                size = excluded.size
+                """,
+                [
+                    (
+                        result['id'], path, os.path.basename(path), entry["hash"],
+                        entry.get("mtime_ns"), entry.get("size"),
+                    )
+                    for path, entry in entries.items()
+                ]
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
     def close(self):
         """Close database connections (no-op for SQLite)."""
         pass
@@ -772,11 +1074,14 @@ class SQLiteManager:
 
 # Singleton instance
 _sqlite_manager = None
+_sqlite_manager_lock = threading.Lock()
 
 
 def get_sqlite_manager(db_path: Optional[str] = None) -> SQLiteManager:
-    """Get or create the SQLiteManager singleton."""
+    """Get or create the SQLiteManager singleton (thread-safe)."""
     global _sqlite_manager
     if _sqlite_manager is None:
-        _sqlite_manager = SQLiteManager(db_path)
+        with _sqlite_manager_lock:
+            if _sqlite_manager is None:
+                _sqlite_manager = SQLiteManager(db_path)
     return _sqlite_manager
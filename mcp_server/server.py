@@ -5,6 +5,7 @@ Exposes RAG functionality via Model Context Protocol with HTTP transport.
 
 import logging
 import os
+import shutil
 import sys
 from pathlib import Path
 from typing import Any, Dict, List
@@ -15,6 +16,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from fastapi import FastAPI, Request, UploadFile, File, HTTPException, Depends, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 import uvicorn
 import requests
@@ -25,6 +27,7 @@ from slowapi.errors import RateLimitExceeded
 
 from app.core.sqlite_manager import get_sqlite_manager
 from app.core.config import Config
+from app.core import kb_metadata_cache, search_cache
 from app.core.kb_metadata import get_collection_stats, get_documents_metadata
 from app.core.kb_types import KBType
 from app.core.rag_engine import RAGEngine
@@ -359,10 +362,10 @@ async def get_kb_stats(kb_name: str) -> dict:
         return {"error": str(e), "total_documents": 0, "total_chunks": 0, "last_updated": None}
 
 
-async def list_documents(kb_name: str) -> List[dict]:
-    """List all documents in a knowledge base."""
+async def list_documents(kb_name: str, limit: Optional[int] = None, offset: int = 0) -> List[dict]:
+    """List documents in a knowledge base, newest first (all of them unless limit is set)."""
     try:
-        docs = get_documents_metadata(kb_name)
+        docs = get_documents_metadata(kb_name, limit=limit, offset=offset)
         logger.info(f"Listed {len(docs)} documents in {kb_name}")
         return docs
     except Exception as e:
@@ -608,9 +611,9 @@ async def api_get_kb_stats(kb_name: str):
 
 
 @app.get("/api/kb/{kb_name}/documents")
-async def api_list_documents(kb_name: str):
-    """REST API: List documents in a knowledge base."""
-    docs = await list_documents(kb_name)
+async def api_list_documents(kb_name: str, limit: Optional[int] = None, offset: int = 0):
+    """REST API: List documents in a knowledge base (paginated with limit/offset)."""
+    docs = await list_documents(kb_name, limit=limit, offset=offset)
     return {"documents": docs}
 
 
@@ -630,6 +633,37 @@ async def api_chat(request: Request, kb_name: str, chat_request: ChatRequest):
     return result
 
 
+def _stage_upload(upload: UploadFile, dst) -> None:
+    """
+    Copy an uploaded file into dst (an open binary file).
+
+    Uploads larger than the spool threshold are already on disk; those are
+    copied with os.sendfile so the bytes stay in the kernel. Small in-memory
+    uploads are copied in chunks.
+    """
+    src = upload.file
+    src.seek(0)
+    # Same check Starlette's UploadFile uses to decide if the spool is on disk
+    if getattr(src, "_rolled", True) and hasattr(os, "sendfile"):
+        try:
+            src_fd = src.fileno()
+            size = os.fstat(src_fd).st_size
+            dst.flush()
+            offset = 0
+            while offset < size:
+                sent = os.sendfile(dst.fileno(), src_fd, offset, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+            return
+        except OSError:
+            # e.g. filesystems without sendfile support; fall back below
+            src.seek(0)
+            dst.seek(0)
+            dst.truncate()
+    shutil.copyfileobj(src, dst)
+
+
 @app.post("/api/kb/{kb_name}/upload")
 async def api_upload_document(kb_name: str, file: UploadFile = File(...)):
     """REST API: Upload a single document to a knowledge base."""
@@ -645,8 +679,7 @@ async def api_upload_document(kb_name: str, file: UploadFile = File(...)):
     # Save uploaded file to temp location
     try:
         with tempfile.NamedTemporaryFile(delete=False, suffix=Path(file.filename).suffix) as tmp_file:
-            content = await file.read()
-            tmp_file.write(content)
+            await run_in_threadpool(_stage_upload, file, tmp_file)
             tmp_path = tmp_file.name
 
         # Ingest the file
@@ -739,7 +772,14 @@ async def api_delete_document(kb_name: str, filename: str):
                 (collection_id, filename)
             )
             deleted_count = len(cursor.fetchall())
+            # Forget the file so a later directory import ingests it again
+            cursor.execute(
+                "DELETE FROM ingested_files WHERE kb_id = ? AND filename = ?",
+                (collection_id, filename)
+            )
             conn.commit()
+            kb_metadata_cache.invalidate(kb_name)
+            search_cache.invalidate(kb_name)
 
             if deleted_count == 0:
                 raise HTTPException(status_code=404, detail=f"No documents found with filename '{filename}'")
@@ -22,6 +22,42 @@ os.environ.setdefault("REDIS_HOST", "localhost")
 os.environ.setdefault("REDIS_PORT", "6379")
 
 
+@pytest.fixture(autouse=True)
+def reset_config_env_cache():
+    """Drop cached Config env reads so tests patching os.environ see their values."""
+    from app.core.config import Config
+
+    Config.invalidate_cache()
+    yield
+    Config.invalidate_cache()
+
+
+@pytest.fixture(autouse=True)
+def reset_kb_metadata_cache():
+    """Drop cached KB metadata so each test reads from its own (mocked) database."""
+    from app.core import kb_metadata_cache
+
+    kb_metadata_cache.clear()
+    yield
+    kb_metadata_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_search_caches():
+    """Drop cached query embeddings and search results shared across tests."""
+    from app.core import search_cache
+    from app.core.agent_os_ingestion import _embed_query, _query_embed_model
+
+    def clear():
+        search_cache.clear()
+        _embed_query.cache_clear()
+        _query_embed_model.cache_clear()
+
+    clear()
+    yield
+    clear()
+
+
 @pytest.fixture(scope="session")
 def test_db_config() -> Dict[str, str]:
     """Database configuration for tests."""
@@ -2,6 +2,7 @@
 Tests for Agent OS parser and ingestion functionality.
 """
 
+import json
 import pytest
 import tempfile
 import yaml
@@ -10,10 +11,16 @@ from unittest.mock import patch, MagicMock
 
 from app.core.agent_os_parser import AgentOSParser, AgentOSDocument, AgentOSContentType
 from app.core.agent_os_ingestion import AgentOSIngestion
+from app.core.http_clients import get_ollama_session
 from app.core.sqlite_manager import SQLiteManager
 from app.core.kb_types import KBType
 
 
+def _json_body(payload):
+    """Encode payload as a mocked HTTP response body."""
+    return json.dumps(payload).encode()
+
+
 @pytest.mark.unit
 class TestAgentOSDocument:
     """Test AgentOSDocument dataclass."""
@@ -154,6 +161,7 @@ rules:
         assert doc is not None
         assert doc.content_type == AgentOSContentType.STANDARD
         assert doc.title == "Test Standard"
+        assert doc.file_stem == "test"
         assert "A test coding standard" in doc.content
         assert doc.metadata["version"] == 1.0  # YAML parses 1.0 as float
         assert doc.metadata["category"] == "coding"
@@ -277,6 +285,23 @@ Important notes about the workflow.
         assert "Nested" in titles
         assert "Root" in titles
 
+    def test_find_supported_files_follows_file_symlinks(self, tmp_path):
+        """Test symlinked files are found but symlinked directories are skipped."""
+        parser = AgentOSParser()
+
+        shared = tmp_path / "shared"
+        shared.mkdir()
+        (shared / "linked.yml").write_text("name: Linked")
+
+        content_dir = tmp_path / "standards"
+        content_dir.mkdir()
+        (content_dir / "linked.yml").symlink_to(shared / "linked.yml")
+        (content_dir / "loop").symlink_to(content_dir, target_is_directory=True)
+
+        files = parser._find_supported_files(content_dir)
+
+        assert files == [content_dir / "linked.yml"]
+
 
 @pytest.mark.integration
 class TestAgentOSIngestion:
@@ -319,6 +344,73 @@ class TestAgentOSIngestion:
         assert result["documents_by_type"]["standard"] == 1
         assert result["documents_by_type"]["agent"] == 1
 
+    @patch('app.core.agent_os_ingestion.OllamaEmbedding')
+    def test_ingest_profile_uses_batch_embed_endpoint(self, mock_embed, clean_db, tmp_path):
+        """Test that a batch is embedded with a single /api/embed request."""
+        ingestion = AgentOSIngestion(clean_db)
+        mock_post = MagicMock()
+        mock_post.side_effect = lambda url, json, timeout: MagicMock(
+            content=_json_body({"embeddings": [[0.1] * 768 for _ in json["input"]]})
+        )
+
+        kb_data = clean_db.create_collection(
+            name="test_kb",
+            kb_type=KBType.GENERIC,
+            description="Test knowledge base"
+        )
+
+        profile_dir = tmp_path / "test_profile"
+        profile_dir.mkdir()
+        (profile_dir / "standards").mkdir()
+        for i in range(3):
+            (profile_dir / "standards" / f"standard_{i}.yml").write_text(f"name: Standard {i}")
+
+        with patch.object(get_ollama_session(), "post", mock_post):
+            result = ingestion.ingest_profile(kb_data["name"], str(profile_dir))
+
+        assert result["success"] is True
+        assert mock_post.call_count == 1
+        assert mock_post.call_args.args[0].endswith("/api/embed")
+        assert len(mock_post.call_args.kwargs["json"]["input"]) == 3
+        mock_embed.return_value.get_text_embedding.assert_not_called()
+        assert clean_db.get_collection_count(kb_data["name"]) == 3
+
+    @patch('app.core.agent_os_ingestion.OllamaEmbedding')
+    def test_embed_texts_splits_batch_on_server_error(self, mock_embed, clean_db):
+        """Test that an overloaded /api/embed batch is retried in halves."""
+        import requests
+
+        ingestion = AgentOSIngestion(clean_db)
+        batch_sizes = []
+
+        def fake_post(url, json, timeout):
+            batch_sizes.append(len(json["input"]))
+            response = MagicMock()
+            if len(json["input"]) > 4:
+                error_response = MagicMock(status_code=500)
+                response.raise_for_status.side_effect = requests.exceptions.HTTPError(response=error_response)
+            else:
+                response.content = _json_body({"embeddings": [[0.1] * 768 for _ in json["input"]]})
+            return response
+
+        with patch.object(get_ollama_session(), "post", fake_post):
+            embeddings = ingestion._embed_texts([f"text {i}" for i in range(16)])
+
+        assert len(embeddings) == 16
+        assert batch_sizes == [16, 8, 4, 4, 8, 4, 4]
+        mock_embed.return_value.get_text_embedding.assert_not_called()
+
+    @patch('app.core.agent_os_ingestion.OllamaEmbedding')
+    def test_embed_model_reused_across_batches(self, mock_embed, clean_db):
+        """Test that the embedding client is constructed once and reused."""
+        ingestion = AgentOSIngestion(clean_db)
+
+        first = ingestion._get_embed_model()
+        second = ingestion._get_embed_model()
+
+        assert first is second
+        mock_embed.assert_called_once()
+
     def test_ingest_profile_nonexistent_kb(self, clean_db, tmp_path):
         """Test ingesting profile to non-existent KB."""
         ingestion = AgentOSIngestion(clean_db)
@@ -436,6 +528,40 @@ class TestAgentOSIngestion:
         assert result["total_documents"] == 4
         assert "errors" in result
 
+    @patch('app.core.agent_os_ingestion.OllamaEmbedding')
+    def test_ingest_batch_with_write_failure(self, mock_embed, clean_db, tmp_path):
+        """Test that a failed database write is reported for its batch."""
+        mock_embed.return_value.get_text_embedding.return_value = [0.1] * 768
+
+        kb_data = clean_db.create_collection(
+            name="test_kb",
+            kb_type=KBType.GENERIC,
+            description="Test knowledge base"
+        )
+
+        profile_dir = tmp_path / "test_profile"
+        profile_dir.mkdir()
+        (profile_dir / "standards").mkdir()
+        for i in range(4):
+            (profile_dir / "standards" / f"standard_{i}.yml").write_text(f"name: Standard {i}")
+
+        ingestion = AgentOSIngestion(clean_db)
+        original_add = clean_db.add_documents
+        calls = []
+
+        def failing_add(**kwargs):
+            calls.append(kwargs)
+            if len(calls) == 2:
+                raise Exception("disk full")
+            return original_add(**kwargs)
+
+        with patch.object(clean_db, "add_documents", side_effect=failing_add):
+            result = ingestion.ingest_profile(kb_data["name"], str(profile_dir), batch_size=2)
+
+        assert result["success"] is False
+        assert result["errors"] == ["Failed to ingest batch 2: disk full"]
+        assert clean_db.get_collection_count(kb_data["name"]) == 2
+
     @patch('app.core.agent_os_ingestion.OllamaEmbedding')
     def test_get_profile_stats(self, mock_embed, clean_db, tmp_path):
         """Test getting profile statistics."""
@@ -569,6 +695,68 @@ class TestAgentOSIngestion:
         # Should find results with query
         assert len(results) >= 1
 
+    @patch('app.core.agent_os_ingestion.OllamaEmbedding')
+    def test_search_by_type_caches_query_results(self, mock_embed, clean_db):
+        """Test that repeated queries reuse the query embedding and results."""
+        mock_embed.return_value.get_text_embedding.side_effect = (
+            lambda text: [1.0] + [0.0] * 767 if text.startswith("Python") else [0.0, 1.0] + [0.0] * 766
+        )
+
+        kb_data = clean_db.create_collection(
+            name="test_kb",
+            kb_type=KBType.GENERIC,
+            description="Test knowledge base"
+        )
+        ingestion = AgentOSIngestion(clean_db)
+
+        with patch.object(clean_db, "query_documents", wraps=clean_db.query_documents) as mock_query:
+            first = ingestion.search_by_type(kb_data["name"], AgentOSContentType.STANDARD, query="Python")
+            second = ingestion.search_by_type(kb_data["name"], AgentOSContentType.STANDARD, query="Python")
+            ingestion.search_by_type(kb_data["name"], AgentOSContentType.STANDARD, query="Python style")
+            ingestion.search_by_type(kb_data["name"], AgentOSContentType.STANDARD, query="Ruby")
+
+        assert first == second
+        # "Python style" embeds to the same vector, so only "Ruby" misses the cache
+        assert mock_query.call_count == 2
+        assert mock_embed.return_value.get_text_embedding.call_count == 3
+
+    @patch('app.core.agent_os_ingestion.OllamaEmbedding')
+    def test_search_cache_shared_across_instances(self, mock_embed, clean_db):
+        """Test that cached results are shared and dropped when any writer stores."""
+        mock_embed.return_value.get_text_embedding.return_value = [1.0] + [0.0] * 767
+
+        kb_data = clean_db.create_collection(
+            name="test_kb",
+            kb_type=KBType.GENERIC,
+            description="Test knowledge base"
+        )
+
+        with patch.object(clean_db, "query_documents", wraps=clean_db.query_documents) as mock_query:
+            first = AgentOSIngestion(clean_db).search_by_type(
+                kb_data["name"], AgentOSContentType.STANDARD, query="Python"
+            )
+            AgentOSIngestion(clean_db).search_by_type(
+                kb_data["name"], AgentOSContentType.STANDARD, query="Python"
+            )
+            assert mock_query.call_count == 1
+
+            # A write from outside AgentOSIngestion invalidates the cached results
+            clean_db.add_documents(
+                kb_name=kb_data["name"],
+                documents=["Python standard"],
+                embeddings=[[1.0] + [0.0] * 767],
+                metadatas=[{"source": "agent_os", "content_type": "standard"}],
+                ids=["standard_python_0"]
+            )
+            after_write = AgentOSIngestion(clean_db).search_by_type(
+                kb_data["name"], AgentOSContentType.STANDARD, query="Python"
+            )
+
+        assert mock_query.call_count == 2
+        assert after_write != first
+        assert after_write[0]["content"] == ["Python standard"]
+        assert mock_embed.return_value.get_text_embedding.call_count == 1
+
     def test_search_by_type_nonexistent_kb(self, clean_db):
         """Test searching by type in non-existent KB."""
         ingestion = AgentOSIngestion(clean_db)
@@ -6,7 +6,7 @@ import pytest
 import os
 from unittest.mock import patch, MagicMock
 
-from app.core.config import Config
+from app.core.config import Config, _load_dotenv_once, _scale_by_memory
 
 
 @pytest.mark.unit
@@ -67,6 +67,18 @@ class TestConfig:
         # Should include document file types
         assert ".pdf" in file_types
 
+    @pytest.mark.parametrize("filename,expected", [
+        ("notes.md", True),
+        ("README.MD", True),
+        ("src/app/Component.tsx", True),
+        ("archive.tar.gz", False),
+        ("Makefile", False),
+        ("markdown", False),
+    ])
+    def test_is_supported_file(self, filename, expected):
+        """Test that supported files are matched case-insensitively by suffix."""
+        assert Config.is_supported_file(filename) is expected
+
     def test_config_chunking_parameters(self):
         """Test chunking configuration parameters."""
         assert Config.CHUNK_SIZE > 0
@@ -111,6 +123,16 @@ class TestConfig:
         assert db_path is not None
         assert db_path.endswith('.db')
 
+    @patch.dict(os.environ, {'SQLITE_DB_PATH': ''})
+    def test_get_db_path_creates_default_dir_once(self):
+        """Test that the default database directory is only created on first use."""
+        with patch('app.core.config._db_dir_ensured', False), \
+                patch('app.core.config.os.makedirs') as mock_makedirs:
+            Config.get_db_path()
+            Config.get_db_path()
+
+        mock_makedirs.assert_called_once()
+
     def test_get_ollama_host(self):
         """Test getting Ollama host."""
         host = Config.get_ollama_host()
@@ -317,6 +339,62 @@ class TestConfig:
         assert isinstance(Config.RERANK_TOP_K, int)
 
 
+    @pytest.mark.parametrize("memory_gb,expected", [
+        (48.0, 1024),
+        (24.0, 512),
+        (8.0, 256),
+        (None, 512),
+    ])
+    def test_scale_by_memory(self, memory_gb, expected):
+        """Test that RAG defaults scale with total memory (medium tier when unknown)."""
+        with patch("app.core.config._TOTAL_MEMORY_GB", memory_gb):
+            assert _scale_by_memory(1024, 512, 256) == expected
+
+    def test_get_ollama_host_cached_until_invalidated(self):
+        """Test that env reads are cached until invalidate_cache is called."""
+        with patch.dict(os.environ, {'OLLAMA_HOST': 'http://first:11434'}):
+            assert Config.get_ollama_host() == 'http://first:11434'
+
+            os.environ['OLLAMA_HOST'] = 'http://second:11434'
+            assert Config.get_ollama_host() == 'http://first:11434'
+
+            Config.invalidate_cache()
+            assert Config.get_ollama_host() == 'http://second:11434'
+
+    def test_validate_config_cached_until_revalidate(self):
+        """Test that a passing validation is not repeated until revalidate()."""
+        from app.core import config as config_module
+
+        with patch('app.core.config._config_validated', False), \
+                patch('app.core.config._cached_env', wraps=config_module._cached_env) as mock_env:
+            Config.validate_config()
+            Config.validate_config()
+            assert mock_env.call_count == 1
+
+            Config.revalidate()
+            assert mock_env.call_count == 2
+
+    def test_load_dotenv_once(self):
+        """Test that .env is parsed only once and DOTENV_PATH is honoured."""
+        with patch.dict(os.environ, {'DOTENV_PATH': '/tmp/custom.env'}), \
+                patch('dotenv.load_dotenv') as mock_load:
+            os.environ.pop('_CLAUDE_OS_DOTENV_LOADED', None)
+
+            _load_dotenv_once()
+            _load_dotenv_once()
+
+            mock_load.assert_called_once_with('/tmp/custom.env')
+
+    def test_load_dotenv_skipped(self):
+        """Test that CLAUDE_OS_SKIP_DOTENV bypasses .env loading."""
+        with patch.dict(os.environ, {'CLAUDE_OS_SKIP_DOTENV': '1'}), \
+                patch('dotenv.load_dotenv') as mock_load:
+            os.environ.pop('_CLAUDE_OS_DOTENV_LOADED', None)
+
+            _load_dotenv_once()
+
+            mock_load.assert_not_called()
+
 @pytest.mark.integration
 class TestConfigIntegration:
     """Integration tests for configuration management."""
@@ -162,6 +162,17 @@ class TestConversationWatcher:
         assert "gotcha with async/await" in detection["text"]
         assert detection["confidence"] == 0.80
 
+    def test_detect_triggers_edge_case_long_run(self):
+        """Test that a long unterminated word run after an edge-case keyword is skipped."""
+        watcher = ConversationWatcher(123, "/tmp")
+
+        text = "Beware " + "word " * 3000 + "! Retries double-count, so cap them."
+        detections = watcher.detect_triggers(text)
+
+        edge_detections = [d for d in detections if d["trigger"] == "edge_case"]
+        assert len(edge_detections) == 1
+        assert edge_detections[0]["groups"] == ("count",)
+
     def test_detect_multiple_triggers(self):
         """Test detecting multiple triggers in one text."""
         watcher = ConversationWatcher(123, "/tmp")
@@ -182,6 +193,18 @@ class TestConversationWatcher:
         assert "no_longer" in trigger_types
         assert "bug_fixed" in trigger_types
 
+    def test_detect_overlapping_triggers(self):
+        """Test that matches of different triggers over the same text are all reported."""
+        watcher = ConversationWatcher(123, "/tmp")
+
+        detections = watcher.detect_triggers("We should avoid Redis because the queue is slow.")
+        trigger_types = {d["trigger"] for d in detections}
+        assert trigger_types == {"performance_issue", "rejected_idea"}
+
+        detections = watcher.detect_triggers("Beware the edge case where the cache is slow.")
+        trigger_types = {d["trigger"] for d in detections}
+        assert {"edge_case", "performance_issue"} <= trigger_types
+
     def test_detect_no_triggers(self):
         """Test text with no triggers."""
         watcher = ConversationWatcher(123, "/tmp")
@@ -237,9 +260,20 @@ class TestConversationWatcher:
 
         # Should be different due to timestamp
         assert id1 != id2
-        assert len(id1) == 8  # MD5 hash truncated to 8 chars
+        assert len(id1) == 8  # 4-byte hash as 8 hex chars
         assert len(id2) == 8
 
+    def test_detections_share_timestamp_with_unique_ids(self):
+        """Test that one scan stamps every detection alike but keeps IDs distinct."""
+        watcher = ConversationWatcher(123, "/tmp")
+
+        text = "We decided to use Redis. Later we decided to use Redis."
+        detections = watcher.detect_triggers(text)
+
+        assert len(detections) == 2
+        assert detections[0]["timestamp"] == detections[1]["timestamp"]
+        assert detections[0]["id"] != detections[1]["id"]
+
     def test_save_insight(self, tmp_path):
         """Test saving insights to file."""
         with tempfile.TemporaryDirectory() as temp_dir:
@@ -346,7 +380,7 @@ class TestConversationWatcher:
 
             insights = watcher.get_learned_insights()
 
-            assert insights == []
+            assert insights == {"count": 0, "content": ""}
 
     def test_get_learned_insights_with_file(self, tmp_path):
         """Test getting insights when file exists."""
@@ -378,6 +412,25 @@ class TestConversationWatcher:
             assert "switching" in insights["content"]
             assert "decided_to_use" in insights["content"]
 
+    def test_get_learned_insights_empty_file(self, tmp_path):
+        """Test getting insights from an empty insights file."""
+        watcher = ConversationWatcher(123, str(tmp_path))
+        watcher.insights_dir.mkdir(parents=True)
+        (watcher.insights_dir / "LEARNED_INSIGHTS.md").write_text("")
+
+        assert watcher.get_learned_insights() == {"count": 0, "content": ""}
+
+    def test_get_learned_insights_preview_truncated(self, tmp_path):
+        """Test that only the first 500 characters are returned but all entries counted."""
+        watcher = ConversationWatcher(123, str(tmp_path))
+        watcher.insights_dir.mkdir(parents=True)
+        (watcher.insights_dir / "LEARNED_INSIGHTS.md").write_text("### é entry\n" * 200)
+
+        insights = watcher.get_learned_insights()
+
+        assert insights["count"] == 200
+        assert insights["content"] == ("### é entry\n" * 200)[:500]
+
     def test_should_prompt_user(self):
         """Test user prompt decision logic."""
         watcher = ConversationWatcher(123, "/tmp")
@@ -484,6 +537,15 @@ using jQuery because it was too slow."""
             assert trigger_config["confidence"] <= 1.0
             assert isinstance(trigger_config["description"], str)
 
+    def test_every_trigger_has_an_anchor(self):
+        """Test that the keyword prefilter cannot hide any trigger."""
+        watcher = ConversationWatcher(123, "/tmp")
+
+        assert set(watcher._ANCHORS) == set(watcher.TRIGGERS)
+        for trigger_name, trigger_config in watcher.TRIGGERS.items():
+            anchors = watcher._ANCHORS[trigger_name]
+            assert all(anchor in trigger_config["pattern"] for anchor in anchors), trigger_name
+
     def test_context_extraction_edge_cases(self):
         """Test context extraction edge cases."""
         watcher = ConversationWatcher(123, "/tmp")
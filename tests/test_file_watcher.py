@@ -0,0 +1,381 @@
+"""
+Tests for file_watcher.py - debounced syncs and shared watches.
+"""
+
+import threading
+import time
+import pytest
+from unittest.mock import patch, MagicMock
+
+from app.core.file_watcher import (
+    DebounceScheduler,
+    GlobalFileWatcher,
+    ProjectFileHandler,
+    ProjectWatcher,
+    SharedObserver,
+)
+
+# Long enough for the scheduler and its workers to run anything that is due
+_SETTLE = 0.3
+
+
+@pytest.mark.unit
+class TestDebounceScheduler:
+    """Test DebounceScheduler."""
+
+    def test_schedule_coalesces_rapid_calls(self):
+        """Test that rapid schedules for one key run only the last callback, once."""
+        scheduler = DebounceScheduler()
+        calls = []
+
+        for i in range(5):
+            scheduler.schedule("key", 0.05, lambda i=i: calls.append(i))
+        time.sleep(_SETTLE)
+
+        assert calls == [4]
+
+    def test_reschedule_pushes_back_deadline(self):
+        """Test that re-scheduling a pending key moves its deadline."""
+        scheduler = DebounceScheduler()
+        ran = threading.Event()
+
+        scheduler.schedule("key", 0.1, ran.set)
+        time.sleep(0.06)
+        scheduler.schedule("key", 0.1, ran.set)
+        time.sleep(0.06)
+
+        assert not ran.is_set()
+        assert ran.wait(1)
+
+    def test_cancel_drops_pending_callback(self):
+        """Test that a cancelled callback never runs."""
+        scheduler = DebounceScheduler()
+        calls = []
+
+        scheduler.schedule("key", 0.05, lambda: calls.append("key"))
+        scheduler.schedule("other", 0.05, lambda: calls.append("other"))
+        scheduler.cancel("key")
+        time.sleep(_SETTLE)
+
+        assert calls == ["other"]
+
+    def test_same_key_callbacks_never_overlap(self):
+        """Test that a callback due while its key is still running waits for it."""
+        scheduler = DebounceScheduler()
+        release = threading.Event()
+        first_started = threading.Event()
+        events = []
+
+        def first():
+            events.append("first start")
+            first_started.set()
+            release.wait(2)
+            events.append("first end")
+
+        scheduler.schedule("key", 0, first)
+        assert first_started.wait(1)
+        scheduler.schedule("key", 0, lambda: events.append("second"))
+        time.sleep(_SETTLE)
+
+        assert events == ["first start"]
+        release.set()
+        time.sleep(_SETTLE)
+        assert events == ["first start", "first end", "second"]
+
+    def test_slow_callback_does_not_block_other_keys(self):
+        """Test that a running callback doesn't hold up other keys on the pool."""
+        scheduler = DebounceScheduler()
+        release = threading.Event()
+        other_ran = threading.Event()
+
+        scheduler.schedule("slow", 0, lambda: release.wait(2))
+        scheduler.schedule("fast", 0.05, other_ran.set)
+
+        assert other_ran.wait(1)
+        release.set()
+
+    def test_cancel_drops_queued_follow_up(self):
+        """Test that cancel also drops a callback waiting on a running one."""
+        scheduler = DebounceScheduler()
+        release = threading.Event()
+        started = threading.Event()
+        calls = []
+
+        def first():
+            started.set()
+            release.wait(2)
+
+        scheduler.schedule("key", 0, first)
+        assert started.wait(1)
+        scheduler.schedule("key", 0, lambda: calls.append("follow-up"))
+        time.sleep(_SETTLE)
+        scheduler.cancel("key")
+        release.set()
+        time.sleep(_SETTLE)
+
+        assert calls == []
+        assert "key" not in scheduler.running
+
+    def test_callback_error_does_not_stop_scheduler(self):
+        """Test that an exception in one callback doesn't kill later ones."""
+        scheduler = DebounceScheduler()
+        ran = threading.Event()
+
+        def failing():
+            raise RuntimeError("boom")
+
+        scheduler.schedule("key", 0, failing)
+        time.sleep(_SETTLE)
+        scheduler.schedule("key", 0, ran.set)
+
+        assert ran.wait(1)
+
+
+@pytest.mark.unit
+class TestProjectFileHandler:
+    """Test ProjectFileHandler debouncing."""
+
+    def _handler(self):
+        scheduler = MagicMock()
+        on_change = MagicMock()
+        handler = ProjectFileHandler(1, "knowledge_docs", on_change, scheduler=scheduler)
+        return handler, scheduler, on_change
+
+    def _scheduled_callbacks(self, scheduler):
+        return [c.args[2] for c in scheduler.schedule.call_args_list]
+
+    def test_events_schedule_on_handler_key(self):
+        """Test that file events debounce under the handler's own key."""
+        handler, scheduler, on_change = self._handler()
+
+        handler.on_modified(MagicMock(is_directory=False))
+        handler.on_created(MagicMock(is_directory=False))
+        handler.on_modified(MagicMock(is_directory=True))
+
+        assert scheduler.schedule.call_count == 2
+        assert all(c.args[0] is handler for c in scheduler.schedule.call_args_list)
+        on_change.assert_not_called()
+
+    def test_stale_generation_is_dropped(self):
+        """Test that a sync superseded by a newer event doesn't run."""
+        handler, scheduler, on_change = self._handler()
+
+        handler.on_modified(MagicMock(is_directory=False))
+        handler.on_modified(MagicMock(is_directory=False))
+        stale, current = self._scheduled_callbacks(scheduler)
+
+        stale()
+        on_change.assert_not_called()
+        current()
+        on_change.assert_called_once()
+
+    def test_cancel_pending_drops_taken_callback(self):
+        """Test that cancel stops a sync the scheduler already took off its heap."""
+        handler, scheduler, on_change = self._handler()
+
+        handler.on_modified(MagicMock(is_directory=False))
+        (callback,) = self._scheduled_callbacks(scheduler)
+        handler.cancel_pending()
+        callback()
+
+        scheduler.cancel.assert_called_once_with(handler)
+        on_change.assert_not_called()
+
+    def test_sync_error_is_logged_not_raised(self):
+        """Test that a failing sync doesn't propagate into the scheduler."""
+        handler, scheduler, on_change = self._handler()
+        on_change.side_effect = RuntimeError("sync failed")
+
+        handler.on_modified(MagicMock(is_directory=False))
+        self._scheduled_callbacks(scheduler)[0]()
+
+        on_change.assert_called_once()
+
+
+@pytest.mark.unit
+class TestSharedObserver:
+    """Test SharedObserver watch reference counting."""
+
+    @pytest.fixture
+    def mock_observer(self):
+        with patch('app.core.file_watcher.Observer') as mock_cls:
+            observer = mock_cls.return_value
+            observer.is_alive.return_value = False
+            yield observer
+
+    def test_schedule_starts_observer_once(self, mock_observer):
+        """Test that the observer starts on the first schedule only."""
+        shared = SharedObserver()
+
+        shared.schedule(MagicMock(), "/folder")
+        mock_observer.is_alive.return_value = True
+        shared.schedule(MagicMock(), "/other")
+
+        mock_observer.start.assert_called_once()
+
+    def test_shared_watch_unscheduled_with_last_handler(self, mock_observer):
+        """Test that a folder's watch is only dropped when its last handler goes."""
+        watch = object()
+        mock_observer.schedule.return_value = watch
+        shared = SharedObserver()
+        first, second = MagicMock(), MagicMock()
+
+        assert shared.schedule(first, "/folder") is watch
+        assert shared.schedule(second, "/folder") is watch
+        assert shared.watch_refs[watch] == 2
+
+        shared.unschedule(first, watch)
+        mock_observer.remove_handler_for_watch.assert_called_once_with(first, watch)
+        mock_observer.unschedule.assert_not_called()
+
+        shared.unschedule(second, watch)
+        mock_observer.unschedule.assert_called_once_with(watch)
+        assert watch not in shared.watch_refs
+
+    def test_stop_replaces_observer(self, mock_observer):
+        """Test that stop joins the running observer and clears watches."""
+        shared = SharedObserver()
+        shared.schedule(MagicMock(), "/folder")
+        mock_observer.is_alive.return_value = True
+
+        shared.stop()
+
+        mock_observer.stop.assert_called_once()
+        mock_observer.join.assert_called_once()
+        assert shared.watch_refs == {}
+
+
+@pytest.mark.unit
+class TestProjectWatcherKBResolution:
+    """Test how ProjectWatcher resolves and re-resolves its target KB."""
+
+    @pytest.fixture
+    def watcher(self, tmp_path):
+        with patch('app.core.file_watcher.ProjectHook') as mock_hook_cls:
+            watcher = ProjectWatcher(1, observer=MagicMock())
+        watcher.hook = mock_hook_cls.return_value
+        watcher.hook.hooks_config_path = tmp_path / "hooks.json"
+        watcher.hook.hooks_config_path.write_text("{}")
+        return watcher
+
+    def test_kb_name_resolved_once(self, watcher):
+        """Test that the KB name is looked up once while hooks.json is unchanged."""
+        watcher.hook.get_kb_name.return_value = "docs_kb"
+        watcher.hook.sync_kb_folder.return_value = {"synced_files": 1, "kb_missing": False}
+
+        watcher._on_folder_change("knowledge_docs")
+        watcher._on_folder_change("knowledge_docs")
+
+        watcher.hook.get_kb_name.assert_called_once_with("knowledge_docs")
+        assert watcher.hook.sync_kb_folder.call_count == 2
+
+    def test_missing_kb_is_re_resolved(self, watcher):
+        """Test that a sync reporting its KB missing re-resolves and syncs again."""
+        watcher.hook.get_kb_name.side_effect = ["old_kb", "new_kb"]
+        watcher.hook.sync_kb_folder.side_effect = [
+            {"synced_files": 0, "kb_missing": True},
+            {"synced_files": 2, "kb_missing": False},
+        ]
+
+        watcher._on_folder_change("knowledge_docs")
+
+        assert [c.kwargs["kb_name"] for c in watcher.hook.sync_kb_folder.call_args_list] == [
+            "old_kb", "new_kb"
+        ]
+        assert watcher.kb_names["knowledge_docs"] == "new_kb"
+
+    def test_hooks_config_change_clears_cached_kb(self, watcher):
+        """Test that editing hooks.json makes the next sync look the KB up again."""
+        watcher.hook.get_kb_name.side_effect = ["old_kb", "new_kb"]
+        watcher.hook.sync_kb_folder.return_value = {"synced_files": 0, "kb_missing": False}
+
+        watcher._on_folder_change("knowledge_docs")
+        watcher.hook.hooks_config_path.write_text('{"hooks": {}}')
+        watcher._on_folder_change("knowledge_docs")
+
+        assert watcher.hook.sync_kb_folder.call_args.kwargs["kb_name"] == "new_kb"
+
+
+@pytest.mark.unit
+class TestGlobalFileWatcherLocking:
+    """Test per-project locking in GlobalFileWatcher."""
+
+    @pytest.fixture
+    def blocking_watchers(self):
+        """Patch ProjectWatcher so project 1's start blocks until released."""
+        release = threading.Event()
+        started = threading.Event()
+        created = []
+
+        def make_watcher(project_id, observer):
+            watcher = MagicMock(project_id=project_id)
+
+            def start():
+                if project_id == 1:
+                    started.set()
+                    release.wait(2)
+
+            watcher.start.side_effect = start
+            created.append(watcher)
+            return watcher
+
+        with patch('app.core.file_watcher.ProjectWatcher', side_effect=make_watcher), \
+                patch('app.core.file_watcher.Observer'):
+            yield created, started, release
+
+    def test_slow_start_does_not_block_other_projects(self, blocking_watchers):
+        """Test that one project's start doesn't hold up another's."""
+        created, started, release = blocking_watchers
+        watcher = GlobalFileWatcher()
+
+        slow = threading.Thread(target=watcher.start_project, args=(1,))
+        slow.start()
+        assert started.wait(1)
+
+        fast = threading.Thread(target=watcher.start_project, args=(2,))
+        fast.start()
+        fast.join(1)
+
+        assert not fast.is_alive()
+        assert 2 in watcher.watchers
+        release.set()
+        slow.join(1)
+        assert set(watcher.watchers) == {1, 2}
+
+    def test_stop_waits_for_start_of_same_project(self, blocking_watchers):
+        """Test that stopping a project waits for its in-progress start."""
+        created, started, release = blocking_watchers
+        watcher = GlobalFileWatcher()
+
+        starting = threading.Thread(target=watcher.start_project, args=(1,))
+        starting.start()
+        assert started.wait(1)
+
+        stopping = threading.Thread(target=watcher.stop_project, args=(1,))
+        stopping.start()
+        stopping.join(0.2)
+        assert stopping.is_alive()
+
+        release.set()
+        starting.join(1)
+        stopping.join(1)
+
+        assert not stopping.is_alive()
+        assert watcher.watchers == {}
+        created[0].stop.assert_called_once()
+
+    def test_concurrent_starts_create_one_watcher(self, blocking_watchers):
+        """Test that racing starts of one project create a single watcher."""
+        created, started, release = blocking_watchers
+        watcher = GlobalFileWatcher()
+
+        threads = [threading.Thread(target=watcher.start_project, args=(1,)) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        assert started.wait(1)
+        release.set()
+        for thread in threads:
+            thread.join(1)
+
+        assert len(created) == 1
+        assert watcher.watchers == {1: created[0]}
@@ -16,7 +16,7 @@ from app.core.health import (
 class TestOllamaHealth:
     """Test Ollama health check functionality."""
 
-    @patch('app.core.health.requests.get')
+    @patch('app.core.health._SESSION.get')
     def test_ollama_healthy(self, mock_get):
         """Test Ollama health check when service is healthy."""
         # Mock successful response
@@ -40,7 +40,7 @@ class TestOllamaHealth:
         assert "nomic-embed-text" in result["models"]
         assert result["url"] == "http://localhost:11434"
 
-    @patch('app.core.health.requests.get')
+    @patch('app.core.health._SESSION.get')
     def test_ollama_unhealthy_connection_error(self, mock_get):
         """Test Ollama health check with connection error."""
         # Mock connection error
@@ -53,7 +53,7 @@ class TestOllamaHealth:
         assert "Connection refused" in result["error"]
         assert result["url"] == "http://localhost:11434"
 
-    @patch('app.core.health.requests.get')
+    @patch('app.core.health._SESSION.get')
     def test_ollama_unhealthy_timeout(self, mock_get):
         """Test Ollama health check with timeout."""
         # Mock timeout error
@@ -67,7 +67,7 @@ class TestOllamaHealth:
         assert "timed out" in result["error"].lower()
         assert result["url"] == "http://localhost:11434"
 
-    @patch('app.core.health.requests.get')
+    @patch('app.core.health._SESSION.get')
     def test_ollama_unhealthy_connection_refused(self, mock_get):
         """Test Ollama health check with connection refused."""
         # Mock connection refused error
@@ -81,7 +81,7 @@ class TestOllamaHealth:
         assert "Connection refused" in result["error"]
         assert result["url"] == "http://localhost:11434"
 
-    @patch('app.core.health.requests.get')
+    @patch('app.core.health._SESSION.get')
     def test_ollama_unhealthy_http_error(self, mock_get):
         """Test Ollama health check with HTTP error."""
         # Mock HTTP error
@@ -98,7 +98,7 @@ class TestOllamaHealth:
         assert "500 Server Error" in result["error"]
         assert result["url"] == "http://localhost:11434"
 
-    @patch('app.core.health.requests.get')
+    @patch('app.core.health._SESSION.get')
     def test_ollama_empty_models_list(self, mock_get):
         """Test Ollama health check with empty models list."""
         # Mock response with no models
@@ -114,7 +114,7 @@ class TestOllamaHealth:
         assert "models" in result
         assert len(result["models"]) == 0
 
-    @patch('app.core.health.requests.get')
+    @patch('app.core.health._SESSION.get')
     def test_ollama_malformed_response(self, mock_get):
         """Test Ollama health check with malformed response."""
         # Mock malformed JSON response
@@ -320,6 +320,24 @@ class TestWaitForServices:
         # Should still attempt all retries
         assert mock_ollama_check.call_count == 2
 
+    @patch('app.core.health.check_ollama_health')
+    @patch('app.core.health.check_sqlite_health')
+    @patch('app.core.health.time.sleep')
+    def test_wait_for_services_checks_concurrently(self, mock_sleep, mock_sqlite_check, mock_ollama_check):
+        """Test that both services are checked at the same time."""
+        import threading
+        # Each check blocks until the other has started; sequential checks would break it
+        barrier = threading.Barrier(2, timeout=2)
+
+        def checked(status):
+            barrier.wait()
+            return {"status": status}
+
+        mock_ollama_check.side_effect = lambda: checked("healthy")
+        mock_sqlite_check.side_effect = lambda: checked("healthy")
+
+        assert wait_for_services(max_retries=1) is True
+
     @patch('app.core.health.check_ollama_health')
     @patch('app.core.health.check_sqlite_health')
     @patch('app.core.health.time.sleep')
@@ -332,11 +350,28 @@ class TestWaitForServices:
         ]
         mock_sqlite_check.return_value = {"status": "healthy"}
 
-        result = wait_for_services(max_retries=2, delay=0.5)
+        with patch('app.core.health.random.uniform', return_value=0.0):
+            result = wait_for_services(max_retries=2, delay=0.5)
 
         assert result is True
-        # Should use custom delay
-        mock_sleep.assert_called_once_with(0.5)
+        # First retry starts from the backoff base, below the delay cap
+        mock_sleep.assert_called_once_with(0.1)
+
+    @patch('app.core.health.check_ollama_health')
+    @patch('app.core.health.check_sqlite_health')
+    @patch('app.core.health.time.sleep')
+    def test_wait_for_services_exponential_backoff(self, mock_sleep, mock_sqlite_check, mock_ollama_check):
+        """Test that retry sleeps double up to the delay cap, plus jitter."""
+        mock_ollama_check.return_value = {"status": "unhealthy"}
+        mock_sqlite_check.return_value = {"status": "healthy"}
+
+        with patch('app.core.health.random.uniform', return_value=0.05) as mock_uniform:
+            result = wait_for_services(max_retries=6, delay=1)
+
+        assert result is False
+        sleeps = [c.args[0] for c in mock_sleep.call_args_list]
+        assert sleeps == pytest.approx([0.15, 0.25, 0.45, 0.85, 1.05])
+        mock_uniform.assert_called_with(0, 0.2)
 
     @patch('app.core.health.check_ollama_health')
     @patch('app.core.health.check_sqlite_health')
@@ -365,7 +400,7 @@ class TestWaitForServices:
 class TestHealthIntegration:
     """Integration tests for health checks."""
 
-    @patch('app.core.health.requests.get')
+    @patch('app.core.health._SESSION.get')
     def test_real_ollama_check_structure(self, mock_get):
         """Test that Ollama check has correct structure."""
         # Mock realistic response
@@ -417,7 +452,7 @@ class TestHealthIntegration:
         assert isinstance(result["collections"], int)
         assert result["collections"] == 3
 
-    @patch('app.core.health.requests.get')
+    @patch('app.core.health._SESSION.get')
     def test_health_check_error_handling(self, mock_get):
         """Test that health checks handle errors gracefully."""
         # Mock connection error
@@ -431,7 +466,7 @@ class TestHealthIntegration:
 
     def test_health_check_timeout_configuration(self):
         """Test that health checks respect timeout configuration."""
-        with patch('app.core.health.requests.get') as mock_get:
+        with patch('app.core.health._SESSION.get') as mock_get:
             # Mock timeout
             import requests
             mock_get.side_effect = requests.exceptions.Timeout("Request timed out")
@@ -2,6 +2,7 @@
 Tests for hooks system functionality.
 """
 
+import os
 import pytest
 import tempfile
 import json
@@ -13,6 +14,9 @@ from app.core.hooks import ProjectHook, get_project_hook
 from app.core.sqlite_manager import SQLiteManager
 from app.core.kb_types import KBType
 
+# What ingest_documents returns when the documents were stored
+_INGEST_OK = {"status": "success"}
+
 
 @pytest.mark.unit
 class TestProjectHook:
@@ -79,6 +83,45 @@ class TestProjectHook:
 
         assert config == existing_config
 
+    def test_load_hooks_config_cached_until_file_changes(self, clean_db, tmp_path):
+        """Test that hooks.json is parsed once and re-read after an external edit."""
+        project = clean_db.create_project("test_project", str(tmp_path))
+        hook = ProjectHook(project["id"], clean_db)
+        hook._save_hooks_config({"version": "1.0", "hooks": {}})
+
+        with patch('app.core.hooks._json_loads') as mock_load:
+            first = hook._load_hooks_config()
+            first["hooks"]["mutated"] = True
+            second = hook._load_hooks_config()
+
+        mock_load.assert_not_called()
+        assert second["hooks"] == {}
+
+        hook.hooks_config_path.write_text(json.dumps({"version": "2.0", "hooks": {"x": {}}}))
+        assert hook._load_hooks_config()["version"] == "2.0"
+
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_hooks_config_round_trip(self, clean_db, tmp_path, use_orjson):
+        """Test hooks.json round-trips with orjson and with the stdlib fallback."""
+        import app.core.hooks as hooks_module
+        if use_orjson and hooks_module.orjson is None:
+            pytest.skip("orjson not installed")
+
+        project = clean_db.create_project("test_project", str(tmp_path))
+        hook = ProjectHook(project["id"], clean_db)
+
+        orjson_module = hooks_module.orjson if use_orjson else None
+        with patch('app.core.hooks.orjson', orjson_module), patch.dict('app.core.hooks._config_cache', clear=True):
+            config = hook._load_hooks_config()
+            config["hooks"]["knowledge_docs"] = {"synced_files": {"docs/ü.md": {"hash": "abc"}}}
+            hook._save_hooks_config(config)
+            hooks_module._config_cache.clear()
+            loaded = hook._load_hooks_config()
+
+        assert loaded == config
+        assert json.loads(hook.hooks_config_path.read_text(encoding="utf-8")) == config
+        assert hook.hooks_config_path.read_text(encoding="utf-8").startswith('{\n  "')
+
     def test_save_hooks_config(self, clean_db, tmp_path):
         """Test saving hooks config."""
         project = clean_db.create_project("test_project", str(tmp_path))
@@ -194,7 +237,7 @@ class TestProjectHook:
         with pytest.raises(ValueError, match="Hook for .* not found"):
             hook.disable_kb_autosync("nonexistent_hook")
 
-    @patch('app.core.hooks.ingest_documents')
+    @patch('app.core.hooks.ingest_documents', return_value=_INGEST_OK)
     def test_sync_kb_folder_success(self, mock_ingest, clean_db, tmp_path):
         """Test successful KB folder sync."""
         project = clean_db.create_project("test_project", str(tmp_path))
@@ -230,10 +273,11 @@ class TestProjectHook:
         assert "file1.txt" in str(result["files_synced"])
         assert "file2.md" in str(result["files_synced"])
 
-        # Check ingest was called (once per file)
-        assert mock_ingest.call_count == 2
+        # Check ingest was called once with both files
+        mock_ingest.assert_called_once()
+        assert len(mock_ingest.call_args[0][1]) == 2
 
-    @patch('app.core.hooks.ingest_documents')
+    @patch('app.core.hooks.ingest_documents', return_value=_INGEST_OK)
     def test_sync_kb_folder_with_unchanged_files(self, mock_ingest, clean_db, tmp_path):
         """Test KB folder sync with unchanged files."""
         project = clean_db.create_project("test_project", str(tmp_path))
@@ -272,7 +316,187 @@ class TestProjectHook:
         # Ingest should not be called for unchanged files
         mock_ingest.assert_not_called()
 
-    @patch('app.core.hooks.ingest_documents')
+    @patch('app.core.hooks.ingest_documents', return_value=_INGEST_OK)
+    def test_sync_kb_folder_skips_hash_when_stat_unchanged(self, mock_ingest, clean_db, tmp_path):
+        """Test that files with an unchanged old mtime and size are not re-hashed."""
+        project = clean_db.create_project("test_project", str(tmp_path))
+        kb = clean_db.create_collection("test_kb", KBType.GENERIC)
+        clean_db.assign_kb_to_project(project["id"], kb["id"], "knowledge_docs")
+
+        docs_dir = tmp_path / "docs"
+        docs_dir.mkdir()
+        test_file = docs_dir / "file1.txt"
+        test_file.write_text("Content 1")
+        os.utime(test_file, (1_000_000_000, 1_000_000_000))
+
+        hook = ProjectHook(project["id"], clean_db)
+        hook.enable_kb_autosync("knowledge_docs", str(docs_dir), file_patterns=[".txt"])
+        hook.sync_kb_folder("knowledge_docs")
+
+        with patch('app.core.hooks._hash_bytes') as mock_hash:
+            result = hook.sync_kb_folder("knowledge_docs")
+
+        mock_hash.assert_not_called()
+        assert result["skipped_files"] == 1
+
+    @patch('app.core.hooks.ingest_documents', return_value=_INGEST_OK)
+    def test_sync_kb_folder_hash_algorithm_change(self, mock_ingest, clean_db, tmp_path):
+        """Test that entries hashed with another algorithm are compared, not re-ingested."""
+        project = clean_db.create_project("test_project", str(tmp_path))
+        kb = clean_db.create_collection("test_kb", KBType.GENERIC)
+        clean_db.assign_kb_to_project(project["id"], kb["id"], "knowledge_docs")
+
+        docs_dir = tmp_path / "docs"
+        docs_dir.mkdir()
+        (docs_dir / "legacy.txt").write_text("Legacy")
+        (docs_dir / "changed.txt").write_text("New content")
+
+        hook = ProjectHook(project["id"], clean_db)
+        hook.enable_kb_autosync("knowledge_docs", str(docs_dir), file_patterns=[".txt"])
+        config = hook._load_hooks_config()
+        config["hooks"]["knowledge_docs"]["synced_files"] = {
+            # Pre-"algo" entries are SHA256
+            "legacy.txt": {"hash": hashlib.sha256(b"Legacy").hexdigest()},
+            "changed.txt": {"hash": hashlib.sha256(b"Old content").hexdigest()},
+        }
+        hook._save_hooks_config(config)
+
+        with patch('app.core.hooks._HASH_ALGO', 'blake2b'):
+            result = hook.sync_kb_folder("knowledge_docs")
+
+        assert result["skipped_files"] == 1
+        assert [Path(f).name for f in result["files_synced"]] == ["changed.txt"]
+        synced = hook.get_hook_status("knowledge_docs")["synced_files"]
+        assert synced["legacy.txt"]["algo"] == "blake2b"
+        assert synced["legacy.txt"]["hash"] == hashlib.blake2b(b"Legacy").hexdigest()
+
+        # Inline hashes from old hooks.json files move to the database
+        saved = json.loads(hook.hooks_config_path.read_text())
+        assert "synced_files" not in saved["hooks"]["knowledge_docs"]
+        assert set(clean_db.get_hook_synced_files(project["id"], "knowledge_docs")) == {"legacy.txt", "changed.txt"}
+
+    @patch('app.core.hooks.ingest_documents', return_value=_INGEST_OK)
+    def test_sync_kb_folder_same_name_in_subdirectories(self, mock_ingest, clean_db, tmp_path):
+        """Test that files sharing a name in different subdirectories are tracked separately."""
+        project = clean_db.create_project("test_project", str(tmp_path))
+        kb = clean_db.create_collection("test_kb", KBType.GENERIC)
+        clean_db.assign_kb_to_project(project["id"], kb["id"], "knowledge_docs")
+
+        docs_dir = tmp_path / "docs"
+        (docs_dir / "a").mkdir(parents=True)
+        (docs_dir / "b").mkdir()
+        (docs_dir / "a" / "README.md").write_text("A")
+        (docs_dir / "b" / "README.md").write_text("B")
+
+        hook = ProjectHook(project["id"], clean_db)
+        hook.enable_kb_autosync("knowledge_docs", str(docs_dir), file_patterns=[".md"])
+        hook.sync_kb_folder("knowledge_docs")
+
+        mock_ingest.reset_mock()
+        result = hook.sync_kb_folder("knowledge_docs")
+
+        assert result["synced_files"] == 0
+        assert result["skipped_files"] == 2
+        mock_ingest.assert_not_called()
+
+    @patch('app.core.hooks.ingest_documents', return_value=_INGEST_OK)
+    def test_sync_kb_folder_glob_patterns(self, mock_ingest, clean_db, tmp_path):
+        """Test that "*.ext" patterns match like ".ext", case-insensitively."""
+        project = clean_db.create_project("test_project", str(tmp_path))
+        kb = clean_db.create_collection("test_kb", KBType.GENERIC)
+        clean_db.assign_kb_to_project(project["id"], kb["id"], "knowledge_docs")
+
+        docs_dir = tmp_path / "docs"
+        docs_dir.mkdir()
+        (docs_dir / "notes.MD").write_text("# Notes")
+        (docs_dir / "script.py").write_text("print('hi')")
+        (docs_dir / "data.csv").write_text("a,b")
+
+        hook = ProjectHook(project["id"], clean_db)
+        hook.enable_kb_autosync("knowledge_docs", str(docs_dir), file_patterns=["*.md", ".PY"])
+
+        result = hook.sync_kb_folder("knowledge_docs")
+
+        assert result["synced_files"] == 2
+        mock_ingest.assert_called_once()
+        assert len(mock_ingest.call_args[0][1]) == 2
+
+    @patch('app.core.hooks._INGEST_BATCH_FILES', 2)
+    @patch('app.core.hooks.ingest_documents', return_value=_INGEST_OK)
+    def test_sync_kb_folder_batches_ingestion(self, mock_ingest, clean_db, tmp_path):
+        """Test that changed files are ingested in batches and failed batches are retried."""
+        project = clean_db.create_project("test_project", str(tmp_path))
+        kb = clean_db.create_collection("test_kb", KBType.GENERIC)
+        clean_db.assign_kb_to_project(project["id"], kb["id"], "knowledge_docs")
+
+        docs_dir = tmp_path / "docs"
+        docs_dir.mkdir()
+        for i in range(5):
+            (docs_dir / f"file{i}.md").write_text(f"# File {i}")
+
+        hook = ProjectHook(project["id"], clean_db)
+        hook.enable_kb_autosync("knowledge_docs", str(docs_dir), file_patterns=[".md"])
+
+        mock_ingest.side_effect = Exception("Ollama unavailable")
+        result = hook.sync_kb_folder("knowledge_docs")
+
+        assert result["synced_files"] == 0
+        assert len(result["errors"]) == 5
+        assert hook.get_hook_status("knowledge_docs")["synced_files"] == {}
+
+        mock_ingest.reset_mock()
+        mock_ingest.side_effect = None
+        result = hook.sync_kb_folder("knowledge_docs")
+
+        assert result["synced_files"] == 5
+        assert [len(c[0][1]) for c in mock_ingest.call_args_list] == [2, 2, 1]
+
+    @patch('app.core.hooks.ingest_documents', return_value=_INGEST_OK)
+    def test_sync_kb_folder_normalizes_newlines(self, mock_ingest, clean_db, tmp_path):
+        """Test that ingested text has universal newlines and drops invalid UTF-8."""
+        project = clean_db.create_project("test_project", str(tmp_path))
+        kb = clean_db.create_collection("test_kb", KBType.GENERIC)
+        clean_db.assign_kb_to_project(project["id"], kb["id"], "knowledge_docs")
+
+        docs_dir = tmp_path / "docs"
+        docs_dir.mkdir()
+        (docs_dir / "crlf.md").write_bytes(b"one\r\ntwo\rthree\xff\n")
+        (docs_dir / "lf.md").write_bytes(b"four\nfive\n")
+
+        hook = ProjectHook(project["id"], clean_db)
+        hook.enable_kb_autosync("knowledge_docs", str(docs_dir), file_patterns=[".md"])
+        hook.sync_kb_folder("knowledge_docs")
+
+        documents, metadatas = mock_ingest.call_args[0][1:]
+        by_name = {meta["filename"]: doc for doc, meta in zip(documents, metadatas)}
+        assert by_name == {"crlf.md": "one\ntwo\nthree\n", "lf.md": "four\nfive\n"}
+
+    @patch('app.core.hooks.ingest_documents', return_value=_INGEST_OK)
+    def test_sync_kb_folder_symlinks(self, mock_ingest, clean_db, tmp_path):
+        """Test that symlinked files are synced but symlinked directories are not walked."""
+        project = clean_db.create_project("test_project", str(tmp_path))
+        kb = clean_db.create_collection("test_kb", KBType.GENERIC)
+        clean_db.assign_kb_to_project(project["id"], kb["id"], "knowledge_docs")
+
+        outside = tmp_path / "outside"
+        outside.mkdir()
+        (outside / "linked.md").write_text("# Linked")
+        (outside / "nested.md").write_text("# Nested")
+
+        docs_dir = tmp_path / "docs"
+        (docs_dir / "sub").mkdir(parents=True)
+        (docs_dir / "sub" / "real.md").write_text("# Real")
+        (docs_dir / "linked.md").symlink_to(outside / "linked.md")
+        (docs_dir / "outside").symlink_to(outside, target_is_directory=True)
+
+        hook = ProjectHook(project["id"], clean_db)
+        hook.enable_kb_autosync("knowledge_docs", str(docs_dir), file_patterns=[".md"])
+
+        result = hook.sync_kb_folder("knowledge_docs")
+
+        assert sorted(Path(f).name for f in result["files_synced"]) == ["linked.md", "real.md"]
+
+    @patch('app.core.hooks.ingest_documents', return_value=_INGEST_OK)
     def test_sync_kb_folder_with_errors(self, mock_ingest, clean_db, tmp_path):
         """Test KB folder sync with ingestion errors."""
         project = clean_db.create_project("test_project", str(tmp_path))
@@ -287,9 +511,10 @@ class TestProjectHook:
         (docs_dir / "file1.txt").write_text("Content 1")
         (docs_dir / "file2.txt").write_text("Content 2")
 
-        # Mock ingest to fail for second file
+        # Mock ingest to fail the batch, then the second file on retry
         mock_ingest.side_effect = [
-            None,  # Success for first file
+            Exception("Batch failed"),  # Both files in one call
+            _INGEST_OK,  # Success for first file
             Exception("Ingestion failed")  # Fail for second
         ]
 
@@ -308,6 +533,77 @@ class TestProjectHook:
         assert len(result["errors"]) == 1
         assert "Ingestion failed" in result["errors"][0]["error"]
 
+    @patch('app.core.hooks.ingest_documents')
+    def test_sync_kb_folder_with_error_status(self, mock_ingest, clean_db, tmp_path):
+        """Test that an error result from ingest_documents is retried per file and not marked synced."""
+        project = clean_db.create_project("test_project", str(tmp_path))
+
+        kb = clean_db.create_collection("test_kb", KBType.GENERIC)
+        clean_db.assign_kb_to_project(project["id"], kb["id"], "knowledge_docs")
+
+        docs_dir = tmp_path / "docs"
+        docs_dir.mkdir()
+        (docs_dir / "file1.txt").write_text("Content 1")
+        (docs_dir / "file2.txt").write_text("Content 2")
+
+        # ingest_documents reports failures in its result instead of raising
+        def ingest_side_effect(kb_name, documents, metadatas):
+            if any(meta["filename"] == "file2.txt" for meta in metadatas):
+                return {"status": "error", "error": "No valid documents to ingest"}
+            return _INGEST_OK
+
+        mock_ingest.side_effect = ingest_side_effect
+
+        hook = ProjectHook(project["id"], clean_db)
+        hook.enable_kb_autosync(
+            mcp_type="knowledge_docs",
+            folder_path=str(docs_dir),
+            file_patterns=[".txt"]
+        )
+
+        result = hook.sync_kb_folder("knowledge_docs")
+
+        assert mock_ingest.call_count == 3
+        assert result["synced_files"] == 1
+        assert result["errors"] == [
+            {"file": str(docs_dir / "file2.txt"), "error": "No valid documents to ingest"}
+        ]
+        # Only the stored file is remembered, so the failed one is retried next sync
+        assert set(clean_db.get_hook_synced_files(project["id"], "knowledge_docs")) == {"file1.txt"}
+
+    @patch('app.core.hooks.ingest_documents')
+    def test_sync_kb_folder_reports_missing_kb(self, mock_ingest, clean_db, tmp_path):
+        """Test that a missing KB is flagged and its batch isn't retried per file."""
+        project = clean_db.create_project("test_project", str(tmp_path))
+
+        kb = clean_db.create_collection("test_kb", KBType.GENERIC)
+        clean_db.assign_kb_to_project(project["id"], kb["id"], "knowledge_docs")
+
+        docs_dir = tmp_path / "docs"
+        docs_dir.mkdir()
+        (docs_dir / "file1.txt").write_text("Content 1")
+        (docs_dir / "file2.txt").write_text("Content 2")
+
+        mock_ingest.return_value = {
+            "status": "error",
+            "error": "Collection test_kb not found",
+            "collection_missing": True
+        }
+
+        hook = ProjectHook(project["id"], clean_db)
+        hook.enable_kb_autosync(
+            mcp_type="knowledge_docs",
+            folder_path=str(docs_dir),
+            file_patterns=[".txt"]
+        )
+
+        result = hook.sync_kb_folder("knowledge_docs")
+
+        assert result["kb_missing"] is True
+        assert mock_ingest.call_count == 1
+        assert result["synced_files"] == 0
+        assert len(result["errors"]) == 2
+
     def test_sync_kb_folder_not_enabled(self, clean_db, tmp_path):
         """Test syncing folder for hook that's not enabled."""
         project = clean_db.create_project("test_project", str(tmp_path))
@@ -334,6 +630,42 @@ class TestProjectHook:
         with pytest.raises(ValueError, match="No KB assigned"):
             hook.sync_kb_folder("knowledge_docs")
 
+    @patch('app.core.hooks.ingest_documents', return_value=_INGEST_OK)
+    def test_sync_kb_folder_with_resolved_kb_name(self, mock_ingest, clean_db, tmp_path):
+        """Test that a caller-supplied KB name skips the KB lookup."""
+        project = clean_db.create_project("test_project", str(tmp_path))
+        kb = clean_db.create_collection("test_kb", KBType.GENERIC)
+        clean_db.assign_kb_to_project(project["id"], kb["id"], "knowledge_docs")
+
+        docs_dir = tmp_path / "docs"
+        docs_dir.mkdir()
+        (docs_dir / "file1.md").write_text("# One")
+
+        hook = ProjectHook(project["id"], clean_db)
+        hook.enable_kb_autosync("knowledge_docs", str(docs_dir), file_patterns=[".md"])
+        kb_name = hook.get_kb_name("knowledge_docs")
+        assert kb_name == "test_kb"
+
+        with patch.object(clean_db, 'get_project_kbs') as mock_kbs:
+            result = hook.sync_kb_folder("knowledge_docs", kb_name=kb_name)
+
+        mock_kbs.assert_not_called()
+        assert result["synced_files"] == 1
+        assert mock_ingest.call_args[0][0] == "test_kb"
+
+    def test_sync_kb_folder_assigned_kb_missing(self, clean_db, tmp_path):
+        """Test syncing folder when the assigned KB no longer exists."""
+        project = clean_db.create_project("test_project", str(tmp_path))
+        docs_dir = tmp_path / "docs"
+        docs_dir.mkdir()
+
+        hook = ProjectHook(project["id"], clean_db)
+        hook.enable_kb_autosync("knowledge_docs", str(docs_dir))
+
+        with patch.object(clean_db, 'get_project_kbs', return_value={"knowledge_docs": 12345}):
+            with pytest.raises(ValueError, match="KB not found"):
+                hook.sync_kb_folder("knowledge_docs")
+
     def test_sync_all_folders(self, clean_db, tmp_path):
         """Test syncing all enabled folders."""
         project = clean_db.create_project("test_project", str(tmp_path))
@@ -358,8 +690,7 @@ class TestProjectHook:
         hook.enable_kb_autosync("knowledge_docs", str(docs_dir))
         hook.enable_kb_autosync("project_profile", str(profile_dir))
 
-        with patch('app.core.hooks.ingest_documents') as mock_ingest:
-            mock_ingest.return_value = None
+        with patch('app.core.hooks.ingest_documents', return_value=_INGEST_OK) as mock_ingest:
 
             results = hook.sync_all_folders()
 
@@ -368,6 +699,12 @@ class TestProjectHook:
             assert results["knowledge_docs"]["synced_files"] == 1
             assert results["project_profile"]["synced_files"] == 1
 
+        # One sweep records a single sync timestamp
+        status = hook.get_hook_status()
+        last_syncs = {h["last_sync"] for h in status["hooks"].values()}
+        assert len(last_syncs) == 1
+        assert hook._load_hooks_config()["updated_at"] in last_syncs
+
     def test_get_hook_status_single(self, clean_db, tmp_path):
         """Test getting status for single hook."""
         project = clean_db.create_project("test_project", str(tmp_path))
@@ -413,38 +750,6 @@ class TestProjectHook:
         assert "error" in status
         assert "not found" in status["error"]
 
-    def test_compute_file_hash(self, tmp_path):
-        """Test file hash computation."""
-        hook = ProjectHook.__new__(ProjectHook)  # Create without __init__
-
-        # Create test file
-        test_file = tmp_path / "test.txt"
-        test_content = "Test content for hashing"
-        test_file.write_text(test_content)
-
-        computed_hash = hook._compute_file_hash(test_file)
-
-        # Compute expected hash
-        expected_hash = hashlib.sha256(test_content.encode()).hexdigest()
-
-        assert computed_hash == expected_hash
-
-    def test_compute_file_hash_binary(self, tmp_path):
-        """Test file hash computation for binary file."""
-        hook = ProjectHook.__new__(ProjectHook)  # Create without __init__
-
-        # Create binary file
-        test_file = tmp_path / "test.bin"
-        test_content = b"\x00\x01\x02\x03\x04\x05"
-        test_file.write_bytes(test_content)
-
-        computed_hash = hook._compute_file_hash(test_file)
-
-        # Compute expected hash
-        expected_hash = hashlib.sha256(test_content).hexdigest()
-
-        assert computed_hash == expected_hash
-
 
 @pytest.mark.unit
 class TestProjectHookUtility:
@@ -516,8 +821,7 @@ class TestProjectHookIntegration:
         assert result["enabled"] is True
 
         # Sync (should ingest file)
-        with patch('app.core.hooks.ingest_documents') as mock_ingest:
-            mock_ingest.return_value = None
+        with patch('app.core.hooks.ingest_documents', return_value=_INGEST_OK) as mock_ingest:
 
             sync_result = hook.sync_kb_folder("knowledge_docs")
             assert sync_result["synced_files"] == 1
@@ -526,8 +830,7 @@ class TestProjectHookIntegration:
         # Modify file and sync again (should ingest again)
         test_file.write_text("Modified content")
 
-        with patch('app.core.hooks.ingest_documents') as mock_ingest:
-            mock_ingest.return_value = None
+        with patch('app.core.hooks.ingest_documents', return_value=_INGEST_OK) as mock_ingest:
 
             sync_result = hook.sync_kb_folder("knowledge_docs")
             assert sync_result["synced_files"] == 1
@@ -585,8 +888,7 @@ class TestProjectHookIntegration:
         hook.enable_kb_autosync("project_profile", str(profile_dir))
 
         # Sync both
-        with patch('app.core.hooks.ingest_documents') as mock_ingest:
-            mock_ingest.return_value = None
+        with patch('app.core.hooks.ingest_documents', return_value=_INGEST_OK) as mock_ingest:
 
             results = hook.sync_all_folders()
 
@@ -616,12 +918,12 @@ class TestProjectHookIntegration:
         hook.enable_kb_autosync("knowledge_docs", str(docs_dir))
 
         # Mock ingest to fail for bad file
-        with patch('app.core.hooks.ingest_documents') as mock_ingest:
+        with patch('app.core.hooks.ingest_documents', return_value=_INGEST_OK) as mock_ingest:
             def ingest_side_effect(kb_name, documents, metadatas):
                 # Fail if contains "bad"
                 if any("bad" in meta.get("filename", "") for meta in metadatas):
                     raise Exception("Bad file detected")
-                return None
+                return _INGEST_OK
 
             mock_ingest.side_effect = ingest_side_effect
 
@@ -2,12 +2,18 @@
 Tests for ingestion.py - Document ingestion pipeline.
 """
 
+import json
+import os
 import pytest
+import requests
 import tempfile
+import time
 from pathlib import Path
 from unittest.mock import patch, MagicMock
 import fitz  # PyMuPDF
+from llama_index.core.node_parser import SentenceSplitter
 
+from app.core.http_clients import get_ollama_session
 from app.core.ingestion import (
     extract_text_from_file,
     chunk_document,
@@ -16,9 +22,39 @@ from app.core.ingestion import (
     ingest_directory,
     should_skip_path,
     SKIP_DIRECTORIES,
+    _embed_texts,
+    _get_embed_model,
+    _get_encoding,
+    _get_splitter,
+    _iter_supported_files,
+    _pack_batches,
+    _truncate_to_token_budget,
 )
 
 
+def _json_response(payload):
+    """A mocked HTTP response with payload as its JSON body."""
+    response = MagicMock()
+    response.content = json.dumps(payload).encode()
+    return response
+
+
+@pytest.fixture(autouse=True)
+def batch_embed_post():
+    """
+    Stub Ollama's /api/embed endpoint as unreachable.
+
+    Ingestion then falls back to the (mocked) per-chunk embedding model, so
+    tests never hit a real server; batch tests set a return value instead.
+    The cached embedding client is reset so each test sees its own mock.
+    """
+    _get_embed_model.cache_clear()
+    with patch.object(get_ollama_session(), 'post') as mock_post:
+        mock_post.side_effect = requests.exceptions.ConnectionError("Ollama not running")
+        yield mock_post
+    _get_embed_model.cache_clear()
+
+
 class TestExtractTextFromFile:
     """Tests for extract_text_from_file function."""
 
@@ -159,6 +195,30 @@ class TestChunkDocument:
         for chunk in chunks:
             assert "chunk_id" in chunk.metadata
 
+    def test_truncate_to_token_budget(self):
+        """Test that text is cut by tokens, not characters, and untouched when it fits."""
+        short = "A short chunk."
+        assert _truncate_to_token_budget(short, 100) is short
+
+        prose = "hello world " * 500
+        truncated = _truncate_to_token_budget(prose, 100)
+        assert prose.startswith(truncated)
+        assert len(_get_encoding().encode_ordinary(truncated)) == 100
+
+        # Token-dense text is cut well below the character count a prose budget allows
+        cjk = "漢字" * 500
+        assert len(_get_encoding().encode_ordinary(_truncate_to_token_budget(cjk, 100))) <= 100
+
+    def test_chunk_reuses_splitter(self):
+        """Test that the sentence splitter is built once, not per document."""
+        _get_splitter.cache_clear()
+        with patch('app.core.ingestion.SentenceSplitter', wraps=SentenceSplitter) as splitter_cls:
+            chunk_document("First document.", {"filename": "a.txt"})
+            chunk_document("Second document.", {"filename": "b.txt"})
+        _get_splitter.cache_clear()
+
+        assert splitter_cls.call_count == 1
+
 
 class TestShouldSkipPath:
     """Tests for should_skip_path function."""
@@ -248,6 +308,45 @@ class TestIngestFile:
         assert "chunks" in result
         mock_db_manager.add_documents.assert_called_once()
 
+    def test_ingest_file_quantizes_embeddings(self, tmp_path, mock_db_manager, mock_embed_model):
+        """Test that embeddings are stored int8-quantized unless QUANTIZE_EMBEDDINGS is off."""
+        file_path = tmp_path / "test.txt"
+        file_path.write_text("This is test content for ingestion.")
+
+        with patch('app.core.ingestion.get_sqlite_manager', return_value=mock_db_manager):
+            with patch('app.core.ingestion.OllamaEmbedding', return_value=mock_embed_model):
+                ingest_file(str(file_path), "test_collection", "test.txt")
+                with patch('app.core.ingestion._QUANTIZE_EMBEDDINGS', False):
+                    ingest_file(str(file_path), "test_collection", "test.txt")
+
+        quantize_flags = [c.kwargs["quantize"] for c in mock_db_manager.add_documents.call_args_list]
+        assert quantize_flags == [True, False]
+
+    def test_ingest_pdf_streams_chunks_across_pages(self, tmp_path, mock_db_manager, mock_embed_model):
+        """Test that a PDF is chunked page by page and embedded in windows, keeping chunk order."""
+        file_path = tmp_path / "long.pdf"
+        doc = fitz.open()
+        for i in range(6):
+            page = doc.new_page()
+            page.insert_textbox(fitz.Rect(36, 36, 576, 806), f"Page {i} sentence number one. " * 60, fontsize=6)
+        doc.save(str(file_path))
+        doc.close()
+
+        with patch('app.core.ingestion.get_sqlite_manager', return_value=mock_db_manager):
+            with patch('app.core.ingestion.OllamaEmbedding', return_value=mock_embed_model):
+                with patch('app.core.ingestion._PDF_BUFFER_CHARS', 2000), \
+                        patch('app.core.ingestion._EMBED_WINDOW', 2), \
+                        patch('app.core.ingestion._embed_texts', wraps=_embed_texts) as embed_texts:
+                    result = ingest_file(str(file_path), "test_collection", "long.pdf")
+
+        assert result["status"] == "success"
+        kwargs = mock_db_manager.add_documents.call_args.kwargs
+        indexes = [meta["chunk_index"] for meta in kwargs["metadatas"]]
+        assert indexes == list(range(result["chunks"]))
+        assert embed_texts.call_count == (result["chunks"] + 1) // 2
+        assert "Page 0" in kwargs["documents"][0]
+        assert "Page 5" in kwargs["documents"][-1]
+
     def test_ingest_empty_file(self, tmp_path, mock_db_manager):
         """Test ingestion of empty file."""
         file_path = tmp_path / "empty.txt"
@@ -271,6 +370,19 @@ class TestIngestFile:
 
         assert result["status"] == "error"
         assert "not found" in result["error"]
+        assert result["collection_missing"] is True
+
+    def test_ingest_reports_exception_message(self, tmp_path, mock_db_manager, mock_embed_model):
+        """Test that an exception during ingestion is reported in the error field."""
+        file_path = tmp_path / "test.txt"
+        file_path.write_text("Content")
+        mock_db_manager.add_documents.side_effect = RuntimeError("disk I/O error")
+
+        with patch('app.core.ingestion.get_sqlite_manager', return_value=mock_db_manager):
+            with patch('app.core.ingestion.OllamaEmbedding', return_value=mock_embed_model):
+                result = ingest_file(str(file_path), "test_collection", "test.txt")
+
+        assert result == {"status": "error", "filename": "test.txt", "error": "disk I/O error"}
 
     def test_ingest_markdown_with_preprocessing(self, tmp_path, mock_db_manager, mock_embed_model):
         """Test ingestion of markdown file with preprocessing."""
@@ -354,6 +466,7 @@ class TestIngestDocuments:
 
         assert result["status"] == "error"
         assert "not found" in result["error"]
+        assert result["collection_missing"] is True
 
     def test_ingest_documents_skips_empty(self, mock_db_manager, mock_embed_model):
         """Test that empty documents are skipped."""
@@ -379,6 +492,117 @@ class TestIngestDocuments:
         assert result["status"] == "error"
         assert "No valid documents" in result["error"]
 
+    def test_ingest_documents_batches_embeddings(self, mock_db_manager, mock_embed_model, batch_embed_post):
+        """Test that chunks are embedded in /api/embed batches of OLLAMA_EMBED_BATCH_SIZE."""
+        documents = [f"Document {i} content" for i in range(5)]
+        metadatas = [{"filename": f"doc{i}.txt"} for i in range(5)]
+
+        def embed(url, json, timeout):
+            return _json_response({"embeddings": [[float(len(text))] for text in json["input"]]})
+
+        batch_embed_post.side_effect = embed
+
+        with patch('app.core.ingestion.get_sqlite_manager', return_value=mock_db_manager):
+            with patch('app.core.ingestion.OllamaEmbedding', return_value=mock_embed_model):
+                with patch('app.core.ingestion._EMBED_BATCH_SIZE', 2):
+                    result = ingest_documents("test_collection", documents, metadatas)
+
+        assert result["status"] == "success"
+        # Batches run concurrently, so requests may complete in any order
+        assert sorted(len(c.kwargs["json"]["input"]) for c in batch_embed_post.call_args_list) == [1, 2, 2]
+        mock_embed_model.get_text_embedding.assert_not_called()
+        kwargs = mock_db_manager.add_documents.call_args.kwargs
+        assert kwargs["embeddings"] == [[float(len(text))] for text in kwargs["documents"]]
+
+    def test_ingest_documents_spreads_batches_across_hosts(self, mock_db_manager, mock_embed_model, batch_embed_post):
+        """Test that embedding batches are assigned round-robin across OLLAMA_EMBED_HOSTS, keeping chunk order."""
+        documents = [f"Document {i} content" for i in range(4)]
+        metadatas = [{"filename": f"doc{i}.txt"} for i in range(4)]
+        urls = ["http://node-a:11434/api/embed", "http://node-b:11434/api/embed"]
+
+        def embed(url, json, timeout):
+            return _json_response({"embeddings": [[float(urls.index(url))] for _ in json["input"]]})
+
+        batch_embed_post.side_effect = embed
+
+        with patch('app.core.ingestion.get_sqlite_manager', return_value=mock_db_manager):
+            with patch('app.core.ingestion.OllamaEmbedding', return_value=mock_embed_model):
+                with patch('app.core.ingestion._EMBED_BATCH_SIZE', 1), \
+                        patch('app.core.ingestion._OLLAMA_EMBED_URLS', urls):
+                    result = ingest_documents("test_collection", documents, metadatas)
+
+        assert result["status"] == "success"
+        assert len(batch_embed_post.call_args_list) == 4
+        kwargs = mock_db_manager.add_documents.call_args.kwargs
+        assert kwargs["embeddings"] == [[0.0], [1.0], [0.0], [1.0]]
+
+    def test_pack_batches_bounds_size_and_chars(self):
+        """Test that batches close at the text count or character budget, whichever comes first."""
+        texts = ["a" * 40, "b" * 40, "c" * 40, "d" * 10, "e" * 10, "f" * 10, "g" * 200]
+
+        with patch('app.core.ingestion._EMBED_BATCH_SIZE', 3), \
+                patch('app.core.ingestion._EMBED_BATCH_CHARS', 100):
+            bounds = _pack_batches(texts)
+
+        assert bounds == [(0, 2), (2, 5), (5, 6), (6, 7)]
+
+    def test_ingest_documents_splits_overloaded_batch(self, mock_db_manager, mock_embed_model, batch_embed_post):
+        """Test that a batch failing with a server error is retried in halves."""
+        documents = [f"Document {i} content" for i in range(8)]
+        metadatas = [{"filename": f"doc{i}.txt"} for i in range(8)]
+
+        def embed(url, json, timeout):
+            if len(json["input"]) > 4:
+                response = MagicMock()
+                error_response = MagicMock(status_code=500)
+                response.raise_for_status.side_effect = requests.exceptions.HTTPError(response=error_response)
+                return response
+            return _json_response({"embeddings": [[float(len(text))] for text in json["input"]]})
+
+        batch_embed_post.side_effect = embed
+
+        with patch('app.core.ingestion.get_sqlite_manager', return_value=mock_db_manager):
+            with patch('app.core.ingestion.OllamaEmbedding', return_value=mock_embed_model):
+                result = ingest_documents("test_collection", documents, metadatas)
+
+        assert result["status"] == "success"
+        assert [len(c.kwargs["json"]["input"]) for c in batch_embed_post.call_args_list] == [8, 4, 4]
+        mock_embed_model.get_text_embedding.assert_not_called()
+        kwargs = mock_db_manager.add_documents.call_args.kwargs
+        assert kwargs["embeddings"] == [[float(len(text))] for text in kwargs["documents"]]
+
+    def test_ingest_documents_embeds_duplicate_chunks_once(self, mock_db_manager, mock_embed_model, batch_embed_post):
+        """Test that identical chunks share one embedding request and vector."""
+        documents = ["Shared license header", "Unique content", "Shared license header"]
+        metadatas = [{"filename": f"doc{i}.txt"} for i in range(3)]
+
+        def embed(url, json, timeout):
+            return _json_response({"embeddings": [[float(len(text))] for text in json["input"]]})
+
+        batch_embed_post.side_effect = embed
+
+        with patch('app.core.ingestion.get_sqlite_manager', return_value=mock_db_manager):
+            with patch('app.core.ingestion.OllamaEmbedding', return_value=mock_embed_model):
+                result = ingest_documents("test_collection", documents, metadatas)
+
+        assert result["status"] == "success"
+        assert batch_embed_post.call_args.kwargs["json"]["input"] == ["Shared license header", "Unique content"]
+        kwargs = mock_db_manager.add_documents.call_args.kwargs
+        assert kwargs["documents"] == documents
+        assert kwargs["embeddings"] == [[21.0], [14.0], [21.0]]
+
+    def test_ingest_documents_batch_without_embeddings_falls_back(self, mock_db_manager, mock_embed_model, batch_embed_post):
+        """Test per-chunk embedding when /api/embed returns no embeddings."""
+        batch_embed_post.side_effect = None
+        batch_embed_post.return_value = _json_response({})
+
+        with patch('app.core.ingestion.get_sqlite_manager', return_value=mock_db_manager):
+            with patch('app.core.ingestion.OllamaEmbedding', return_value=mock_embed_model):
+                result = ingest_documents("test_collection", ["One", "Two"], [{}, {}])
+
+        assert result["status"] == "success"
+        assert mock_embed_model.get_text_embedding.call_count == 2
+
 
 class TestIngestDirectory:
     """Tests for ingest_directory function."""
@@ -389,6 +613,7 @@ class TestIngestDirectory:
         mock = MagicMock()
         mock.collection_exists.return_value = True
         mock.add_documents = MagicMock()
+        mock.get_ingested_files.return_value = {}
         return mock
 
     @pytest.fixture
@@ -435,15 +660,16 @@ class TestIngestDirectory:
 
         with patch('app.core.ingestion.get_sqlite_manager', return_value=mock_db_manager):
             with patch('app.core.ingestion.OllamaEmbedding', return_value=mock_embed_model):
-                with patch('app.core.ingestion.ingest_file') as mock_ingest:
-                    mock_ingest.side_effect = lambda path, coll, name: (
+                with patch('app.core.ingestion._prepare_chunks') as mock_prepare:
+                    mock_prepare.side_effect = lambda path, name: (
                         ingested_files.append(path),
-                        {"status": "success", "filename": name}
+                        ([], ".py")
                     )[1]
 
                     ingest_directory(str(tmp_path), "test_collection")
 
         # node_modules files should not be in the list
+        assert ingested_files
         assert not any("node_modules" in f for f in ingested_files)
 
     def test_ingest_directory_recursive(self, tmp_path, mock_db_manager, mock_embed_model):
@@ -461,6 +687,125 @@ class TestIngestDirectory:
         # Should find files in nested directories
         assert len(results) >= 2
 
+    def test_ingest_directory_skips_unchanged_files(self, tmp_path, mock_db_manager, mock_embed_model):
+        """Test that a re-run only re-ingests files whose content changed."""
+        (tmp_path / "same.txt").write_text("Unchanged content")
+        (tmp_path / "edited.txt").write_text("Original content")
+        (tmp_path / "old.txt").write_text("Old, settled content")
+        old_mtime_ns = time.time_ns() - 60_000_000_000
+        os.utime(tmp_path / "old.txt", ns=(old_mtime_ns, old_mtime_ns))
+
+        def ingest():
+            with patch('app.core.ingestion.get_sqlite_manager', return_value=mock_db_manager):
+                with patch('app.core.ingestion.OllamaEmbedding', return_value=mock_embed_model):
+                    return {r["filename"]: r["status"] for r in ingest_directory(str(tmp_path), "test_collection")}
+
+        assert set(ingest().values()) == {"success"}
+        saved = mock_db_manager.save_ingested_files.call_args.args[1]
+        assert set(saved) == {str(tmp_path / name) for name in ("same.txt", "edited.txt", "old.txt")}
+        # Only the settled file's stat can be trusted to skip hashing
+        assert saved[str(tmp_path / "old.txt")]["mtime_ns"] == old_mtime_ns
+        assert "mtime_ns" not in saved[str(tmp_path / "same.txt")]
+
+        mock_db_manager.get_ingested_files.return_value = saved
+        (tmp_path / "edited.txt").write_text("Edited content")
+        statuses = ingest()
+
+        assert statuses == {"same.txt": "skipped", "edited.txt": "success", "old.txt": "skipped"}
+        assert mock_db_manager.add_documents.call_count == 4
+        mock_db_manager.delete_documents_by_source_path.assert_called_once_with(
+            "test_collection", str(tmp_path / "edited.txt")
+        )
+
+    def test_ingest_directory_replaces_chunks_of_edited_file(self, tmp_path, clean_db, mock_embed_model):
+        """Test that re-ingesting an edited file drops the chunks of its previous content."""
+        from app.core.kb_types import KBType
+
+        clean_db.create_collection(name="test_collection", kb_type=KBType.GENERIC)
+        docs = tmp_path / "docs"
+        docs.mkdir()
+        (docs / "notes.txt").write_text("Original content")
+
+        def ingest():
+            with patch('app.core.ingestion.get_sqlite_manager', return_value=clean_db):
+                with patch('app.core.ingestion.OllamaEmbedding', return_value=mock_embed_model):
+                    return ingest_directory(str(docs), "test_collection")
+
+        ingest()
+        (docs / "notes.txt").write_text("Edited content")
+        assert [r["status"] for r in ingest()] == ["success"]
+
+        contents = [doc["text"] for doc in clean_db.get_documents_by_metadata("test_collection", {})]
+        assert contents == ["Edited content"]
+
+    def test_ingest_directory_relative_path_uses_absolute_manifest(
+        self, tmp_path, monkeypatch, mock_db_manager, mock_embed_model
+    ):
+        """Test that manifest paths don't depend on the working directory."""
+        (tmp_path / "docs").mkdir()
+        (tmp_path / "docs" / "notes.txt").write_text("Some content")
+        monkeypatch.chdir(tmp_path)
+
+        with patch('app.core.ingestion.get_sqlite_manager', return_value=mock_db_manager):
+            with patch('app.core.ingestion.OllamaEmbedding', return_value=mock_embed_model):
+                ingest_directory("docs", "test_collection")
+
+        saved = mock_db_manager.save_ingested_files.call_args.args[1]
+        assert set(saved) == {str((tmp_path / "docs" / "notes.txt").resolve())}
+
+    def test_iter_supported_files_prunes_skipped_dirs(self, tmp_path):
+        """Test that the directory walk skips excluded trees and unsupported files."""
+        (tmp_path / "src" / "pkg.egg-info").mkdir(parents=True)
+        (tmp_path / "src" / "pkg.egg-info" / "PKG-INFO.txt").write_text("metadata")
+        (tmp_path / "src" / "app.py").write_text("print('hi')")
+        (tmp_path / "src" / "image.png").write_bytes(b"\x89PNG")
+        (tmp_path / ".git").mkdir()
+        (tmp_path / ".git" / "notes.md").write_text("# git internals")
+        (tmp_path / "README.md").write_text("# Readme")
+        (tmp_path / "docs.md").mkdir()  # a directory with a supported suffix
+
+        found = sorted(Path(p).relative_to(tmp_path).as_posix() for p in _iter_supported_files(str(tmp_path)))
+
+        assert found == ["README.md", "src/app.py"]
+
+    def test_ingest_directory_results_in_file_order(self, tmp_path, mock_db_manager, mock_embed_model):
+        """Test that pipelined ingestion returns one result per file, in discovery order, past failures."""
+        for i in range(12):
+            (tmp_path / f"file{i:02d}.txt").write_text(f"Content {i}" if i != 3 else "")
+
+        with patch('app.core.ingestion.get_sqlite_manager', return_value=mock_db_manager):
+            with patch('app.core.ingestion.OllamaEmbedding', return_value=mock_embed_model):
+                results = ingest_directory(str(tmp_path), "test_collection")
+
+        expected = [p.name for p in tmp_path.rglob("*")]
+        assert [r["filename"] for r in results] == expected
+        assert [r["status"] for r in results].count("error") == 1
+        assert mock_db_manager.add_documents.call_count == 11
+
+    def test_ingest_directory_stat_error_keeps_file_order(self, tmp_path, mock_db_manager, mock_embed_model):
+        """Test that a file that can't be fingerprinted is reported in its place."""
+        for i in range(3):
+            (tmp_path / f"file{i}.txt").write_text(f"Content {i}")
+
+        from app.core import ingestion
+
+        def fingerprint(file_path, previous):
+            if file_path.endswith("file0.txt"):
+                raise PermissionError("Permission denied")
+            return real_fingerprint(file_path, previous)
+
+        real_fingerprint = ingestion._file_fingerprint
+        with patch('app.core.ingestion.get_sqlite_manager', return_value=mock_db_manager):
+            with patch('app.core.ingestion.OllamaEmbedding', return_value=mock_embed_model):
+                with patch('app.core.ingestion._file_fingerprint', side_effect=fingerprint):
+                    results = ingest_directory(str(tmp_path), "test_collection")
+
+        expected = [p.name for p in tmp_path.rglob("*")]
+        assert [r["filename"] for r in results] == expected
+        failed = next(r for r in results if r["filename"] == "file0.txt")
+        assert failed["status"] == "error"
+        assert "Permission denied" in failed["error"]
+
 
 class TestSkipDirectoriesConstant:
     """Tests for SKIP_DIRECTORIES constant."""
@@ -114,7 +114,7 @@ class TestInsightExtractor:
         with patch.object(httpx.AsyncClient, 'post', new_callable=AsyncMock) as mock_post:
             mock_post.return_value = MagicMock(
                 status_code=200,
-                json=lambda: mock_response,
+                content=json.dumps(mock_response).encode(),
                 raise_for_status=lambda: None
             )
 
@@ -141,7 +141,7 @@ class TestInsightExtractor:
         with patch.object(httpx.AsyncClient, 'post', new_callable=AsyncMock) as mock_post:
             mock_post.return_value = MagicMock(
                 status_code=200,
-                json=lambda: mock_response,
+                content=json.dumps(mock_response).encode(),
                 raise_for_status=lambda: None
             )
 
@@ -171,7 +171,7 @@ class TestInsightExtractor:
         with patch.object(httpx.AsyncClient, 'post', new_callable=AsyncMock) as mock_post:
             mock_post.return_value = MagicMock(
                 status_code=200,
-                json=lambda: mock_response,
+                content=json.dumps(mock_response).encode(),
                 raise_for_status=lambda: None
             )
 
@@ -205,6 +205,22 @@ class TestInsightExtractor:
         result = extractor._parse_llm_response(response)
         assert "insights" in result
 
+    def test_parse_llm_response_with_preamble(self, extractor):
+        """Test parsing JSON surrounded by conversational text."""
+        response = """Sure, here are the insights:
+```json
+{"insights": [{"type": "solution", "title": "Test", "content": "Uses {braces}", "confidence": 0.8}]}
+```
+Let me know if you need more."""
+
+        result = extractor._parse_llm_response(response)
+        assert result["insights"][0]["content"] == "Uses {braces}"
+
+    def test_parse_llm_response_malformed_object(self, extractor):
+        """Test that a malformed JSON object returns empty insights."""
+        result = extractor._parse_llm_response('{"insights": [}')
+        assert result == {"insights": []}
+
     def test_parse_llm_response_invalid_json(self, extractor):
         """Test parsing invalid JSON returns empty insights."""
         response = "This is not JSON at all"
@@ -328,16 +344,45 @@ class TestExtractInsightsSync:
             mock_instance.extract = AsyncMock(return_value=mock_insights)
             mock_instance.filter_by_confidence.return_value = [mock_insights[0]]
 
-            # This function uses asyncio.get_event_loop() which may cause issues
-            # in test context. We'll test the logic indirectly.
-            with patch('asyncio.get_event_loop') as mock_loop:
-                mock_loop.return_value.run_until_complete.return_value = mock_insights
+            result = extract_insights_sync("summary", min_confidence=0.7)
+
+        assert result == [mock_insights[0]]
+        mock_instance.extract.assert_awaited_once_with("summary", None)
+        mock_instance.filter_by_confidence.assert_called_once_with(mock_insights, 0.7)
+
+    @pytest.mark.asyncio
+    async def test_extract_insights_sync_inside_running_loop(self):
+        """Test that the sync wrapper works when called from a running event loop."""
+        mock_insights = [Insight("decision", "Test", "Content", 0.9)]
+
+        with patch('app.core.insight_extractor.InsightExtractor') as MockExtractor:
+            mock_instance = MockExtractor.return_value
+            mock_instance.extract = AsyncMock(return_value=mock_insights)
+            mock_instance.filter_by_confidence.return_value = mock_insights
+
+            result = extract_insights_sync("summary")
+
+        assert result == mock_insights
+
+    def test_extract_insights_sync_closes_loop_client(self):
+        """Test that the client opened on the wrapper's short-lived loop is closed."""
+        from app.core import http_clients
 
-                # The actual sync wrapper
-                result = extract_insights_sync("summary", min_confidence=0.7)
+        clients = []
 
-                # Verify filter was called
-                mock_instance.filter_by_confidence.assert_called_once()
+        async def extract(summary, insight_types):
+            clients.append(http_clients.get_async_client())
+            return []
+
+        with patch('app.core.insight_extractor.InsightExtractor') as MockExtractor:
+            mock_instance = MockExtractor.return_value
+            mock_instance.extract = extract
+            mock_instance.filter_by_confidence.return_value = []
+
+            extract_insights_sync("summary")
+
+        assert len(clients) == 1
+        assert clients[0].is_closed
 
 
 class TestCallOllama:
@@ -357,7 +402,7 @@ class TestCallOllama:
         with patch.object(httpx.AsyncClient, 'post', new_callable=AsyncMock) as mock_post:
             mock_post.return_value = MagicMock(
                 status_code=200,
-                json=lambda: {"response": '{"insights": []}'},
+                content=json.dumps({"response": '{"insights": []}'}).encode(),
                 raise_for_status=lambda: None
             )
 
@@ -394,7 +439,7 @@ class TestCallOllama:
         with patch.object(httpx.AsyncClient, 'post', new_callable=AsyncMock) as mock_post:
             mock_post.return_value = MagicMock(
                 status_code=200,
-                json=lambda: mock_response,
+                content=json.dumps(mock_response).encode(),
                 raise_for_status=lambda: None
             )
 
@@ -427,6 +472,98 @@ class TestCallOllama:
                 await extractor._call_ollama("prompt")
 
 
+class TestExtractMany:
+    """Tests for multi-transcript extraction."""
+
+    @pytest.fixture
+    def extractor(self):
+        """Create extractor instance."""
+        return InsightExtractor(
+            ollama_base_url="http://localhost:11434",
+            model="llama3.1"
+        )
+
+    @staticmethod
+    def _ollama_response(results):
+        return MagicMock(
+            status_code=200,
+            content=json.dumps({"response": json.dumps({"results": results})}).encode(),
+            raise_for_status=lambda: None
+        )
+
+    @pytest.mark.asyncio
+    async def test_extract_many_single_request(self, extractor):
+        """Several sessions share one prompt and results are keyed by id."""
+        results = [
+            {"id": "s1", "insights": [
+                {"type": "decision", "title": "Use SQLite", "content": "...", "confidence": 0.9}
+            ]},
+            {"id": "s2", "insights": [
+                {"type": "blocker", "title": "Port in use", "content": "...", "confidence": 0.8},
+                {"type": "pattern", "title": "Retry loop", "content": "...", "confidence": 0.7}
+            ]},
+        ]
+
+        with patch.object(httpx.AsyncClient, 'post', new_callable=AsyncMock) as mock_post:
+            mock_post.return_value = self._ollama_response(results)
+
+            insights = await extractor.extract_many(
+                [("s1", "first transcript"), ("s2", "second transcript"), ("s3", "third")],
+                insight_types=["decision", "blocker"]
+            )
+
+            mock_post.assert_called_once()
+            payload = mock_post.call_args[1]["json"]
+            assert "first transcript" in payload["prompt"]
+            assert "second transcript" in payload["prompt"]
+            assert payload["keep_alive"] == "10m"
+
+        assert [i.title for i in insights["s1"]] == ["Use SQLite"]
+        assert [i.title for i in insights["s2"]] == ["Port in use"]
+        assert insights["s3"] == []
+
+    @pytest.mark.asyncio
+    async def test_extract_many_packs_by_budget(self, extractor):
+        """Summaries beyond the character budget go to separate requests."""
+        with patch('app.core.insight_extractor._BATCH_MAX_CHARS', 10), \
+             patch.object(httpx.AsyncClient, 'post', new_callable=AsyncMock) as mock_post:
+            mock_post.return_value = self._ollama_response([])
+
+            insights = await extractor.extract_many(
+                [("a", "x" * 6), ("b", "y" * 6), ("c", "z" * 20)]
+            )
+
+            assert mock_post.call_count == 3
+
+        assert insights == {"a": [], "b": [], "c": []}
+
+    @pytest.mark.asyncio
+    async def test_extract_many_ignores_unknown_ids(self, extractor):
+        """Insights attributed to ids outside the pack are dropped."""
+        results = [
+            {"id": "ghost", "insights": [
+                {"type": "decision", "title": "Made up", "content": "...", "confidence": 0.9}
+            ]},
+        ]
+
+        with patch.object(httpx.AsyncClient, 'post', new_callable=AsyncMock) as mock_post:
+            mock_post.return_value = self._ollama_response(results)
+
+            insights = await extractor.extract_many([("s1", "transcript")])
+
+        assert insights == {"s1": []}
+
+    @pytest.mark.asyncio
+    async def test_extract_many_api_error(self, extractor):
+        """A failed request leaves its sessions with no insights."""
+        with patch.object(httpx.AsyncClient, 'post', new_callable=AsyncMock) as mock_post:
+            mock_post.side_effect = httpx.ConnectError("Connection refused")
+
+            insights = await extractor.extract_many([("s1", "one"), ("s2", "two")])
+
+        assert insights == {"s1": [], "s2": []}
+
+
 class TestEdgeCases:
     """Tests for edge cases and error conditions."""
 
@@ -444,7 +581,7 @@ class TestEdgeCases:
         with patch.object(httpx.AsyncClient, 'post', new_callable=AsyncMock) as mock_post:
             mock_post.return_value = MagicMock(
                 status_code=200,
-                json=lambda: {"response": '{"insights": []}'},
+                content=json.dumps({"response": '{"insights": []}'}).encode(),
                 raise_for_status=lambda: None
             )
 
@@ -459,7 +596,7 @@ class TestEdgeCases:
         with patch.object(httpx.AsyncClient, 'post', new_callable=AsyncMock) as mock_post:
             mock_post.return_value = MagicMock(
                 status_code=200,
-                json=lambda: {"response": '{"insights": []}'},
+                content=json.dumps({"response": '{"insights": []}'}).encode(),
                 raise_for_status=lambda: None
             )
 
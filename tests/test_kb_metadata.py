@@ -2,10 +2,14 @@
 Tests for KB metadata and types functionality.
 """
 
+import threading
+import time
+
 import pytest
 from datetime import datetime
 from unittest.mock import patch, MagicMock
 
+from app.core import kb_metadata_cache
 from app.core.kb_metadata import (
     generate_tags,
     format_timestamp,
@@ -178,7 +182,7 @@ class TestKBTypeFunctions:
             assert info.color is not None
             assert info.name is not None
             assert info.description is not None
-            assert isinstance(info.use_cases, list)
+            assert isinstance(info.use_cases, tuple)
 
     def test_get_kb_type_info_default(self):
         """Test get_kb_type_info with invalid type (should return default)."""
@@ -238,33 +242,33 @@ class TestKBMetadataFunctions:
     def test_generate_tags(self):
         """Test generate_tags function."""
         # Test known file types
-        assert generate_tags(".py") == ["Code", "Python"]
-        assert generate_tags(".js") == ["Code", "JavaScript"]
-        assert generate_tags(".jsx") == ["Code", "React"]
-        assert generate_tags(".ts") == ["Code", "TypeScript"]
-        assert generate_tags(".tsx") == ["Code", "React", "TypeScript"]
-        assert generate_tags(".go") == ["Code", "Go"]
-        assert generate_tags(".rs") == ["Code", "Rust"]
-        assert generate_tags(".java") == ["Code", "Java"]
-        assert generate_tags(".cpp") == ["Code", "C++"]
-        assert generate_tags(".c") == ["Code", "C"]
-        assert generate_tags(".h") == ["Code", "Header"]
-        assert generate_tags(".md") == ["Document", "Markdown"]
-        assert generate_tags(".txt") == ["Document", "Text"]
-        assert generate_tags(".pdf") == ["Document", "PDF"]
-        assert generate_tags(".json") == ["Config", "JSON"]
-        assert generate_tags(".yaml") == ["Config", "YAML"]
-        assert generate_tags(".yml") == ["Config", "YAML"]
+        assert generate_tags(".py") == ("Code", "Python")
+        assert generate_tags(".js") == ("Code", "JavaScript")
+        assert generate_tags(".jsx") == ("Code", "React")
+        assert generate_tags(".ts") == ("Code", "TypeScript")
+        assert generate_tags(".tsx") == ("Code", "React", "TypeScript")
+        assert generate_tags(".go") == ("Code", "Go")
+        assert generate_tags(".rs") == ("Code", "Rust")
+        assert generate_tags(".java") == ("Code", "Java")
+        assert generate_tags(".cpp") == ("Code", "C++")
+        assert generate_tags(".c") == ("Code", "C")
+        assert generate_tags(".h") == ("Code", "Header")
+        assert generate_tags(".md") == ("Document", "Markdown")
+        assert generate_tags(".txt") == ("Document", "Text")
+        assert generate_tags(".pdf") == ("Document", "PDF")
+        assert generate_tags(".json") == ("Config", "JSON")
+        assert generate_tags(".yaml") == ("Config", "YAML")
+        assert generate_tags(".yml") == ("Config", "YAML")
 
         # Test unknown file type
-        assert generate_tags(".xyz") == ["Document", "Unknown"]
-        assert generate_tags("") == ["Document", "Unknown"]
+        assert generate_tags(".xyz") == ("Document", "Unknown")
+        assert generate_tags("") == ("Document", "Unknown")
 
     def test_generate_tags_case_insensitive(self):
         """Test generate_tags function is case insensitive."""
-        assert generate_tags(".PY") == ["Code", "Python"]
-        assert generate_tags(".JS") == ["Code", "JavaScript"]
-        assert generate_tags(".MD") == ["Document", "Markdown"]
+        assert generate_tags(".PY") == ("Code", "Python")
+        assert generate_tags(".JS") == ("Code", "JavaScript")
+        assert generate_tags(".MD") == ("Document", "Markdown")
 
     def test_format_timestamp_valid(self):
         """Test format_timestamp with valid timestamp."""
@@ -279,6 +283,19 @@ class TestKBMetadataFunctions:
 
         assert formatted == "Updated: Unknown"
 
+    def test_format_timestamp_cached(self):
+        """Repeated timestamps are formatted once."""
+        format_timestamp.cache_clear()
+
+        assert format_timestamp("2023-01-15T14:30:00") == "Updated: 01/15/2023"
+        assert format_timestamp("2023-01-15T14:30:00") == "Updated: 01/15/2023"
+        assert format_timestamp("invalid-timestamp") == "Updated: Unknown"
+        assert format_timestamp("invalid-timestamp") == "Updated: Unknown"
+
+        info = format_timestamp.cache_info()
+        assert info.hits == 2
+        assert info.misses == 2
+
     def test_format_timestamp_none(self):
         """Test format_timestamp with None."""
         formatted = format_timestamp(None)
@@ -309,18 +326,21 @@ class TestKBMetadataFunctions:
             # Should contain color
             assert info.color in badge
 
+    def test_get_kb_type_badge_unknown_type(self):
+        """Unknown types get the generic badge."""
+        assert get_kb_type_badge("unknown_type") == get_kb_type_badge(KBType.GENERIC)
+
     def test_get_kb_type_summary(self):
         """Test get_kb_type_summary function."""
         # Mock database manager
         with patch('app.core.kb_metadata.get_sqlite_manager') as mock_get_db:
             mock_db = MagicMock()
-            mock_db.list_collections.return_value = [
-                {"metadata": {"kb_type": "generic"}},
-                {"metadata": {"kb_type": "code"}},
-                {"metadata": {"kb_type": "code"}},
-                {"metadata": {"kb_type": "documentation"}},
-                {"metadata": {"kb_type": "agent-os"}}
-            ]
+            mock_db.count_collections_by_kb_type.return_value = {
+                "generic": 1,
+                "code": 2,
+                "documentation": 1,
+                "agent-os": 1
+            }
             mock_get_db.return_value = mock_db
 
             summary = get_kb_type_summary()
@@ -335,11 +355,11 @@ class TestKBMetadataFunctions:
         # Mock database manager
         with patch('app.core.kb_metadata.get_sqlite_manager') as mock_get_db:
             mock_db = MagicMock()
-            mock_db.list_collections.return_value = [
-                {"metadata": {"kb_type": "generic"}},
-                {"metadata": {"kb_type": "unknown_type"}},
-                {"metadata": {"kb_type": "another_unknown"}}
-            ]
+            mock_db.count_collections_by_kb_type.return_value = {
+                "generic": 1,
+                "unknown_type": 1,
+                "another_unknown": 1
+            }
             mock_get_db.return_value = mock_db
 
             summary = get_kb_type_summary()
@@ -355,7 +375,7 @@ class TestKBMetadataFunctions:
         # Mock database manager
         with patch('app.core.kb_metadata.get_sqlite_manager') as mock_get_db:
             mock_db = MagicMock()
-            mock_db.list_collections.return_value = []
+            mock_db.count_collections_by_kb_type.return_value = {}
             mock_get_db.return_value = mock_db
 
             summary = get_kb_type_summary()
@@ -374,30 +394,18 @@ class TestKBMetadataIntegration:
         """Test get_documents_metadata with real data."""
         mock_db = MagicMock()
         mock_db.collection_exists.return_value = True
-        mock_db.get_documents_by_metadata.return_value = [
-            {
-                "metadata": {
-                    "filename": "test_0.txt",
-                    "file_type": ".txt",
-                    "upload_date": "2023-01-01T00:00:00",
-                    "chunk_index": 0
-                }
-            },
+        mock_db.list_documents.return_value = [
             {
-                "metadata": {
-                    "filename": "test_0.txt",
-                    "file_type": ".txt",
-                    "upload_date": "2023-01-01T00:00:00",
-                    "chunk_index": 1
-                }
+                "filename": "test_1.txt",
+                "file_type": ".txt",
+                "upload_date": "2023-01-02T00:00:00",
+                "chunk_count": 1
             },
             {
-                "metadata": {
-                    "filename": "test_1.txt",
-                    "file_type": ".txt",
-                    "upload_date": "2023-01-02T00:00:00",
-                    "chunk_index": 0
-                }
+                "filename": "test_0.txt",
+                "file_type": ".txt",
+                "upload_date": "2023-01-01T00:00:00",
+                "chunk_count": 2
             }
         ]
         mock_get_db.return_value = mock_db
@@ -410,7 +418,7 @@ class TestKBMetadataIntegration:
         # Check first document
         doc0 = next(doc for doc in metadata if doc["filename"] == "test_0.txt")
         assert doc0["file_type"] == ".txt"
-        assert doc0["tags"] == ["Document", "Text"]
+        assert doc0["tags"] == ("Document", "Text")
         assert doc0["upload_date"] == "2023-01-01T00:00:00"
         assert doc0["formatted_date"] == "Updated: 01/01/2023"
         assert doc0["chunk_count"] == 2  # 2 chunks for this file
@@ -425,15 +433,17 @@ class TestKBMetadataIntegration:
             "description": "Test code KB",
             "created_at": "2023-01-01T00:00:00"
         }
-        mock_db.get_documents_by_metadata.return_value = [
-            {"metadata": {"filename": "test_0.txt", "upload_date": "2023-01-01T00:00:00"}},
-            {"metadata": {"filename": "test_0.txt", "upload_date": "2023-01-01T00:00:00"}},
-            {"metadata": {"filename": "test_1.txt", "upload_date": "2023-01-02T00:00:00"}}
-        ]
+        mock_db.get_document_stats.return_value = {
+            "total_documents": 2,
+            "total_chunks": 3,
+            "last_updated": "2023-01-02T00:00:00"
+        }
         mock_get_db.return_value = mock_db
 
         stats = get_collection_stats(sample_kb["name"])
 
+        mock_db.get_document_stats.assert_called_once_with(sample_kb["name"])
+
         assert stats["total_documents"] == 2  # 2 unique filenames
         assert stats["total_chunks"] == 3  # 3 total chunks
         assert stats["last_updated"] == "2023-01-02T00:00:00"  # Latest upload
@@ -464,7 +474,11 @@ class TestKBMetadataIntegration:
             "description": "Empty KB",
             "created_at": "2023-01-01T00:00:00"
         }
-        mock_db.get_documents_by_metadata.return_value = []
+        mock_db.get_document_stats.return_value = {
+            "total_documents": 0,
+            "total_chunks": 0,
+            "last_updated": None
+        }
         mock_get_db.return_value = mock_db
 
         stats = get_collection_stats(sample_kb["name"])
@@ -475,47 +489,34 @@ class TestKBMetadataIntegration:
         assert stats["kb_type"] == "generic"
 
     @patch('app.core.kb_metadata.get_sqlite_manager')
-    def test_get_documents_metadata_sorted_by_date(self, mock_get_db, sample_kb):
-        """Test that get_documents_metadata sorts by upload date."""
+    def test_get_documents_metadata_paginated(self, mock_get_db, sample_kb):
+        """Test that get_documents_metadata requests one page from the database."""
         mock_db = MagicMock()
         mock_db.collection_exists.return_value = True
-
-        # Create documents with different dates
-        docs = []
-        for i in range(5):
-            upload_date = f"2023-01-{i:02d}T00:00:00"
-            docs.append({
-                "metadata": {
-                    "filename": f"test_{i}.txt",
-                    "upload_date": upload_date,
-                    "chunk_index": 0
-                }
-            })
-
-        # Shuffle to test sorting
-        import random
-        random.shuffle(docs)
-
-        mock_db.get_documents_by_metadata.return_value = docs
+        mock_db.list_documents.return_value = [
+            {
+                "filename": f"test_{i}.txt",
+                "file_type": ".txt",
+                "upload_date": f"2023-01-{i:02d}T00:00:00",
+                "chunk_count": 1
+            }
+            for i in (4, 3)
+        ]
         mock_get_db.return_value = mock_db
 
-        metadata = get_documents_metadata(sample_kb["name"])
-
-        # Should be sorted by date (newest first)
-        dates = [doc["upload_date"] for doc in metadata]
-        assert dates == sorted(dates, reverse=True)
+        metadata = get_documents_metadata(sample_kb["name"], limit=2, offset=1)
 
-        # First should be newest (01-05)
-        assert metadata[0]["filename"] == "test_4.txt"
-        # Last should be oldest (01-01)
-        assert metadata[-1]["filename"] == "test_0.txt"
+        mock_db.list_documents.assert_called_once_with(sample_kb["name"], limit=2, offset=1)
+        # Database order (newest first) is kept
+        assert [doc["filename"] for doc in metadata] == ["test_4.txt", "test_3.txt"]
+        assert metadata[0]["formatted_date"] == "Updated: 01/04/2023"
 
     @patch('app.core.kb_metadata.get_sqlite_manager')
     def test_get_documents_metadata_error_handling(self, mock_get_db):
         """Test get_documents_metadata error handling."""
         mock_db = MagicMock()
         mock_db.collection_exists.return_value = True
-        mock_db.get_documents_by_metadata.side_effect = Exception("Database error")
+        mock_db.list_documents.side_effect = Exception("Database error")
         mock_get_db.return_value = mock_db
 
         metadata = get_documents_metadata("test_kb")
@@ -529,7 +530,7 @@ class TestKBMetadataIntegration:
         mock_db = MagicMock()
         mock_db.collection_exists.return_value = True
         mock_db.get_collection_metadata.side_effect = Exception("Database error")
-        mock_db.get_documents_by_metadata.side_effect = Exception("Database error")
+        mock_db.get_document_stats.side_effect = Exception("Database error")
         mock_get_db.return_value = mock_db
 
         stats = get_collection_stats("test_kb")
@@ -538,4 +539,120 @@ class TestKBMetadataIntegration:
         assert stats["total_documents"] == 0
         assert stats["total_chunks"] == 0
         assert stats["last_updated"] is None
-        assert stats["kb_type"] == "generic"
\ No newline at end of file
+        assert stats["kb_type"] == "generic"
+
+
+@pytest.mark.unit
+class TestKBMetadataCache:
+    """Tests for the stale-while-revalidate metadata cache."""
+
+    @patch('app.core.kb_metadata.get_sqlite_manager')
+    def test_get_collection_stats_cached(self, mock_get_db):
+        """Repeated reads are served from the cache until invalidated."""
+        mock_db = MagicMock()
+        mock_db.collection_exists.return_value = True
+        mock_db.get_collection_metadata.return_value = {"kb_type": "code"}
+        mock_db.get_document_stats.return_value = {
+            "total_documents": 1,
+            "total_chunks": 2,
+            "last_updated": "2023-01-01T00:00:00"
+        }
+        mock_get_db.return_value = mock_db
+
+        first = get_collection_stats("test_kb")
+        second = get_collection_stats("test_kb")
+
+        assert first == second
+        assert mock_db.get_document_stats.call_count == 1
+
+        kb_metadata_cache.invalidate("test_kb")
+        mock_db.get_document_stats.return_value = {
+            "total_documents": 2,
+            "total_chunks": 3,
+            "last_updated": "2023-01-02T00:00:00"
+        }
+
+        assert get_collection_stats("test_kb")["total_documents"] == 2
+        assert mock_db.get_document_stats.call_count == 2
+
+    @patch('app.core.kb_metadata.get_sqlite_manager')
+    def test_errors_are_not_cached(self, mock_get_db):
+        """A failed read falls back for that call only; the next read retries."""
+        mock_db = MagicMock()
+        mock_db.collection_exists.return_value = True
+        mock_db.get_collection_metadata.return_value = {"kb_type": "code"}
+        mock_db.get_document_stats.side_effect = Exception("Database error")
+        mock_db.list_documents.side_effect = Exception("Database error")
+        mock_get_db.return_value = mock_db
+
+        assert get_collection_stats("test_kb")["total_documents"] == 0
+        assert get_documents_metadata("test_kb") == []
+
+        mock_db.get_document_stats.side_effect = None
+        mock_db.get_document_stats.return_value = {
+            "total_documents": 1,
+            "total_chunks": 2,
+            "last_updated": "2023-01-01T00:00:00"
+        }
+        mock_db.list_documents.side_effect = None
+        mock_db.list_documents.return_value = [{
+            "filename": "a.md",
+            "file_type": ".md",
+            "upload_date": "2023-01-01T00:00:00"
+        }]
+
+        assert get_collection_stats("test_kb")["total_documents"] == 1
+        assert [doc["filename"] for doc in get_documents_metadata("test_kb")] == ["a.md"]
+
+    def test_stale_entry_served_while_refreshing(self):
+        """An expired entry is returned immediately and refreshed in the background."""
+        calls = []
+        refreshed = threading.Event()
+
+        @kb_metadata_cache.swr_cache
+        def load(collection_name):
+            calls.append(collection_name)
+            if len(calls) > 1:
+                refreshed.set()
+            return len(calls)
+
+        with patch('app.core.kb_metadata_cache.CACHE_TTL', 0):
+            assert load("test_kb") == 1
+            # Stale: old value now, refresh runs on the background executor
+            assert load("test_kb") == 1
+            assert refreshed.wait(timeout=5)
+
+        for _ in range(50):
+            if load("test_kb") == 2:
+                break
+            time.sleep(0.01)
+        assert load("test_kb") == 2
+
+    def test_invalidate_discards_in_flight_refresh(self):
+        """A refresh started before invalidate() does not repopulate the cache."""
+        release = threading.Event()
+        started = threading.Event()
+        values = iter(["old", "in-flight", "new"])
+
+        @kb_metadata_cache.swr_cache
+        def load(collection_name):
+            value = next(values)
+            if value == "in-flight":
+                started.set()
+                release.wait(timeout=5)
+            return value
+
+        with patch('app.core.kb_metadata_cache.CACHE_TTL', 0):
+            assert load("test_kb") == "old"
+            assert load("test_kb") == "old"
+            assert started.wait(timeout=5)
+
+        kb_metadata_cache.invalidate("test_kb")
+        release.set()
+
+        assert load("test_kb") == "new"
+        for _ in range(50):
+            if not kb_metadata_cache._refreshing:
+                break
+            time.sleep(0.01)
+        assert load("test_kb") == "new"
@@ -9,7 +9,13 @@ from pathlib import Path
 from unittest.mock import patch, MagicMock
 import numpy as np
 
-from app.core.sqlite_manager import SQLiteManager, generate_slug, get_sqlite_manager
+from app.core.sqlite_manager import (
+    SQLiteManager,
+    decode_embedding,
+    generate_slug,
+    get_sqlite_manager,
+    quantize_embeddings,
+)
 from app.core.kb_types import KBType
 
 
@@ -42,6 +48,21 @@ class TestSQLiteManager:
             assert manager.db_path == str(db_path)
             assert Path(db_path).exists()
 
+    def test_sqlite_manager_uses_wal(self, tmp_path):
+        """Test that connections use WAL with synchronous=NORMAL and the bulk-insert pragmas."""
+        manager = SQLiteManager(str(tmp_path / "test.db"))
+
+        conn = manager.get_connection()
+        try:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            # 1 == NORMAL
+            assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+            # 2 == MEMORY
+            assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2
+            assert conn.execute("PRAGMA cache_size").fetchone()[0] == -65536
+        finally:
+            conn.close()
+
     def test_create_collection(self, clean_db):
         """Test creating a knowledge base collection."""
         result = clean_db.create_collection(
@@ -91,6 +112,16 @@ class TestSQLiteManager:
         assert len(collections) >= 1
         assert any(col["name"] == kb_data["name"] for col in collections)
 
+    def test_count_collections_by_kb_type(self, clean_db):
+        """Test counting knowledge bases per type."""
+        assert clean_db.count_collections_by_kb_type() == {}
+
+        clean_db.create_collection("code_1", KBType.CODE)
+        clean_db.create_collection("code_2", KBType.CODE)
+        clean_db.create_collection("docs", KBType.DOCUMENTATION)
+
+        assert clean_db.count_collections_by_kb_type() == {"code": 2, "documentation": 1}
+
     def test_get_collection_metadata(self, clean_db):
         """Test getting collection metadata."""
         kb_data = clean_db.create_collection(
@@ -275,6 +306,73 @@ class TestSQLiteManagerDocuments:
                 ids=["test"]
             )
 
+    def test_list_documents(self, clean_db):
+        """Test listing files grouped by filename, newest first, with pagination."""
+        clean_db.create_collection("test_kb", KBType.GENERIC)
+
+        metadatas = [
+            {"filename": "a.txt", "file_type": ".txt", "upload_date": "2023-01-01T00:00:00"},
+            {"filename": "a.txt", "file_type": ".txt", "upload_date": "2023-01-01T00:00:00"},
+            {"filename": "b.py", "file_type": ".py", "upload_date": "2023-01-03T00:00:00"},
+            {"filename": "c.md", "file_type": ".md", "upload_date": "2023-01-02T00:00:00"},
+        ]
+        clean_db.add_documents(
+            kb_name="test_kb",
+            documents=[f"chunk {i}" for i in range(4)],
+            embeddings=[[0.1 * (i + 1)] * 768 for i in range(4)],
+            metadatas=metadatas,
+            ids=[f"doc{i}" for i in range(4)]
+        )
+
+        documents = clean_db.list_documents("test_kb")
+        assert documents == [
+            {"filename": "b.py", "file_type": ".py", "upload_date": "2023-01-03T00:00:00", "chunk_count": 1},
+            {"filename": "c.md", "file_type": ".md", "upload_date": "2023-01-02T00:00:00", "chunk_count": 1},
+            {"filename": "a.txt", "file_type": ".txt", "upload_date": "2023-01-01T00:00:00", "chunk_count": 2},
+        ]
+
+        page = clean_db.list_documents("test_kb", limit=1, offset=1)
+        assert [doc["filename"] for doc in page] == ["c.md"]
+
+        assert clean_db.list_documents("nonexistent_kb") == []
+
+    def test_get_document_stats(self, clean_db):
+        """Test aggregated chunk, document, and upload date stats."""
+        clean_db.create_collection("test_kb", KBType.GENERIC)
+        clean_db.create_collection("other_kb", KBType.GENERIC)
+
+        clean_db.add_documents(
+            kb_name="test_kb",
+            documents=["a0", "a1", "b0"],
+            embeddings=[[0.1] * 768, [0.2] * 768, [0.3] * 768],
+            metadatas=[
+                {"filename": "a.txt", "upload_date": "2023-01-01T00:00:00"},
+                {"filename": "a.txt", "upload_date": "2023-01-01T00:00:00"},
+                {"filename": "b.txt", "upload_date": "2023-01-02T00:00:00"},
+            ],
+            ids=["a0", "a1", "b0"]
+        )
+        clean_db.add_documents(
+            kb_name="other_kb",
+            documents=["c0"],
+            embeddings=[[0.4] * 768],
+            metadatas=[{"filename": "c.txt", "upload_date": "2024-01-01T00:00:00"}],
+            ids=["c0"]
+        )
+
+        assert clean_db.get_document_stats("test_kb") == {
+            "total_documents": 2,
+            "total_chunks": 3,
+            "last_updated": "2023-01-02T00:00:00"
+        }
+
+        clean_db.create_collection("empty_kb", KBType.GENERIC)
+        assert clean_db.get_document_stats("empty_kb") == {
+            "total_documents": 0,
+            "total_chunks": 0,
+            "last_updated": None
+        }
+
     def test_get_documents_by_metadata(self, clean_db):
         """Test retrieving documents by metadata filter."""
         kb_data = clean_db.create_collection(
@@ -390,6 +488,118 @@ class TestSQLiteManagerDocuments:
                 assert isinstance(result["similarity"], float)
 
 
+    def test_add_documents_quantized(self, clean_db):
+        """Test that int8-quantized embeddings round-trip through similarity search."""
+        kb_data = clean_db.create_collection(
+            name="test_kb",
+            kb_type=KBType.GENERIC,
+            description="Test knowledge base"
+        )
+
+        np.random.seed(42)
+        embeddings = np.random.randn(3, 768).tolist()
+        clean_db.add_documents(
+            kb_name=kb_data["name"],
+            documents=[f"Document {i}" for i in range(3)],
+            embeddings=embeddings,
+            metadatas=[{"filename": f"test_{i}.txt"} for i in range(3)],
+            ids=[f"doc_{i}" for i in range(3)],
+            quantize=True
+        )
+
+        conn = clean_db.get_connection()
+        try:
+            row = conn.execute("SELECT embedding, embedding_scale FROM documents LIMIT 1").fetchone()
+        finally:
+            conn.close()
+        assert len(row["embedding"]) == 768
+        assert row["embedding_scale"] is not None
+
+        results = clean_db.query_similar(
+            kb_id=kb_data["id"],
+            query_embedding=embeddings[1],
+            top_k=1
+        )
+        assert results[0]["doc_id"] == "doc_1"
+        assert results[0]["similarity"] > 0.99
+
+    def test_add_documents_normalizes_embeddings(self, clean_db):
+        """Test that embeddings are stored as unit vectors and still rank by cosine similarity."""
+        kb_data = clean_db.create_collection(
+            name="test_kb",
+            kb_type=KBType.GENERIC,
+            description="Test knowledge base"
+        )
+
+        embeddings = [[3.0, 4.0, 0.0], [0.0, 0.0, 10.0], [0.0, 0.0, 0.0]]
+        clean_db.add_documents(
+            kb_name=kb_data["name"],
+            documents=["Document 0", "Document 1", "Document 2"],
+            embeddings=embeddings,
+            metadatas=[{}, {}, {}],
+            ids=["doc_0", "doc_1", "doc_2"]
+        )
+
+        conn = clean_db.get_connection()
+        try:
+            rows = conn.execute("SELECT embedding, embedding_scale FROM documents ORDER BY doc_id").fetchall()
+        finally:
+            conn.close()
+        stored = [decode_embedding(row["embedding"], row["embedding_scale"]) for row in rows]
+        np.testing.assert_allclose(stored[0], [0.6, 0.8, 0.0], rtol=1e-6)
+        np.testing.assert_allclose(stored[1], [0.0, 0.0, 1.0])
+        np.testing.assert_array_equal(stored[2], [0.0, 0.0, 0.0])
+
+        results = clean_db.query_similar(kb_id=kb_data["id"], query_embedding=[0.0, 1.0, 2.0], top_k=3)
+        assert [r["doc_id"] for r in results] == ["doc_1", "doc_0", "doc_2"]
+        assert results[0]["similarity"] == pytest.approx(2 / 5 ** 0.5)
+        assert results[2]["similarity"] == 0.0
+
+    def test_quantize_embeddings_round_trip(self):
+        """Test quantize_embeddings/decode_embedding accuracy and zero vectors."""
+        np.random.seed(0)
+        vectors = np.random.randn(2, 768).astype(np.float32)
+        vectors[1] = 0.0
+
+        quantized, scales = quantize_embeddings(vectors)
+        decoded = decode_embedding(quantized[0].tobytes(), float(scales[0]))
+
+        cosine = np.dot(decoded, vectors[0]) / (np.linalg.norm(decoded) * np.linalg.norm(vectors[0]))
+        assert quantized.dtype == np.int8
+        assert cosine > 0.999
+        assert not np.any(decode_embedding(quantized[1].tobytes(), float(scales[1])))
+
+    def test_schema_migration_adds_embedding_scale(self, tmp_path):
+        """Test that databases created before embedding_scale get the column."""
+        import sqlite3
+
+        db_path = tmp_path / "old.db"
+        conn = sqlite3.connect(db_path)
+        conn.execute(
+            """
+            CREATE TABLE documents (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kb_id INTEGER NOT NULL,
+                doc_id TEXT NOT NULL,
+                content TEXT NOT NULL,
+                embedding BLOB,
+                metadata TEXT DEFAULT '{}',
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        conn.commit()
+        conn.close()
+
+        manager = SQLiteManager(str(db_path))
+
+        conn = manager.get_connection()
+        try:
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(documents)")}
+        finally:
+            conn.close()
+        assert "embedding_scale" in columns
+
 @pytest.mark.integration
 class TestSQLiteManagerProjects:
     """Test SQLite manager project operations."""
@@ -523,6 +733,52 @@ class TestSQLiteManagerProjects:
         assert folders["project_profile"]["folder_path"] == "/profile"
         assert folders["project_profile"]["auto_sync"] is False
 
+    def test_hook_synced_files(self, clean_db):
+        """Test upserting, reading and clearing hook synced-file fingerprints."""
+        project = clean_db.create_project("test_project", "/path")
+        pid = project["id"]
+
+        clean_db.save_hook_synced_files(pid, "knowledge_docs", {
+            "a.md": {"algo": "sha256", "hash": "aa", "mtime_ns": 1, "size": 2},
+            "sub/b.md": {"algo": "sha256", "hash": "bb"},
+        })
+        clean_db.save_hook_synced_files(pid, "knowledge_docs", {
+            "a.md": {"algo": "blake3", "hash": "cc"},
+        })
+        clean_db.save_hook_synced_files(pid, "project_profile", {
+            "c.md": {"algo": "sha256", "hash": "dd"},
+        })
+
+        assert clean_db.get_hook_synced_files(pid, "knowledge_docs") == {
+            "a.md": {"algo": "blake3", "hash": "cc"},
+            "sub/b.md": {"algo": "sha256", "hash": "bb"},
+        }
+
+        clean_db.clear_hook_synced_files(pid, "knowledge_docs")
+        assert clean_db.get_hook_synced_files(pid, "knowledge_docs") == {}
+        assert list(clean_db.get_hook_synced_files(pid, "project_profile")) == ["c.md"]
+
+    def test_ingested_files(self, clean_db):
+        """Test upserting and reading ingested-file fingerprints, and their removal with the KB."""
+        clean_db.create_collection(name="docs_kb", kb_type=KBType.GENERIC)
+        clean_db.create_collection(name="other_kb", kb_type=KBType.GENERIC)
+
+        clean_db.save_ingested_files("docs_kb", {
+            "/repo/a.md": {"hash": "aa", "mtime_ns": 1, "size": 2},
+            "/repo/sub/b.md": {"hash": "bb"},
+        })
+        clean_db.save_ingested_files("docs_kb", {"/repo/a.md": {"hash": "cc"}})
+        clean_db.save_ingested_files("other_kb", {"/repo/a.md": {"hash": "dd"}})
+
+        assert clean_db.get_ingested_files("docs_kb") == {
+            "/repo/a.md": {"hash": "cc"},
+            "/repo/sub/b.md": {"hash": "bb"},
+        }
+
+        clean_db.delete_collection("docs_kb")
+        assert clean_db.get_ingested_files("docs_kb") == {}
+        assert clean_db.get_ingested_files("other_kb") == {"/repo/a.md": {"hash": "dd"}}
+
 
 @pytest.mark.unit
 class TestSQLiteManagerSingleton: